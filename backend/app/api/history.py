@@ -1,60 +1,111 @@
 import logging
 import os
 import json
-from typing import List
-from fastapi import APIRouter, HTTPException
-from ..models.schemas import ASRResult
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from ..models.schemas import ASRResult, HistoryPage, SearchPage
+from ..services.history_index import history_index, SORT_FIELDS
 from ..core.config import RESULTS_DIR
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/history", tags=["History"])
 
+# 每页最多返回的记录数
+MAX_PAGE_SIZE = 500
 
-@router.get("/list", response_model=List[dict])
-async def get_history_list():
-    """获取历史记录列表"""
-    history_items = []
-    
+
+def parse_date_bound(value: Optional[str], name: str, end_of_day: bool = False) -> Optional[str]:
+    """
+    把日期 / 时间参数转换为与结果 timestamp 同格式的 UTC 字符串，用于字符串比较
+
+    只给出日期且 end_of_day 为 True 时取次日零点，使 date_to 包含当天
+    """
+    if not value:
+        return None
     try:
-        if not os.path.exists(RESULTS_DIR):
-            return []
-        
-        # 遍历 results 目录
-        for filename in os.listdir(RESULTS_DIR):
-            if filename.endswith('.json') and not filename.startswith('.'):
-                file_path = os.path.join(RESULTS_DIR, filename)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    # 提取元数据
-                    result_id = data.get('result_id', filename.replace('.json', ''))
-                    speaker_count = len(data.get('speakers', []))
-                    text_preview = data.get('text', '')[:100] + '...' if len(data.get('text', '')) > 100 else data.get('text', '')
-                    
-                    history_items.append({
-                        'result_id': result_id,
-                        'filename': data.get('filename', filename),
-                        'timestamp': data.get('timestamp', ''),
-                        'total_duration': data.get('total_duration', 0),
-                        'speaker_count': speaker_count,
-                        'text_preview': text_preview,
-                        'processing_time': data.get('processing_time')  # 添加处理时间
-                    })
-                except Exception as e:
-                    logger.warning(f"读取文件 {filename} 失败: {e}")
-                    continue
-        
-        # 按时间倒序排序
-        history_items.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return history_items
-        
-    except Exception as e:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} 格式错误，应为 ISO 8601 日期或时间")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.isoformat()
+
+
+@router.get("/list", response_model=HistoryPage)
+async def get_history_list(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = "timestamp",
+    order: str = "desc",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None
+):
+    """
+    分页获取历史记录列表（查询历史记录索引，不读取结果文件）
+
+    - sort: timestamp / total_duration / speaker_count / filename / processing_time，order: desc / asc
+    - date_from / date_to: 识别时间范围（ISO 8601 日期或时间，UTC），只给日期时 date_to 包含当天
+    - min_duration / max_duration: 音频时长范围（秒）；min_speakers / max_speakers: 说话人数范围
+    """
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"不支持的排序字段: {sort}。可选: {', '.join(SORT_FIELDS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order 只能是 asc 或 desc")
+
+    try:
+        total, items = history_index.query(
+            offset=offset,
+            limit=limit,
+            sort=sort,
+            descending=order == "desc",
+            date_from=parse_date_bound(date_from, "date_from"),
+            date_to=parse_date_bound(date_to, "date_to", end_of_day=True),
+            min_duration=min_duration,
+            max_duration=max_duration,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers
+        )
+    except sqlite3.Error as e:
         logger.error(f"获取历史记录列表失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取历史记录失败: {str(e)}")
 
+    return HistoryPage(items=items, total=total, offset=offset, limit=limit)
+
+
+@router.get("/search", response_model=SearchPage)
+async def search_history(
+    q: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    result_id: Optional[str] = None
+):
+    """
+    全文搜索所有结果的原文和中英文翻译，返回命中的句子及其时间，可直接定位播放
+
+    多个词用空格分隔，需出现在同一句中；中文按字匹配，词内各字需相邻。
+    指定 result_id 时只在该结果中搜索
+    """
+    try:
+        total, hits = history_index.search(q, offset=offset, limit=limit, result_id=result_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except sqlite3.Error as e:
+        logger.error(f"搜索失败: {e}")
+        raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
+
+    return SearchPage(query=q, hits=hits, total=total, offset=offset, limit=limit)
+
 
 @router.get("/load/{result_id}", response_model=ASRResult)
 async def load_history(result_id: str):
@@ -62,6 +113,11 @@ async def load_history(result_id: str):
     result_file = os.path.join(RESULTS_DIR, f"{result_id}.json")
     
     if not os.path.exists(result_file):
+        # 结果文件已被手动删除，同时移除索引中残留的记录，之后不再出现在列表和搜索结果中
+        try:
+            history_index.remove(result_id)
+        except sqlite3.Error as e:
+            logger.warning(f"移除历史记录索引失败 {result_id}: {e}")
         raise HTTPException(status_code=404, detail="历史记录不存在")
     
     try:
@@ -3,27 +3,53 @@ import os
 import json
 import asyncio
 import zipfile
-import io
-import aiohttp
-import uuid
-from typing import Any
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Request
-from fastapi.responses import FileResponse, Response
-from ..models.schemas import ASRResult, TaskStatus
+import hashlib
+import shutil
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from ..models.schemas import (
+    ASRResult, TaskStatus, PartialResult,
+    BatchManifest, BatchStatus, BatchTask, QueueStats,
+    UploadSessionCreate, UploadSession
+)
 from ..services.whisper_service import WhisperService
 from ..services.diarization_service import diarization_service
 from ..services.translation_service import translation_service
 from ..services.task_manager import task_manager
+from ..services.job_queue import job_queue, QueueFullError
+from ..services.scheduling import PRIORITY_CLASSES, DEFAULT_PRIORITY
+from ..services.job_store import job_store
+from ..services.artifact_cache import artifact_cache
+from ..services.partial_results import partial_results
+from ..services.inference_executor import inference_executor
+from ..services.metrics import StageTimer, pipeline_metrics
+from ..services.upload_sessions import upload_session_manager
+from ..services.downloader import downloader, DownloadError
+from ..services.history_index import history_index
 from ..utils.helpers import (
     generate_result_id,
     get_current_timestamp,
     ensure_directory,
     calculate_audio_hash
 )
-from ..utils.audio_processor import convert_to_wav, trim_audio
+from ..utils.audio_processor import (
+    decode_audio, probe_audio,
+    AudioInfo, AudioProbeError
+)
+from ..utils.peaks import compute_peaks, read_peaks
+from ..utils.file_response import RangeFileResponse, MEDIA_CACHE_CONTROL
+from ..utils.zip_stream import iter_zip
+from ..utils.upload_stream import receive_multipart, ReceivedFile, UploadRejected
 from ..core.config import (
     UPLOAD_DIR, RESULTS_DIR, AUDIO_PROCESSED_DIR,
-    ENABLE_DIARIZATION, ALLOWED_EXTENSIONS, MAX_FILE_SIZE
+    ENABLE_DIARIZATION, ALLOWED_EXTENSIONS, MAX_FILE_SIZE, MAX_AUDIO_DURATION, JOB_RETRY_AFTER,
+    WHISPER_MODEL_NAME, COMPUTE_TYPE, TRIM_START_SECONDS,
+    STATUS_EVENTS_PER_SECOND, STATUS_EVENTS_HEARTBEAT,
+    BATCH_MAX_FILES, BATCH_IMPORT_DIR,
+    UPLOAD_SESSION_MAX_SIZE, UPLOAD_CHUNK_SIZE
 )
 
 logger = logging.getLogger(__name__)
@@ -32,6 +58,194 @@ router = APIRouter(prefix="/api", tags=["ASR"])
 
 # 全局服务实例
 whisper_service = None
+whisper_service_lock = asyncio.Lock()
+
+
+async def get_whisper_service() -> WhisperService:
+    """延迟加载 Whisper 模型（在推理线程池中加载，多个任务只加载一次）"""
+    global whisper_service
+    async with whisper_service_lock:
+        if whisper_service is None:
+            whisper_service = await inference_executor.run(WhisperService)
+    return whisper_service
+
+
+async def warm_up_models():
+    """预先加载识别流程用到的全部模型（批量提交时调用，子任务开始执行时模型已就绪）"""
+    try:
+        await get_whisper_service()
+        if ENABLE_DIARIZATION:
+            await inference_executor.run(diarization_service.warm_up)
+        await inference_executor.run(translation_service.warm_up)
+    except Exception as e:
+        logger.warning(f"预加载模型失败: {e}")
+
+
+def get_model_status() -> Dict[str, bool]:
+    """各模型是否已加载"""
+    return {
+        "whisper": whisper_service is not None,
+        "diarization": diarization_service.pipeline is not None,
+        "translation_en_zh": translation_service.model_en_zh is not None,
+        "translation_zh_en": translation_service.model_zh_en is not None,
+    }
+
+
+def queue_full_exception() -> HTTPException:
+    """任务队列已满时返回的 503 异常"""
+    return HTTPException(
+        status_code=503,
+        detail="服务繁忙，任务队列已满，请稍后重试",
+        headers={"Retry-After": str(JOB_RETRY_AFTER)}
+    )
+
+
+def get_client_id(request: Request) -> str:
+    """提交任务的客户端标识（用于公平调度）：优先取 X-Client-ID 请求头，否则为客户端 IP"""
+    client_id = request.headers.get("X-Client-ID")
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "unknown"
+
+
+def validate_priority(priority: str) -> str:
+    """检查优先级类别"""
+    if priority not in PRIORITY_CLASSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的优先级: {priority}。可选: {', '.join(PRIORITY_CLASSES)}"
+        )
+    return priority
+
+
+def get_pipeline_params() -> Dict[str, Any]:
+    """影响识别结果的流程参数，参与结果缓存 key 的计算"""
+    return {
+        "whisper_model": WHISPER_MODEL_NAME,
+        "compute_type": COMPUTE_TYPE,
+        "trim_start": TRIM_START_SECONDS,
+        "diarization": ENABLE_DIARIZATION,
+        "translation": translation_service.enabled,
+    }
+
+
+def build_result_cache_key(source_hash: str) -> str:
+    """由上传文件的哈希和流程参数生成结果缓存 key"""
+    payload = json.dumps({"source_hash": source_hash, **get_pipeline_params()}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# 保证“查找已有结果/进行中任务”与“创建新任务”之间不会被并发上传打断
+dedup_lock = asyncio.Lock()
+
+
+async def validate_audio(file_path: str) -> AudioInfo:
+    """
+    只读取头信息检查上传的音频：无法识别（损坏、没有音频流）或时长超过 MAX_AUDIO_DURATION 时
+    删除文件并返回 400，不进入队列
+    """
+    try:
+        info = await asyncio.to_thread(probe_audio, file_path)
+    except AudioProbeError as e:
+        os.remove(file_path)
+        raise HTTPException(status_code=400, detail=f"音频文件无效: {e}")
+
+    if MAX_AUDIO_DURATION > 0 and info.duration is not None and info.duration > MAX_AUDIO_DURATION:
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"音频过长（{info.duration / 60:.1f} 分钟）。最长支持 {MAX_AUDIO_DURATION / 60:.0f} 分钟"
+        )
+    return info
+
+
+async def enqueue_audio_task(
+    task_id: str,
+    original_filename: str,
+    file_path: str,
+    message: str = "文件上传成功，等待处理",
+    bypass_limit: bool = False,
+    priority: str = DEFAULT_PRIORITY,
+    client_id: Optional[str] = None,
+    source_hash: Optional[str] = None,
+    keep_file_on_queue_full: bool = False
+) -> TaskStatus:
+    """
+    创建任务并提交到任务队列
+
+    相同音频内容 + 相同流程参数的上传不会重复识别：已有结果时直接返回已完成的任务，
+    已有进行中的任务时返回该任务，本次上传的文件随即删除。
+    bypass_limit 为 True 时不受队列上限限制（批量提交在入口处整体检查）。
+    keep_file_on_queue_full 为 True 时队列已满不删除文件，由调用方处理（可续传上传移回会话）。
+    入队前先读取头信息校验音频（见 validate_audio），探测到的时长、优先级和客户端标识交给调度器决定执行顺序。
+    """
+    audio_info = await validate_audio(file_path)
+    duration = audio_info.duration
+    # 流式上传时已在接收过程中计算了哈希
+    if source_hash is None:
+        source_hash = await calculate_audio_hash(file_path)
+    cache_key = build_result_cache_key(source_hash)
+
+    async with dedup_lock:
+        result_id = job_store.find_cached_result(cache_key)
+        if result_id is not None:
+            if os.path.exists(os.path.join(RESULTS_DIR, f"{result_id}.json")):
+                os.remove(file_path)
+                logger.info(f"音频已识别过，直接返回结果 {result_id}")
+                return await task_manager.create_task(
+                    task_id, original_filename, None, cache_key,
+                    status="completed", progress=100.0,
+                    message="识别完成（相同音频已有识别结果）", result_id=result_id
+                )
+            # 结果文件已被删除，缓存和历史记录索引失效
+            job_store.remove_cached_result(cache_key)
+            unindex_result(result_id)
+
+        active_task_id = job_store.find_active_job(cache_key)
+        if active_task_id is not None:
+            active_task = await task_manager.get_task(active_task_id)
+            if active_task is not None:
+                os.remove(file_path)
+                logger.info(f"相同音频正在识别，合并到任务 {active_task_id}")
+                return active_task
+
+        await task_manager.create_task(
+            task_id, original_filename, file_path, cache_key,
+            priority=priority, client_id=client_id, audio_duration=duration
+        )
+        submit = job_queue.requeue if bypass_limit else job_queue.submit
+        try:
+            position = await submit(
+                task_id, process_audio_task, task_id, original_filename, file_path,
+                priority=priority, client_id=client_id, duration=duration
+            )
+        except QueueFullError:
+            await task_manager.update_task(task_id, status="failed", message="任务队列已满")
+            if not keep_file_on_queue_full and os.path.exists(file_path):
+                os.remove(file_path)
+            raise queue_full_exception()
+
+    eta = job_queue.estimate_etas().get(task_id)
+    return TaskStatus(
+        task_id=task_id,
+        status="pending",
+        progress=0.0,
+        message=message,
+        queue_position=position,
+        eta_seconds=round(eta, 1) if eta is not None else None
+    )
+
+
+def remember_result(task_id: str, result_id: str):
+    """
+    记录任务输入对应的结果，之后相同音频的上传直接复用（重复写入无副作用）
+
+    只对各启用阶段都成功的结果调用；降级的结果（说话人分离失败、翻译保留原文）不记录，
+    否则之后相同音频的上传会一直拿到降级的结果
+    """
+    job = job_store.get_job(task_id)
+    if job is not None and job["cache_key"]:
+        job_store.save_cached_result(job["cache_key"], result_id)
 
 
 async def process_audio_task(
@@ -39,94 +253,239 @@ async def process_audio_task(
     original_filename: str,
     uploaded_file_path: str
 ):
-    """后台处理音频识别任务"""
-    global whisper_service
+    """
+    后台处理音频识别任务
+
+    流程分为 decode / transcribe / diarize / translate / persist 五个阶段，
+    每个阶段完成后保存检查点；任务中断后重新执行时会跳过已完成的阶段。
+    各步骤的耗时和资源占用由 StageTimer 记录，写入结果的 stage_timings 并导出到 /metrics。
+    """
     import time
 
+    timer = StageTimer()
+    duration = 0.0
+
     try:
         start_time = time.time()  # 记录开始时间
 
         await task_manager.update_task(
             task_id, status="processing", progress=10.0, message="正在初始化..."
         )
-        
+
+        # 阶段 persist 已完成：结果已保存，只差更新任务状态
+        persisted = job_store.load_checkpoint(task_id, "persist")
+        if persisted is not None:
+            # 中断可能发生在记录去重之前，这里再记录一次
+            if persisted.get("cacheable"):
+                await asyncio.to_thread(remember_result, task_id, persisted["result_id"])
+            await task_manager.update_task(
+                task_id,
+                status="completed",
+                progress=100.0,
+                message="识别完成",
+                result_id=persisted["result_id"]
+            )
+            job_store.clear_checkpoints(task_id)
+            pipeline_metrics.observe_task("completed")
+            return
+
+        # 开始记录中间结果，供 /api/partial 在任务结束前返回已识别的片段
+        partial_results.start(task_id)
+
         # 延迟加载 Whisper 模型
-        if whisper_service is None:
-            whisper_service = WhisperService()
-        
+        async with timer.stage("load_model"):
+            whisper = await get_whisper_service()
+
         await task_manager.update_task(
             task_id, progress=30.0, message="正在处理音频..."
         )
-        
-        # 转换音频格式
-        processed_filename = f"{os.path.splitext(original_filename)[0]}_processed.wav"
-        processed_file_path = os.path.join(AUDIO_PROCESSED_DIR, processed_filename)
 
-        # 确保 processed 目录存在
-        ensure_directory(AUDIO_PROCESSED_DIR)
+        # 阶段 decode：剪切并转换音频格式，并计算 audio_hash（作为后续阶段缓存 key 的输入）
+        # 解码得到的波形在识别和说话人分离之间共享；从检查点恢复时为 None，两者改为读取 WAV 文件
+        # audio_hash 是解码输出的 float32 数据的哈希，无法由 16 位 WAV 还原，缺少时重新解码
+        waveform = None
+        decoded = job_store.load_checkpoint(task_id, "decode")
+        if decoded is not None and decoded.get("audio_hash") and os.path.exists(decoded["audio_path"]):
+            converted_path, duration = decoded["audio_path"], decoded["duration"]
+            audio_hash = decoded["audio_hash"]
+            logger.info(f"任务 {task_id} 从检查点恢复 decode 阶段")
+        else:
+            # 中间文件以 task_id 命名，避免同名上传互相覆盖，也便于恢复
+            processed_file_path = os.path.join(AUDIO_PROCESSED_DIR, f"{task_id}_processed.wav")
 
-        # 先剪切前3秒
-        trimmed_filename = f"{os.path.splitext(original_filename)[0]}_trimmed.wav"
-        trimmed_file_path = os.path.join(AUDIO_PROCESSED_DIR, trimmed_filename)
-        await asyncio.to_thread(trim_audio, uploaded_file_path, trimmed_file_path, start_time=3)
+            # 确保 processed 目录存在
+            ensure_directory(AUDIO_PROCESSED_DIR)
+
+            # 一次解码完成剪切开头 TRIM_START_SECONDS 秒（默认 3 秒）、下混和重采样
+            async with timer.stage("decode"):
+                waveform, duration, audio_hash = await decode_audio(
+                    uploaded_file_path, processed_file_path, start_time=TRIM_START_SECONDS
+                )
+                converted_path = processed_file_path
+
+            await asyncio.to_thread(
+                job_store.save_checkpoint, task_id, "decode",
+                {"audio_path": converted_path, "duration": duration, "audio_hash": audio_hash}
+            )
 
-        # 再转换为 WAV 格式
-        converted_path, duration = await convert_to_wav(trimmed_file_path, processed_file_path)
-        
         await task_manager.update_task(
-            task_id, progress=50.0, message="正在进行语音识别..."
+            task_id, progress=50.0,
+            message="正在进行语音识别和说话人识别..." if ENABLE_DIARIZATION else "正在进行语音识别..."
         )
 
         logger.info(f"Starting transcription for task {task_id}")
 
         # 获取当前事件循环
         loop = asyncio.get_running_loop()
-        logger.info(f"Got event loop: {loop}")
 
-        # 执行 Whisper 识别，传递进度回调
-        def progress_callback(progress: float):
+        # 语音识别与说话人分离两个阶段的进度（0-100），合并后映射到总进度 50% -> 80%
+        stage_progress = {"asr": 0.0}
+        if ENABLE_DIARIZATION:
+            stage_progress["diarization"] = 0.0
+
+        def report_stage_progress(stage: str, progress: float):
+            # 回调在推理线程中执行，通过 run_coroutine_threadsafe 切换回事件循环更新状态
             try:
-                logger.info(f"Progress callback called: {progress}%")
+                stage_progress[stage] = progress
+                overall = 50.0 + 30.0 * sum(stage_progress.values()) / (100.0 * len(stage_progress))
+                if ENABLE_DIARIZATION:
+                    message = (
+                        f"正在进行语音识别 ({int(stage_progress['asr'])}%) "
+                        f"和说话人识别 ({int(stage_progress['diarization'])}%)..."
+                    )
+                else:
+                    message = f"正在进行语音识别... ({int(progress)}%)"
                 asyncio.run_coroutine_threadsafe(
-                    task_manager.update_task(
-                        task_id, progress=progress, message=f"正在进行语音识别... ({int(progress)}%)"
-                    ),
+                    task_manager.update_task(task_id, progress=overall, message=message),
                     loop
                 )
             except Exception as e:
                 logger.error(f"Failed to update progress: {e}", exc_info=True)
 
-        asr_result = whisper_service.transcribe(converted_path, progress_callback=progress_callback)
+        async def run_transcribe() -> Dict[str, Any]:
+            """阶段 transcribe：Whisper 识别（优先使用检查点，其次使用阶段缓存）"""
+            result = job_store.load_checkpoint(task_id, "transcribe")
+            if result is not None:
+                logger.info(f"任务 {task_id} 从检查点恢复 transcribe 阶段")
+                report_stage_progress("asr", 100.0)
+                partial_results.set_segments(task_id, result["segments"])
+                return result
+
+            async with timer.stage("transcribe"):
+                cache_key = artifact_cache.make_key(audio_hash=audio_hash, **whisper.cache_params(duration))
+                result = await asyncio.to_thread(artifact_cache.get, "transcribe", cache_key)
+                if result is None:
+                    result = await whisper.transcribe_async(
+                        converted_path,
+                        progress_callback=lambda p: report_stage_progress("asr", p),
+                        segment_callback=lambda seg: partial_results.add_segment(task_id, seg),
+                        waveform=waveform
+                    )
+                    partial_results.mark_transcription_done(task_id)
+                    await asyncio.to_thread(artifact_cache.put, "transcribe", cache_key, result)
+                else:
+                    report_stage_progress("asr", 100.0)
+                    partial_results.set_segments(task_id, result["segments"])
+
+            await asyncio.to_thread(job_store.save_checkpoint, task_id, "transcribe", result)
+            return result
+
+        async def run_diarize() -> Optional[List[Dict[str, Any]]]:
+            """阶段 diarize：说话人分离（优先使用检查点，其次使用阶段缓存）"""
+            checkpoint = job_store.load_checkpoint(task_id, "diarize")
+            if checkpoint is not None:
+                logger.info(f"任务 {task_id} 从检查点恢复 diarize 阶段")
+                report_stage_progress("diarization", 100.0)
+                return checkpoint["turns"]
+
+            async with timer.stage("diarize"):
+                cache_key = artifact_cache.make_key(audio_hash=audio_hash, **diarization_service.cache_params())
+                cached = await asyncio.to_thread(artifact_cache.get, "diarize", cache_key)
+                if cached is not None:
+                    turns = cached["turns"]
+                    report_stage_progress("diarization", 100.0)
+                else:
+                    turns = await diarization_service.diarize_async(
+                        converted_path,
+                        progress_callback=lambda p: report_stage_progress("diarization", p),
+                        waveform=waveform
+                    )
+                    # 模型不可用或失败（turns 为 None）时不缓存，下次重试
+                    if turns is not None:
+                        await asyncio.to_thread(artifact_cache.put, "diarize", cache_key, {"turns": turns})
 
-        logger.info(f"Transcription completed for task {task_id}")
+            await asyncio.to_thread(job_store.save_checkpoint, task_id, "diarize", {"turns": turns})
+            return turns
 
-        await task_manager.update_task(
-            task_id, progress=70.0, message="正在进行说话人识别..."
-        )
-        
-        # 说话人分离
         if ENABLE_DIARIZATION:
-            segments = diarization_service.assign_speakers(converted_path, asr_result["segments"])
+            # 说话人分离只读取同一个 WAV 文件，与识别并行执行，结束后再合并
+            asr_result, speaker_turns = await asyncio.gather(run_transcribe(), run_diarize())
+            segments = diarization_service.assign_speakers_from_turns(asr_result["segments"], speaker_turns)
+            # 说话人分离失败时所有片段都是说话人 0
+            diarization_degraded = speaker_turns is None
         else:
-            for seg in asr_result["segments"]:
+            diarization_degraded = False
+            asr_result = await run_transcribe()
+            segments = asr_result["segments"]
+            for seg in segments:
                 seg["speaker"] = 0
-        
+        partial_results.set_speakers(task_id, segments)
+
+        # 后续阶段不再需要波形，尽早释放
+        waveform = None
+
+        logger.info(f"Transcription completed for task {task_id}")
+
         await task_manager.update_task(
             task_id, progress=85.0, message="正在生成结果..."
         )
-        
-        # 翻译
-        segments = translation_service.translate_all(segments)
-        
+
+        # 阶段 translate：翻译（只依赖片段文本，与说话人分离的结果无关）
+        translated = job_store.load_checkpoint(task_id, "translate")
+        if translated is not None:
+            logger.info(f"任务 {task_id} 从检查点恢复 translate 阶段")
+            if isinstance(translated, list):
+                # 旧格式的检查点没有记录是否降级，按降级处理
+                segments, translation_degraded = translated, True
+            else:
+                segments, translation_degraded = translated["segments"], translated["degraded"]
+            for idx, seg in enumerate(segments):
+                partial_results.set_translation(task_id, idx, seg.get("translation"))
+        else:
+            async with timer.stage("translate"):
+                cache_key = artifact_cache.make_key(
+                    texts=[seg["text"] for seg in segments],
+                    **translation_service.cache_params()
+                )
+                translations = await asyncio.to_thread(artifact_cache.get, "translate", cache_key)
+                if translations is not None and len(translations) == len(segments):
+                    translation_degraded = False
+                    for idx, (seg, translation) in enumerate(zip(segments, translations)):
+                        seg["translation"] = translation
+                        partial_results.set_translation(task_id, idx, translation)
+                else:
+                    segments, translation_degraded = await translation_service.translate_all_async(
+                        segments,
+                        segment_callback=lambda idx, translation: partial_results.set_translation(task_id, idx, translation)
+                    )
+                    # 模型不可用或翻译出错（保留了原文）时不缓存，模型可用后重新翻译
+                    if not translation_degraded:
+                        await asyncio.to_thread(
+                            artifact_cache.put, "translate", cache_key,
+                            [seg.get("translation") for seg in segments]
+                        )
+            await asyncio.to_thread(
+                job_store.save_checkpoint, task_id, "translate",
+                {"segments": segments, "degraded": translation_degraded}
+            )
+        partial_results.mark_translations_ready(task_id)
+
         # 提取所有说话人
         speakers = sorted(list(set(seg.get("speaker", 0) for seg in segments)))
-        
-        # 计算 audio_hash
-        audio_hash = await calculate_audio_hash(converted_path)
-        
+
         # 生成 result_id
         result_id = generate_result_id()
-        
+
         # 构建结果数据结构（符合 demo.json 格式）
         result_data = {
             "success": True,
@@ -142,7 +501,7 @@ async def process_audio_task(
             "audio_path": f"{result_id}_audio.wav",
             "updated_timestamp": get_current_timestamp()
         }
-        
+
         # 构建句子列表
         for idx, seg in enumerate(segments):
             sentence = {
@@ -161,19 +520,34 @@ async def process_audio_task(
         # 计算处理时间（在保存之前）
         processing_time = time.time() - start_time
         result_data["processing_time"] = round(processing_time, 2)
+        # 分阶段统计（save 阶段写入的正是这个文件，其耗时只导出到 /metrics）
+        result_data["stage_timings"] = timer.summary(duration)
 
-        # 保存结果到文件
+        # 阶段 persist：保存结果到文件
         result_filename = f"{result_id}.json"
         result_file_path = os.path.join(RESULTS_DIR, result_filename)
 
         # 确保 results 目录存在
         ensure_directory(RESULTS_DIR)
 
-        await asyncio.to_thread(json.dump, result_data, open(result_file_path, 'w', encoding='utf-8'), ensure_ascii=False, indent=2)
-
-        # 复制处理后的音频文件到 results 目录
-        audio_output_path = os.path.join(RESULTS_DIR, f"{result_id}_audio.wav")
-        await asyncio.to_thread(os.rename, converted_path, audio_output_path)
+        async with timer.stage("save"):
+            await asyncio.to_thread(write_result_file, result_file_path, result_data)
+            index_result(result_id, result_data)
+
+            # 复制处理后的音频文件到 results 目录
+            audio_output_path = os.path.join(RESULTS_DIR, f"{result_id}_audio.wav")
+            await asyncio.to_thread(os.rename, converted_path, audio_output_path)
+            await save_peaks(result_id)
+
+            # 先记录去重再保存检查点，从 persist 检查点恢复时不会漏掉
+            cacheable = not diarization_degraded and not translation_degraded
+            if cacheable:
+                await asyncio.to_thread(remember_result, task_id, result_id)
+            else:
+                logger.info(f"任务 {task_id} 的结果不完整（说话人分离或翻译降级），不记录去重")
+            await asyncio.to_thread(
+                job_store.save_checkpoint, task_id, "persist", {"result_id": result_id, "cacheable": cacheable}
+            )
 
         await task_manager.update_task(
             task_id,
@@ -183,10 +557,17 @@ async def process_audio_task(
             result_id=result_id
         )
 
+        # 任务已完成，清理检查点和中间结果
+        job_store.clear_checkpoints(task_id)
+        partial_results.discard(task_id)
+        pipeline_metrics.observe_task("completed", duration)
+
         logger.info(f"任务 {task_id} 处理完成，结果ID: {result_id}，耗时 {processing_time:.2f}秒")
-        
+
     except Exception as e:
         logger.error(f"任务 {task_id} 处理失败: {e}", exc_info=True)
+        partial_results.discard(task_id)
+        pipeline_metrics.observe_task("failed", duration)
         await task_manager.update_task(
             task_id,
             status="failed",
@@ -194,66 +575,264 @@ async def process_audio_task(
         )
 
 
-@router.post("/upload", response_model=TaskStatus)
-async def upload_audio(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
-):
-    """上传音频文件并启动识别任务"""
-    
-    # 验证文件扩展名
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"不支持的文件格式。支持的格式: {', '.join(ALLOWED_EXTENSIONS)}"
+def write_result_file(result_file_path: str, result_data: Dict[str, Any]):
+    """写入结果 JSON 文件"""
+    with open(result_file_path, 'w', encoding='utf-8') as f:
+        json.dump(result_data, f, ensure_ascii=False, indent=2)
+
+
+def index_result(result_id: str, result_data: Dict[str, Any]):
+    """更新历史记录索引；索引可由结果文件重建，失败时只记录日志"""
+    try:
+        history_index.upsert(result_id, result_data)
+    except sqlite3.Error as e:
+        logger.warning(f"更新历史记录索引失败 {result_id}: {e}")
+
+
+def unindex_result(result_id: str):
+    """结果文件已不存在（被手动删除）时从历史记录索引中移除，失败时只记录日志"""
+    try:
+        history_index.remove(result_id)
+    except sqlite3.Error as e:
+        logger.warning(f"移除历史记录索引失败 {result_id}: {e}")
+
+
+async def resume_interrupted_tasks():
+    """服务启动时恢复上次未完成的任务，从最后完成的阶段继续执行"""
+    for job in job_store.list_unfinished():
+        task_id = job["task_id"]
+        task = await task_manager.restore_task(task_id)
+        if task is None:
+            continue
+        await job_queue.requeue(
+            task_id, process_audio_task, task_id, job["original_filename"], job["uploaded_file_path"],
+            priority=job["priority"] or DEFAULT_PRIORITY,
+            client_id=job["client_id"],
+            duration=job["audio_duration"]
         )
-    
-    # 保存上传的文件
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+        logger.info(f"已恢复任务 {task_id}，上次完成的阶段: {job['stage'] or '无'}")
+
+
+def multipart_openapi(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    """流式接收的上传接口不声明 File / Form 参数，由此补充 OpenAPI 中的请求体说明"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": properties, "required": required}
+                }
+            }
+        }
+    }
+
+
+PRIORITY_FORM_FIELD = {"type": "string", "enum": PRIORITY_CLASSES, "default": DEFAULT_PRIORITY}
+
+# multipart 请求中除文件内容外的开销上限（分隔符、字段头和普通字段），用于按 Content-Length 提前拒绝
+MAX_FORM_OVERHEAD = 1024 * 1024
+
+
+async def discard_uploads(files: List[ReceivedFile]):
+    """删除已接收但不再使用的文件"""
+    for received in files:
+        if received.path and os.path.exists(received.path):
+            await asyncio.to_thread(os.remove, received.path)
+
+
+@router.post(
+    "/upload",
+    response_model=TaskStatus,
+    openapi_extra=multipart_openapi(
+        {"file": {"type": "string", "format": "binary"}, "priority": PRIORITY_FORM_FIELD},
+        ["file"]
+    )
+)
+async def upload_audio(request: Request):
+    """
+    上传音频文件并启动识别任务（表单字段 file，priority: high / normal / low）
+
+    文件边接收边写入磁盘并计算哈希，超过大小上限或格式不受支持时立即中止接收
+    """
+    # 队列已满时尽早拒绝，避免无谓地接收文件
+    if job_queue.is_full():
+        raise queue_full_exception()
+
     ensure_directory(UPLOAD_DIR)
-    
     try:
-        content = await file.read()
-        
-        # 验证文件大小
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"文件过大。最大支持 {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
-        
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        
-        # 生成任务ID
-        task_id = generate_result_id()
-        
-        # 创建任务
-        await task_manager.create_task(task_id)
-        
-        # 启动后台处理
-        background_tasks.add_task(
-            process_audio_task,
-            task_id,
-            file.filename,
-            file_path
+        files, fields = await receive_multipart(
+            request, UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS,
+            max_body_size=MAX_FILE_SIZE + MAX_FORM_OVERHEAD
         )
-        
-        return TaskStatus(
-            task_id=task_id,
-            status="pending",
-            progress=0.0,
-            message="文件上传成功，开始处理"
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    upload = next((received for received in files if received.field_name == "file"), None)
+    await discard_uploads([received for received in files if received is not upload])
+    if upload is None:
+        raise HTTPException(status_code=400, detail="请上传音频文件（表单字段 file）")
+
+    priority = fields.get("priority") or DEFAULT_PRIORITY
+    try:
+        validate_priority(priority)
+
+        # 以任务ID命名，避免同名文件互相覆盖，也便于恢复
+        task_id = generate_result_id()
+        file_path = os.path.join(UPLOAD_DIR, f"{task_id}{os.path.splitext(upload.path)[1]}")
+        await asyncio.to_thread(os.rename, upload.path, file_path)
+        upload.path = file_path
+
+        # 创建任务并加入队列（相同音频复用已有结果或进行中的任务）
+        return await enqueue_audio_task(
+            task_id, upload.filename, file_path,
+            priority=priority, client_id=get_client_id(request), source_hash=upload.sha256
         )
-        
+
     except HTTPException:
+        await discard_uploads([upload])
         raise
     except Exception as e:
+        await discard_uploads([upload])
         logger.error(f"文件上传失败: {e}")
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
 
+# ----------------------------------------------------------------------
+# 可续传上传
+# ----------------------------------------------------------------------
+
+def upload_session_response(session: Dict[str, Any]) -> UploadSession:
+    return UploadSession(**upload_session_manager.describe(session), chunk_size=UPLOAD_CHUNK_SIZE)
+
+
+def get_upload_session_or_404(upload_id: str) -> Dict[str, Any]:
+    session = upload_session_manager.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    return session
+
+
+@router.post("/uploads", response_model=UploadSession, status_code=201)
+async def create_upload_session(body: UploadSessionCreate, request: Request):
+    """
+    创建可续传上传会话
+
+    之后把文件各分块 PUT 到 /api/uploads/{upload_id}?offset=N（顺序任意，可并发），
+    断线后 GET /api/uploads/{upload_id} 查询已接收的范围补传缺失部分，
+    收齐后 POST /api/uploads/{upload_id}/complete 开始识别
+    """
+    ext = os.path.splitext(body.filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件格式。支持的格式: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if body.size <= 0:
+        raise HTTPException(status_code=400, detail="文件大小无效")
+    if body.size > UPLOAD_SESSION_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"文件过大。最大支持 {UPLOAD_SESSION_MAX_SIZE // (1024*1024)}MB"
+        )
+    validate_priority(body.priority)
+    if body.sha256 is not None and (
+        len(body.sha256) != 64 or any(c not in "0123456789abcdef" for c in body.sha256.lower())
+    ):
+        raise HTTPException(status_code=400, detail="sha256 必须是 64 位十六进制字符串")
+
+    session = await upload_session_manager.create(
+        body.filename, body.size, body.priority, get_client_id(request), body.sha256
+    )
+    return upload_session_response(session)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSession)
+async def get_upload_session(upload_id: str):
+    """查询上传会话已接收的字节范围"""
+    return upload_session_response(get_upload_session_or_404(upload_id))
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    response_model=UploadSession,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """
+    写入一个分块：请求体为原始字节，写入文件的 offset 位置
+
+    请求体边接收边写入磁盘；连接中途断开时已写入的部分也会记录，重传时只需从断点继续
+    """
+    session = get_upload_session_or_404(upload_id)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and offset + int(content_length) > session["size"]:
+        raise HTTPException(status_code=400, detail=f"数据超出文件大小（{session['size']} 字节）")
+    try:
+        session = await upload_session_manager.write_chunk(upload_id, offset, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if session is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+    return upload_session_response(session)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=TaskStatus)
+async def complete_upload_session(upload_id: str):
+    """数据收齐后校验文件并启动识别任务，会话随即删除"""
+    session = get_upload_session_or_404(upload_id)
+    # 队列已满时尽早拒绝；校验期间队列变满时，下面会把文件移回会话，客户端稍后可以重试
+    if job_queue.is_full():
+        raise queue_full_exception()
+
+    task_id = generate_result_id()
+    ensure_directory(UPLOAD_DIR)
+    file_path = os.path.join(UPLOAD_DIR, f"{task_id}{os.path.splitext(session['filename'])[1].lower()}")
+    try:
+        source_hash = await upload_session_manager.complete(upload_id, file_path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if source_hash is None:
+        raise HTTPException(status_code=404, detail="上传会话不存在或已过期")
+
+    try:
+        task = await enqueue_audio_task(
+            task_id, session["filename"], file_path, message="文件上传完成，等待处理",
+            priority=session["priority"] or DEFAULT_PRIORITY, client_id=session["client_id"],
+            source_hash=source_hash, keep_file_on_queue_full=True
+        )
+    except HTTPException as e:
+        if e.status_code == 503:
+            await upload_session_manager.restore(upload_id, file_path)
+        else:
+            # 音频无效等：文件已被删除，会话随之结束
+            upload_session_manager.finish(upload_id)
+        raise
+    except Exception as e:
+        await upload_session_manager.restore(upload_id, file_path)
+        logger.error(f"启动识别任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"启动识别任务失败: {str(e)}")
+
+    upload_session_manager.finish(upload_id)
+    return task
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str):
+    """取消上传会话并删除已接收的数据"""
+    try:
+        removed = await upload_session_manager.abort(upload_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail="上传会话不存在")
+    return {"message": "上传已取消"}
+
+
 @router.get("/status/{task_id}", response_model=TaskStatus)
 async def get_task_status(task_id: str):
     """查询任务状态"""
@@ -265,12 +844,95 @@ async def get_task_status(task_id: str):
     return task
 
 
+@router.get("/events/{task_id}")
+async def task_events(task_id: str):
+    """
+    以 Server-Sent Events 推送任务状态
+
+    每次状态变化推送一个 status 事件（数据同 /api/status），同一任务每秒最多推送
+    STATUS_EVENTS_PER_SECOND 次，期间的多次更新合并为最新状态；任务完成或失败后关闭连接。
+    不支持 SSE 的客户端可继续轮询 /api/status。
+    """
+    task = await task_manager.get_task(task_id)
+
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    async def event_stream():
+        event = task_manager.subscribe(task_id)
+        min_interval = 1.0 / STATUS_EVENTS_PER_SECOND if STATUS_EVENTS_PER_SECOND > 0 else 0
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=STATUS_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # 心跳，防止代理断开空闲连接
+                    yield ": keep-alive\n\n"
+                    continue
+
+                event.clear()
+                current = await task_manager.get_task(task_id)
+                if current is None:
+                    break
+
+                yield f"event: status\ndata: {json.dumps(jsonable_encoder(current), ensure_ascii=False)}\n\n"
+
+                if current.status in ["completed", "failed"]:
+                    break
+
+                # 限制推送频率，这段时间内的更新在下一次推送时合并
+                await asyncio.sleep(min_interval)
+        finally:
+            task_manager.unsubscribe(task_id, event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+@router.get("/partial/{task_id}", response_model=PartialResult)
+async def get_partial_result(task_id: str, since: int = 0):
+    """
+    获取任务进行中已识别的片段
+
+    segments 只包含索引 >= since 的片段，客户端可增量拉取；说话人和翻译在对应阶段完成后回填，
+    speakers_ready / translations_ready 变为 true 时应从 since=0 重新拉取一次。
+    任务完成后返回 result_id，完整结果通过 /api/result 获取。
+    """
+    task = await task_manager.get_task(task_id)
+
+    if task is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+
+    partial = partial_results.get(task_id, since=max(0, since)) or {
+        "segments": [],
+        "total_segments": 0,
+        "transcription_done": task.status == "completed",
+        "speakers_ready": task.status == "completed",
+        "translations_ready": task.status == "completed"
+    }
+
+    return PartialResult(
+        task_id=task_id,
+        status=task.status,
+        progress=task.progress,
+        result_id=task.result_id,
+        **partial
+    )
+
+
 @router.get("/result/{result_id}", response_model=ASRResult)
 async def get_result(result_id: str):
     """获取识别结果"""
     result_file = os.path.join(RESULTS_DIR, f"{result_id}.json")
     
     if not os.path.exists(result_file):
+        unindex_result(result_id)
         raise HTTPException(status_code=404, detail="结果不存在")
     
     try:
@@ -284,75 +946,71 @@ async def get_result(result_id: str):
         raise HTTPException(status_code=500, detail=f"读取结果失败: {str(e)}")
 
 
-@router.get("/audio/{result_id}")
+@router.api_route("/audio/{result_id}", methods=["GET", "HEAD"])
 async def get_audio(result_id: str, request: Request):
-    """获取识别后的音频文件"""
+    """获取识别后的音频文件（支持 Range、多范围请求和 ETag / Last-Modified 缓存校验）"""
     audio_file = os.path.join(RESULTS_DIR, f"{result_id}_audio.wav")
 
     if not os.path.exists(audio_file):
         raise HTTPException(status_code=404, detail="音频文件不存在")
 
-    # 获取文件大小
-    file_size = os.path.getsize(audio_file)
-
-    # 检查是否支持 Range 请求
-    range_header = None
-    if "range" in [h.lower() for h, v in request.headers.items()]:
-        for h, v in request.headers.items():
-            if h.lower() == "range":
-                range_header = v
-                break
-
-    if range_header:
-        # 处理 Range 请求
-        try:
-            start, end = parse_range_header(range_header, file_size)
-            chunk_size = end - start + 1
+    return RangeFileResponse(
+        audio_file,
+        request.headers,
+        method=request.method,
+        media_type="audio/wav",
+        filename=f"{result_id}_audio.wav"
+    )
 
-            with open(audio_file, 'rb') as f:
-                f.seek(start)
-                data = f.read(chunk_size)
 
-            headers = {
-                'Content-Range': f'bytes {start}-{end}/{file_size}',
-                'Accept-Ranges': 'bytes',
-                'Content-Length': str(chunk_size),
-            }
+async def save_peaks(result_id: str) -> bool:
+    """
+    计算结果音频的波形峰值金字塔，保存为 {result_id}_peaks.bin
 
-            return Response(
-                content=data,
-                media_type="audio/wav",
-                status_code=206,
-                headers=headers
-            )
-        except Exception as e:
-            # 如果 Range 解析失败，返回整个文件
-            pass
+    失败（例如导入的音频不是 soundfile 支持的格式）只记录日志，不影响结果保存
+    """
+    audio_file = os.path.join(RESULTS_DIR, f"{result_id}_audio.wav")
+    peaks_file = os.path.join(RESULTS_DIR, f"{result_id}_peaks.bin")
+    try:
+        await asyncio.to_thread(compute_peaks, audio_file, peaks_file)
+        return True
+    except Exception as e:
+        logger.warning(f"生成波形峰值失败 {result_id}: {e}")
+        return False
 
-    # 返回整个文件
-    return FileResponse(
-        audio_file,
-        media_type="audio/wav",
-        filename=f"{result_id}_audio.wav",
-        headers={
-            'Accept-Ranges': 'bytes',
-        }
-    )
 
+@router.get("/peaks/{result_id}")
+async def get_peaks(
+    result_id: str,
+    level: Optional[int] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    width: Optional[int] = None
+):
+    """
+    获取预先计算的波形峰值
 
-def parse_range_header(range_header: str, file_size: int):
-    """解析 Range 请求头"""
-    range_header = range_header.replace('bytes=', '')
-    parts = range_header.split('-')
+    level: 缩放级别（0 最细）；不指定时按 width（要绘制的像素数）自动选择
+    start / end: 时间范围（秒），默认整段音频
+    peaks 为交替排列的 int16 (min, max)，每对覆盖 samples_per_peak 个样本
+    """
+    audio_file = os.path.join(RESULTS_DIR, f"{result_id}_audio.wav")
+    peaks_file = os.path.join(RESULTS_DIR, f"{result_id}_peaks.bin")
 
-    start = int(parts[0]) if parts[0] else 0
-    end = int(parts[1]) if parts[1] else file_size - 1
+    if not os.path.exists(peaks_file):
+        if not os.path.exists(audio_file):
+            raise HTTPException(status_code=404, detail="音频文件不存在")
+        # 早于该功能保存的结果：首次请求时补算
+        if not await save_peaks(result_id):
+            raise HTTPException(status_code=404, detail="该音频无法生成波形数据")
 
-    # 确保范围有效
-    start = max(0, min(start, file_size - 1))
-    end = max(start, min(end, file_size - 1))
+    try:
+        data = await asyncio.to_thread(read_peaks, peaks_file, level, start, end, width)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return start, end
+    # 结果音频保存后不再改变，峰值与音频一样可以长期缓存
+    return JSONResponse(data, headers={"Cache-Control": MEDIA_CACHE_CONTROL})
 
 
 @router.get("/download/{result_id}")
@@ -367,21 +1025,15 @@ async def download_result(result_id: str):
     if not os.path.exists(audio_file):
         raise HTTPException(status_code=404, detail="音频文件不存在")
 
-    # 创建内存中的 ZIP 文件
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # 添加 JSON 文件
-        with open(result_file, 'rb') as f:
-            zip_file.writestr(f"{result_id}.json", f.read())
-        # 添加音频文件
-        with open(audio_file, 'rb') as f:
-            zip_file.writestr(f"{result_id}_audio.wav", f.read())
+    # 边压缩边发送：PCM 音频几乎无法压缩，直接存储；JSON 使用 DEFLATE
+    # （同步生成器由 StreamingResponse 放到线程池中迭代，不阻塞事件循环）
+    entries = [
+        (f"{result_id}.json", result_file, zipfile.ZIP_DEFLATED),
+        (f"{result_id}_audio.wav", audio_file, zipfile.ZIP_STORED),
+    ]
 
-    zip_buffer.seek(0)
-
-    return Response(
-        content=zip_buffer.getvalue(),
+    return StreamingResponse(
+        iter_zip(entries),
         media_type="application/zip",
         headers={
             'Content-Disposition': f'attachment; filename="{result_id}_result.zip"'
@@ -435,7 +1087,7 @@ async def update_result(result_id: str, update_data: dict[str, Any]):
 
                 if text_changed:
                     # 新分句或文本被修改，需要重新翻译
-                    translation = translation_service.translate_segment(
+                    translation = await translation_service.translate_segment_async(
                         new_sentence["text"],
                         source_lang="auto"
                     )
@@ -453,6 +1105,7 @@ async def update_result(result_id: str, update_data: dict[str, Any]):
         # 保存更新后的结果
         with open(result_file, 'w', encoding='utf-8') as f:
             json.dump(result_data, f, ensure_ascii=False, indent=2)
+        index_result(result_id, result_data)
 
         logger.info(f"结果 {result_id} 已更新")
 
@@ -496,6 +1149,7 @@ async def import_result(
 
         with open(json_file_path, 'w', encoding='utf-8') as f:
             json.dump(result_data, f, ensure_ascii=False, indent=2)
+        index_result(result_id, result_data)
 
         # 保存音频文件
         if audio_file.filename:
@@ -510,6 +1164,7 @@ async def import_result(
         # 保存音频文件
         with open(audio_file_path, 'wb') as f:
             f.write(audio_content)
+        await save_peaks(result_id)
 
         logger.info(f"成功导入结果 {result_id}")
 
@@ -530,84 +1185,38 @@ async def import_result(
 
 @router.post("/download-url", response_model=TaskStatus)
 async def download_audio_from_url(
-    background_tasks: BackgroundTasks,
-    url: str = None
+    request: Request,
+    url: str = None,
+    priority: str = DEFAULT_PRIORITY
 ):
     """从 URL 下载音频文件并启动识别任务"""
     
     if not url:
         raise HTTPException(status_code=400, detail="请提供音频 URL")
-    
-    # 生成文件名
-    original_filename = f"downloaded_{uuid.uuid4().hex[:8]}"
+
+    validate_priority(priority)
+
+    if job_queue.is_full():
+        raise queue_full_exception()
     
     try:
-        # 下载音频文件
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=300)) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"下载失败，HTTP 状态码: {response.status}"
-                    )
-                
-                # 检查内容类型
-                content_type = response.headers.get('Content-Type', '')
-                if not any(ct in content_type for ct in ['audio', 'octet-stream']):
-                    logger.warning(f"内容类型可能不是音频: {content_type}")
-                
-                # 读取文件内容
-                content = await response.read()
-                
-                # 验证文件大小
-                if len(content) > MAX_FILE_SIZE:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"文件过大。最大支持 {MAX_FILE_SIZE // (1024*1024)}MB"
-                    )
-                
-                # 根据内容类型确定扩展名
-                file_ext = '.mp3'  # 默认使用 mp3
-                if 'wav' in content_type:
-                    file_ext = '.wav'
-                elif 'm4a' in content_type:
-                    file_ext = '.m4a'
-                elif 'ogg' in content_type:
-                    file_ext = '.ogg'
-                
-                original_filename = original_filename + file_ext
-                
-                # 保存下载的文件
-                file_path = os.path.join(UPLOAD_DIR, original_filename)
-                ensure_directory(UPLOAD_DIR)
-                
-                with open(file_path, 'wb') as f:
-                    f.write(content)
+        # 下载音频文件（边下载边写入磁盘并计算哈希）
+        downloaded = await downloader.download(url, UPLOAD_DIR)
         
         # 生成任务ID
         task_id = generate_result_id()
-        
-        # 创建任务
-        await task_manager.create_task(task_id)
-        
-        # 启动后台处理
-        background_tasks.add_task(
-            process_audio_task,
-            task_id,
-            original_filename,
-            file_path
-        )
-        
-        logger.info(f"从 {url} 下载音频成功，任务ID: {task_id}")
-        
-        return TaskStatus(
-            task_id=task_id,
-            status="pending",
-            progress=0.0,
-            message="音频下载成功，开始处理"
+
+        # 创建任务并加入队列（相同音频复用已有结果或进行中的任务）
+        task = await enqueue_audio_task(
+            task_id, downloaded.filename, downloaded.path, message="音频下载成功，等待处理",
+            priority=priority, client_id=get_client_id(request), source_hash=downloaded.sha256
         )
+
+        logger.info(f"从 {url} 下载音频成功，任务ID: {task.task_id}")
+
+        return task
         
-    except aiohttp.ClientError as e:
+    except DownloadError as e:
         logger.error(f"下载音频失败: {e}")
         raise HTTPException(status_code=400, detail=f"下载音频失败: {str(e)}")
     except HTTPException:
@@ -615,3 +1224,249 @@ async def download_audio_from_url(
     except Exception as e:
         logger.error(f"处理 URL 失败: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"处理 URL 失败: {str(e)}")
+
+
+# ----------------------------------------------------------------------
+# 批量提交
+# ----------------------------------------------------------------------
+
+# 预加载模型的后台任务（保留引用，避免被回收）
+warm_up_task: Optional[asyncio.Task] = None
+
+
+def check_batch_size(count: int):
+    """检查批量提交的文件数和队列容量"""
+    if count == 0:
+        raise HTTPException(status_code=400, detail="请至少提交一个文件")
+    if count > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"单批最多提交 {BATCH_MAX_FILES} 个文件")
+    if job_queue.is_full():
+        raise queue_full_exception()
+
+
+def start_model_warm_up():
+    """在后台预加载模型，与文件保存、哈希计算并行进行"""
+    global warm_up_task
+    if warm_up_task is None or warm_up_task.done():
+        warm_up_task = asyncio.create_task(warm_up_models())
+
+
+def resolve_local_path(path: str) -> str:
+    """校验清单中的本地路径，只允许 BATCH_IMPORT_DIR 下的文件"""
+    if not BATCH_IMPORT_DIR:
+        raise ValueError("服务未配置 BATCH_IMPORT_DIR，不支持本地路径")
+    import_dir = os.path.realpath(BATCH_IMPORT_DIR)
+    real_path = os.path.realpath(os.path.join(import_dir, path))
+    if os.path.commonpath([import_dir, real_path]) != import_dir:
+        raise ValueError("路径不在允许的导入目录中")
+    if not os.path.isfile(real_path):
+        raise ValueError("文件不存在")
+    return real_path
+
+
+async def create_batch(
+    items: List[Tuple[str, Optional[str], Optional[str]]],
+    priority: str = DEFAULT_PRIORITY,
+    client_id: Optional[str] = None,
+    source_hashes: Optional[Dict[str, str]] = None
+) -> BatchStatus:
+    """
+    创建批量任务
+
+    Args:
+        items: 按提交顺序排列的 (文件名, 文件路径, 错误信息)；有错误信息的条目记为失败的子任务
+        source_hashes: 文件路径 -> 接收时已计算的 SHA256（流式上传），其余文件入队时再计算
+
+    子任务依次加入队列，相同音频仍会复用已有结果或进行中的任务。
+    整批在入口处检查过队列容量，子任务不再受队列上限限制，避免一批只提交了一部分。
+    """
+    batch_id = generate_result_id()
+    children = []
+    for filename, file_path, error in items:
+        task_id = generate_result_id()
+        if error is not None:
+            task = await task_manager.create_task(
+                task_id, filename, status="failed", message=error
+            )
+        else:
+            try:
+                task = await enqueue_audio_task(
+                    task_id, filename, file_path, message="批量提交成功，等待处理", bypass_limit=True,
+                    priority=priority, client_id=client_id,
+                    source_hash=(source_hashes or {}).get(file_path)
+                )
+            except HTTPException as e:
+                # 音频无效或过长：记为失败的子任务，不影响其他文件
+                if e.status_code != 400:
+                    raise
+                task = await task_manager.create_task(
+                    task_id, filename, status="failed", message=e.detail
+                )
+        children.append((task.task_id, filename))
+
+    job_store.create_batch(batch_id, children)
+    logger.info(f"批量任务 {batch_id} 已创建: {len(children)} 个文件")
+    return await get_batch_status(batch_id)
+
+
+async def get_batch_status(batch_id: str) -> BatchStatus:
+    """汇总批量任务中各子任务的状态"""
+    batch = job_store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="批量任务不存在")
+
+    tasks = []
+    counts = {"pending": 0, "processing": 0, "completed": 0, "failed": 0}
+    for child in batch["tasks"]:
+        task = await task_manager.get_task(child["task_id"])
+        if task is None:
+            task = TaskStatus(task_id=child["task_id"], status="failed", progress=0.0, message="任务不存在")
+        counts[task.status] = counts.get(task.status, 0) + 1
+        tasks.append(BatchTask(filename=child["filename"], task=task))
+
+    total = len(tasks)
+    if counts["processing"]:
+        status = "processing"
+    elif counts["pending"]:
+        # 部分子任务已结束、其余仍在排队时，整批视为处理中
+        status = "processing" if counts["completed"] or counts["failed"] else "pending"
+    elif counts["completed"]:
+        status = "completed"
+    else:
+        status = "failed"
+
+    # 失败的子任务按已结束计入进度
+    progress = sum(
+        100.0 if item.task.status == "failed" else item.task.progress for item in tasks
+    ) / total if total else 100.0
+
+    return BatchStatus(
+        batch_id=batch_id,
+        status=status,
+        progress=progress,
+        total=total,
+        pending=counts["pending"],
+        processing=counts["processing"],
+        completed=counts["completed"],
+        failed=counts["failed"],
+        tasks=tasks,
+        created_at=batch["created_at"]
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=BatchStatus,
+    openapi_extra=multipart_openapi(
+        {
+            "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+            "priority": PRIORITY_FORM_FIELD
+        },
+        ["files"]
+    )
+)
+async def upload_batch(request: Request):
+    """
+    批量上传音频文件（表单字段 files，可重复）
+
+    每个文件创建一个子任务，格式或大小不符合要求的文件记为失败的子任务（其余数据直接丢弃），不影响其他文件。
+    返回批量任务 ID 和各子任务的初始状态，之后通过 /api/batch/{batch_id} 查询汇总进度。
+    """
+    if job_queue.is_full():
+        raise queue_full_exception()
+    start_model_warm_up()
+    ensure_directory(UPLOAD_DIR)
+
+    try:
+        received, fields = await receive_multipart(
+            request, UPLOAD_DIR, MAX_FILE_SIZE, ALLOWED_EXTENSIONS, fail_fast=False
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    files = [item for item in received if item.field_name == "files"]
+    await discard_uploads([item for item in received if item.field_name != "files"])
+    priority = fields.get("priority") or DEFAULT_PRIORITY
+    try:
+        validate_priority(priority)
+        check_batch_size(len(files))
+    except HTTPException:
+        await discard_uploads(files)
+        raise
+
+    items = [(item.filename, item.path, item.error) for item in files]
+    source_hashes = {item.path: item.sha256 for item in files if item.path}
+
+    try:
+        return await create_batch(items, priority, get_client_id(request), source_hashes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量提交失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"批量提交失败: {str(e)}")
+
+
+@router.post("/batch/manifest", response_model=BatchStatus)
+async def submit_batch_manifest(manifest: BatchManifest, request: Request):
+    """
+    按清单批量提交音频
+
+    清单中每一项提供 path（BATCH_IMPORT_DIR 下的服务器本地文件）或 url 之一。
+    URL 并行下载，下载失败或路径无效的条目记为失败的子任务。
+    """
+    validate_priority(manifest.priority)
+    check_batch_size(len(manifest.items))
+    start_model_warm_up()
+    ensure_directory(UPLOAD_DIR)
+
+    async def copy_local(path: str) -> Tuple[str, str]:
+        source_path = resolve_local_path(path)
+        file_ext = os.path.splitext(source_path)[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise ValueError(f"不支持的文件格式。支持的格式: {', '.join(ALLOWED_EXTENSIONS)}")
+        if os.path.getsize(source_path) > MAX_FILE_SIZE:
+            raise ValueError(f"文件过大。最大支持 {MAX_FILE_SIZE // (1024*1024)}MB")
+        # 复制一份，去重时删除的是副本而不是原文件
+        file_path = os.path.join(UPLOAD_DIR, f"{generate_result_id()}{file_ext}")
+        await asyncio.to_thread(shutil.copyfile, source_path, file_path)
+        return os.path.basename(source_path), file_path
+
+    source_hashes: Dict[str, str] = {}
+
+    async def resolve(item) -> Tuple[str, Optional[str], Optional[str]]:
+        display_name = item.filename or os.path.basename(item.path or item.url or "") or "unknown"
+        try:
+            if bool(item.path) == bool(item.url):
+                raise ValueError("每一项需提供 path 或 url 之一")
+            if item.path:
+                filename, file_path = await copy_local(item.path)
+            else:
+                downloaded = await downloader.download(item.url, UPLOAD_DIR)
+                filename, file_path = downloaded.filename, downloaded.path
+                source_hashes[file_path] = downloaded.sha256
+            return item.filename or filename, file_path, None
+        except (ValueError, OSError, DownloadError) as e:
+            return display_name, None, str(e) or type(e).__name__
+
+    # 下载器限制同时进行的下载数，其余条目排队等待
+    items = await asyncio.gather(*(resolve(item) for item in manifest.items))
+
+    try:
+        return await create_batch(list(items), manifest.priority, get_client_id(request), source_hashes)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量提交失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"批量提交失败: {str(e)}")
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatus)
+async def get_batch(batch_id: str):
+    """查询批量任务的汇总进度和各子任务状态"""
+    return await get_batch_status(batch_id)
+
+
+@router.get("/queue/stats", response_model=QueueStats)
+async def get_queue_stats():
+    """任务队列状态：调度策略、排队和执行中的任务数，以及各优先级类别的排队时长统计"""
+    return job_queue.get_stats()
@@ -5,14 +5,24 @@ from dotenv import load_dotenv
 # 加载环境变量
 load_dotenv()
 
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'storage', 'uploads')
-RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'storage', 'results')
-AUDIO_PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'storage', 'processed')
+# 存储根目录（基准测试等场景可指向临时目录）
+STORAGE_DIR = os.getenv("STORAGE_DIR", os.path.join(os.path.dirname(__file__), '..', '..', 'storage'))
+
+UPLOAD_DIR = os.path.join(STORAGE_DIR, 'uploads')
+RESULTS_DIR = os.path.join(STORAGE_DIR, 'results')
+AUDIO_PROCESSED_DIR = os.path.join(STORAGE_DIR, 'processed')
+CHECKPOINT_DIR = os.path.join(STORAGE_DIR, 'checkpoints')
+ARTIFACT_CACHE_DIR = os.path.join(STORAGE_DIR, 'cache')
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(STORAGE_DIR, 'jobs.db'))
+HISTORY_INDEX_PATH = os.getenv("HISTORY_INDEX_PATH", os.path.join(STORAGE_DIR, 'history.db'))
+UPLOAD_SESSION_DIR = os.path.join(STORAGE_DIR, 'upload_sessions')
 
 # 确保目录存在
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs(AUDIO_PROCESSED_DIR, exist_ok=True)
+os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+os.makedirs(ARTIFACT_CACHE_DIR, exist_ok=True)
 
 # 模型配置
 WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL_NAME", "large-v3-turbo")
@@ -30,3 +40,49 @@ DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", None)
 # API 配置
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
 ALLOWED_EXTENSIONS = ['.wav', '.mp3', '.m4a', '.flac', '.ogg', '.aac']
+# URL 下载：同时进行的下载数、文件不小于多少字节时分段并行下载及分段数、两次读取之间最长等待（秒）
+DOWNLOAD_MAX_CONCURRENT = int(os.getenv("DOWNLOAD_MAX_CONCURRENT", "4"))
+DOWNLOAD_PARALLEL_THRESHOLD = int(os.getenv("DOWNLOAD_PARALLEL_THRESHOLD", str(32 * 1024 * 1024)))
+DOWNLOAD_RANGE_PARTS = int(os.getenv("DOWNLOAD_RANGE_PARTS", "4"))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT", "60"))
+# 可续传上传：单个文件大小上限、建议的分块大小，以及会话多久没有收到数据后过期（秒）
+UPLOAD_SESSION_MAX_SIZE = int(os.getenv("UPLOAD_SESSION_MAX_SIZE", str(4 * 1024 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+# 音频时长上限（秒），上传后读取头信息即检查，0 表示不限制
+MAX_AUDIO_DURATION = float(os.getenv("MAX_AUDIO_DURATION", "0"))
+
+# 批量提交：单批最多文件数；清单中的本地路径必须位于该目录下（为空时不允许本地路径）
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+BATCH_IMPORT_DIR = os.getenv("BATCH_IMPORT_DIR", "")
+
+# 识别前剪掉音频开头的秒数
+TRIM_START_SECONDS = float(os.getenv("TRIM_START_SECONDS", "3"))
+
+# 任务队列配置
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))  # 同时执行的识别任务数
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))  # 最大排队任务数
+JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "30"))  # 队列已满时建议的重试间隔（秒）
+
+# 同一优先级类别内的调度策略: fifo / sjf（短任务优先）/ fair（按客户端公平分配）
+SCHEDULING_POLICY = os.getenv("SCHEDULING_POLICY", "sjf")
+# 短任务优先的老化系数：每等待 1 秒抵消多少秒音频时长
+SJF_AGING = float(os.getenv("SJF_AGING", "1.0"))
+# 预计完成时间：每秒音频的初始处理耗时（秒），之后按已完成任务的实际耗时滑动更新
+ETA_INITIAL_RTF = float(os.getenv("ETA_INITIAL_RTF", "0.5"))
+
+# 阶段产物缓存（识别 / 说话人分离 / 翻译）容量上限，超出后按最近使用时间淘汰
+ARTIFACT_CACHE_MAX_MB = int(os.getenv("ARTIFACT_CACHE_MAX_MB", "2048"))
+
+# 长音频分块并行识别：超过 LONG_AUDIO_THRESHOLD 秒的音频在静音处切成不超过
+# LONG_AUDIO_CHUNK_SECONDS 秒的分块，由 TRANSCRIBE_WORKERS 个进程并行识别（1 表示关闭）
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+LONG_AUDIO_THRESHOLD = float(os.getenv("LONG_AUDIO_THRESHOLD", "1800"))
+LONG_AUDIO_CHUNK_SECONDS = float(os.getenv("LONG_AUDIO_CHUNK_SECONDS", "600"))
+
+# 任务状态推送（SSE）：每个连接每秒最多推送的状态数，以及心跳间隔（秒）
+STATUS_EVENTS_PER_SECOND = float(os.getenv("STATUS_EVENTS_PER_SECOND", "4"))
+STATUS_EVENTS_HEARTBEAT = float(os.getenv("STATUS_EVENTS_HEARTBEAT", "15"))
+
+# 推理线程池大小（Whisper / 说话人分离 / 翻译共用）
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", str(max(2, JOB_WORKERS * 2))))
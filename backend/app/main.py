@@ -1,6 +1,7 @@
 # ---------------------------------------------------------------------------
 # 关键：必须在导入任何模块之前设置环境变量
 # ---------------------------------------------------------------------------
+import asyncio
 import os
 
 # 设置 HuggingFace 离线模式 - 必须在任何 huggingface_hub 导入之前设置
@@ -19,15 +20,22 @@ os.environ.setdefault("TORCHAUDIO_USE_CODEC_BACKEND", "0")
 # 现在可以安全地导入其他模块
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
 import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from app.api.routes import router
+from app.api.routes import router, resume_interrupted_tasks, get_model_status
 from app.api.history import router as history_router
+from app.services.job_queue import job_queue
+from app.services.inference_executor import inference_executor
+from app.services.chunked_transcriber import chunked_transcriber
+from app.services.metrics import pipeline_metrics
+from app.services.upload_sessions import upload_session_manager
+from app.services.downloader import downloader
+from app.services.history_index import history_index
 from app.core.config import UPLOAD_DIR, RESULTS_DIR, AUDIO_PROCESSED_DIR
 
 logging.basicConfig(
@@ -73,6 +81,15 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 格式的监控指标：各阶段耗时、队列深度、执行中的任务数和模型加载状态"""
+    return PlainTextResponse(
+        pipeline_metrics.render(job_queue.get_stats(), get_model_status()),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("正在启动 Whisper ASR 服务...")
@@ -82,12 +99,23 @@ async def startup_event():
     logger.info(f"上传目录: {UPLOAD_DIR}")
     logger.info(f"结果目录: {RESULTS_DIR}")
     logger.info(f"处理目录: {AUDIO_PROCESSED_DIR}")
+    await job_queue.start()
+    await upload_session_manager.start()
+    # 首次启用历史记录索引时由已有的结果文件建立
+    await asyncio.to_thread(history_index.ensure_built, RESULTS_DIR)
+    # 恢复服务重启前未完成的任务
+    await resume_interrupted_tasks()
     logger.info("Whisper ASR 服务启动完成!")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Whisper ASR 服务正在关闭...")
+    await job_queue.stop()
+    await upload_session_manager.stop()
+    await downloader.close()
+    inference_executor.shutdown()
+    chunked_transcriber.shutdown()
 
 
 if __name__ == "__main__":
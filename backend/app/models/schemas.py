@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -17,6 +17,13 @@ class SentenceSegment(BaseModel):
     translation: TranslationModel
 
 
+class StageTiming(BaseModel):
+    wall_time: float  # 墙钟时间（秒）
+    cpu_time: float  # 进程 CPU 时间（秒），并行阶段会互相计入
+    peak_rss_mb: Optional[float] = None  # 阶段内进程峰值内存（MB）
+    rtf: Optional[float] = None  # 实时率 = 墙钟时间 / 音频时长
+
+
 class ASRResult(BaseModel):
     success: bool
     result_id: str
@@ -31,6 +38,7 @@ class ASRResult(BaseModel):
     audio_path: str
     updated_timestamp: Optional[str] = None
     processing_time: Optional[float] = None  # 处理耗时（秒）
+    stage_timings: Optional[Dict[str, StageTiming]] = None  # 各阶段耗时
 
 
 class TaskStatus(BaseModel):
@@ -39,3 +47,132 @@ class TaskStatus(BaseModel):
     progress: float
     message: str
     result_id: Optional[str] = None
+    queue_position: Optional[int] = None  # 排队位置（从 1 开始），未排队时为 None
+    eta_seconds: Optional[float] = None  # 预计多少秒后完成（按探测到的音频时长估算），未知或已结束时为 None
+
+
+class PartialSegment(BaseModel):
+    index: int
+    text: str
+    start: float
+    end: float
+    speaker: Optional[int] = None  # 说话人识别完成前为 None
+    translation: Optional[TranslationModel] = None  # 翻译完成前为 None
+
+
+class PartialResult(BaseModel):
+    task_id: str
+    status: str
+    progress: float
+    segments: List[PartialSegment]  # 索引 >= since 的片段
+    total_segments: int
+    transcription_done: bool
+    speakers_ready: bool
+    translations_ready: bool
+    result_id: Optional[str] = None  # 任务完成后可通过 /api/result 获取完整结果
+
+
+class BatchManifestItem(BaseModel):
+    path: Optional[str] = None  # 服务器本地路径（位于 BATCH_IMPORT_DIR 下）
+    url: Optional[str] = None  # 音频 URL
+    filename: Optional[str] = None  # 显示用的文件名，默认取路径或 URL 中的文件名
+
+
+class BatchManifest(BaseModel):
+    items: List[BatchManifestItem]
+    priority: str = "normal"  # 优先级类别: high / normal / low
+
+
+class BatchTask(BaseModel):
+    filename: str
+    task: TaskStatus
+
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    status: str  # pending, processing, completed, failed
+    progress: float  # 所有子任务进度的平均值
+    total: int
+    pending: int
+    processing: int
+    completed: int
+    failed: int
+    tasks: List[BatchTask]
+    created_at: str
+
+
+class HistoryItem(BaseModel):
+    result_id: str
+    filename: str
+    timestamp: str
+    updated_timestamp: Optional[str] = None
+    total_duration: float
+    speaker_count: int
+    text_preview: str
+    processing_time: Optional[float] = None  # 处理耗时（秒）
+
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    total: int  # 符合筛选条件的结果数
+    offset: int
+    limit: int
+
+
+class SearchHit(BaseModel):
+    result_id: str
+    filename: Optional[str] = None
+    sentence_index: Optional[int] = None  # 命中的句子序号；结果没有分句、命中整段文本时为 None
+    start: Optional[float] = None  # 句子开始时间（秒），用于播放器定位
+    end: Optional[float] = None
+    speaker: Optional[int] = None
+    text: str
+    translation_zh: Optional[str] = None
+    translation_en: Optional[str] = None
+
+
+class SearchPage(BaseModel):
+    query: str
+    hits: List[SearchHit]  # 按相关度排序
+    total: int  # 命中的句子数
+    offset: int
+    limit: int
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int  # 文件大小（字节）
+    priority: str = "normal"  # 优先级类别: high / normal / low
+    sha256: Optional[str] = None  # 可选，完成上传时校验
+
+
+class UploadSession(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    received: List[List[int]]  # 已接收的字节范围 [start, end)，已合并并排序
+    received_bytes: int
+    complete: bool  # 是否已收齐全部数据
+    chunk_size: int  # 建议的分块大小（字节）
+    expires_at: str  # 此后仍未收到新数据的会话会被清理
+
+
+class QueueClassStats(BaseModel):
+    priority: str
+    pending: int  # 当前排队任务数
+    started: int  # 服务启动以来开始执行的任务数
+    oldest_pending_wait: Optional[float] = None  # 排队最久的任务已等待的秒数
+    wait_samples: int  # 以下统计基于最近多少个任务
+    wait_mean: Optional[float] = None  # 从入队到开始执行的秒数
+    wait_p50: Optional[float] = None
+    wait_p95: Optional[float] = None
+    wait_max: Optional[float] = None
+
+
+class QueueStats(BaseModel):
+    policy: str  # 同一优先级类别内的调度策略
+    depth: int
+    active: int
+    max_size: int
+    rtf: float  # 估算预计完成时间用的每秒音频处理耗时（秒）
+    classes: List[QueueClassStats]
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from ..core.config import ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB
+from ..utils.helpers import ensure_directory
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCache:
+    """
+    阶段产物磁盘缓存
+
+    识别片段、说话人分离结果和翻译结果分别以 JSON 保存在
+    ARTIFACT_CACHE_DIR/{stage}/{key}.json，key 由该阶段的输入和参数计算得到。
+    只修改某个阶段的参数时，其他阶段仍可命中缓存。
+    总大小超过上限时按最近使用时间（LRU）淘汰，访问时间记录在文件 mtime 上，重启后依然有效。
+    """
+
+    def __init__(self, cache_dir: str = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 路径 -> 文件大小，按最近使用时间从旧到新排列
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        """扫描缓存目录，按 mtime 重建 LRU 顺序"""
+        ensure_directory(self.cache_dir)
+        files = []
+        for stage in os.listdir(self.cache_dir):
+            stage_dir = os.path.join(self.cache_dir, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            for filename in os.listdir(stage_dir):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(stage_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._total_bytes += size
+        logger.info(f"阶段缓存: {len(self._entries)} 个条目, {self._total_bytes / (1024 * 1024):.1f}MB")
+
+    @staticmethod
+    def make_key(**inputs) -> str:
+        """由阶段输入和参数计算缓存 key"""
+        payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.json")
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        """读取缓存，未命中返回 None"""
+        path = self._path(stage, key)
+        with self._lock:
+            if path not in self._entries:
+                return None
+            self._entries.move_to_end(path)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)
+            logger.info(f"阶段缓存命中: {stage}/{key[:12]}")
+            return data
+        except Exception as e:
+            logger.warning(f"读取阶段缓存 {path} 失败: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, stage: str, key: str, data: Any):
+        """写入缓存，必要时淘汰最久未使用的条目"""
+        path = self._path(stage, key)
+        ensure_directory(os.path.dirname(path))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入阶段缓存 {path} 失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._total_bytes -= self._entries.pop(path, 0)
+            self._entries[path] = size
+            self._total_bytes += size
+            self._evict()
+
+    def _remove(self, path: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到总大小不超过上限（调用方需持有锁），最新写入的条目保留"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            logger.info(f"阶段缓存淘汰: {path}")
+
+
+# 全局阶段缓存实例
+artifact_cache = ArtifactCache()
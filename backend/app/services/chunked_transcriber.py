@@ -0,0 +1,246 @@
+"""
+长音频分块并行识别
+
+在 VAD 检测到的静音处把 16kHz WAV 切成长度受限的分块，分发到多个 worker 进程
+（每个进程各自加载一份 CTranslate2 Whisper 模型）并行识别，再按偏移量拼接结果。
+第一个分块先单独识别以确定语言，其余分块固定使用该语言。
+
+注意：worker 进程只导入本模块，不能导入 torch / pyannote 等重量级依赖。
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..core.config import (
+    WHISPER_MODEL_NAME, WHISPER_DEVICE, COMPUTE_TYPE,
+    TRANSCRIBE_WORKERS, LONG_AUDIO_CHUNK_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# 在目标切分点之前多长的范围内寻找静音（秒）
+SILENCE_SEARCH_SECONDS = 30.0
+
+# 可作为切分点的最短静音（秒）
+MIN_SILENCE_SECONDS = 0.3
+
+
+def segment_to_dict(segment: Any, offset: float = 0.0) -> Dict[str, Any]:
+    """把 faster-whisper 的 Segment 转为结果字典，时间戳加上分块偏移量"""
+    segment_data = {
+        "text": segment.text.strip(),
+        "start": segment.start + offset,
+        "end": segment.end + offset,
+        "words": []
+    }
+
+    if segment.words:
+        for word in segment.words:
+            segment_data["words"].append({
+                "word": word.word,
+                "start": word.start + offset,
+                "end": word.end + offset,
+                "probability": word.probability
+            })
+
+    return segment_data
+
+
+def _find_silence_cut(audio_path: str, window_start: float, window_end: float) -> Optional[float]:
+    """在 [window_start, window_end] 内用 VAD 寻找最靠后的静音段，返回切分点（秒）"""
+    import soundfile
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    audio, _ = soundfile.read(
+        audio_path,
+        start=int(window_start * SAMPLE_RATE),
+        stop=int(window_end * SAMPLE_RATE),
+        dtype='float32'
+    )
+    if len(audio) == 0:
+        return None
+
+    speech = get_speech_timestamps(
+        audio, VadOptions(min_silence_duration_ms=int(MIN_SILENCE_SECONDS * 1000), speech_pad_ms=0)
+    )
+
+    # 静音段 = 窗口内语音片段之间（以及首尾）的空隙
+    gaps = []
+    cursor = 0
+    for span in speech:
+        gaps.append((cursor, span["start"]))
+        cursor = span["end"]
+    gaps.append((cursor, len(audio)))
+
+    min_gap = int(MIN_SILENCE_SECONDS * SAMPLE_RATE)
+    candidates = [(start, end) for start, end in gaps if end - start >= min_gap]
+    if not candidates:
+        return None
+
+    # 取最靠后的静音段；较长的静音在距下一段语音 1 秒处切分，使分块尽量接近上限
+    start, end = candidates[-1]
+    cut = max((start + end) / 2, end - SAMPLE_RATE)
+    return window_start + cut / SAMPLE_RATE
+
+
+def split_on_silence(audio_path: str, total_duration: float, max_chunk_seconds: float) -> List[Tuple[float, float]]:
+    """
+    在静音处把音频切分为不超过 max_chunk_seconds 的分块
+
+    每次只读取目标切分点前 SILENCE_SEARCH_SECONDS 秒做 VAD，内存占用与音频总长度无关；
+    窗口内没有静音时在目标位置硬切。
+
+    返回:
+        [(开始秒, 结束秒), ...]
+    """
+    chunks = []
+    position = 0.0
+    while total_duration - position > max_chunk_seconds:
+        target = position + max_chunk_seconds
+        window_start = max(position + 1.0, target - SILENCE_SEARCH_SECONDS)
+        cut = _find_silence_cut(audio_path, window_start, target) or target
+        chunks.append((position, cut))
+        position = cut
+    chunks.append((position, total_duration))
+    return chunks
+
+
+# ----------------------------------------------------------------------
+# worker 进程
+# ----------------------------------------------------------------------
+
+_worker_model = None
+
+
+def _init_worker(cpu_threads: int):
+    """worker 进程初始化：加载 Whisper 模型"""
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info(f"[pid {os.getpid()}] 正在加载 Whisper 模型: {WHISPER_MODEL_NAME}")
+    _worker_model = WhisperModel(
+        WHISPER_MODEL_NAME,
+        device=WHISPER_DEVICE,
+        compute_type=COMPUTE_TYPE,
+        cpu_threads=cpu_threads,
+        local_files_only=True
+    )
+
+
+def _transcribe_chunk(
+    audio_path: str,
+    start: float,
+    end: float,
+    language: Optional[str],
+    options: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], str]:
+    """在 worker 进程中识别一个分块，返回 (片段列表, 语言)"""
+    import soundfile
+
+    audio, _ = soundfile.read(
+        audio_path,
+        start=int(start * SAMPLE_RATE),
+        stop=int(end * SAMPLE_RATE),
+        dtype='float32'
+    )
+    segments, info = _worker_model.transcribe(audio, language=language, **options)
+    return [segment_to_dict(segment, offset=start) for segment in segments], info.language
+
+
+# ----------------------------------------------------------------------
+# 主进程
+# ----------------------------------------------------------------------
+
+class ChunkedTranscriber:
+    """长音频分块并行识别器，worker 进程池在首次使用时创建并常驻"""
+
+    def __init__(self, num_workers: int = TRANSCRIBE_WORKERS, max_chunk_seconds: float = LONG_AUDIO_CHUNK_SECONDS):
+        self.num_workers = max(1, num_workers)
+        self.max_chunk_seconds = max_chunk_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            cpu_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            # 使用 spawn，避免 fork 已加载模型和线程池的主进程
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(cpu_threads,)
+            )
+            logger.info(f"分块识别进程池已创建: {self.num_workers} 个进程, 每个 {cpu_threads} 线程")
+        return self._pool
+
+    def transcribe(
+        self,
+        audio_path: str,
+        total_duration: float,
+        options: Dict[str, Any],
+        language: str = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        分块并行识别
+
+        segment_callback 按时间顺序接收片段：某个分块之前的分块全部完成后才会输出该分块的片段
+
+        返回:
+            (按时间排序并已加上偏移量的片段列表, 语言)
+        """
+        chunks = split_on_silence(audio_path, total_duration, self.max_chunk_seconds)
+        logger.info(f"长音频分块识别: {total_duration:.1f}秒, {len(chunks)} 个分块")
+
+        pool = self._get_pool()
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        done_seconds = 0.0
+        next_to_emit = 0
+
+        def report(chunk_idx: int):
+            nonlocal done_seconds, next_to_emit
+            start, end = chunks[chunk_idx]
+            done_seconds += end - start
+            if progress_callback and total_duration > 0:
+                progress_callback(min(100.0 * done_seconds / total_duration, 100.0))
+            # 按顺序输出已连续完成的分块
+            while segment_callback and next_to_emit in results:
+                for segment in results[next_to_emit]:
+                    segment_callback(segment)
+                next_to_emit += 1
+
+        # 第一个分块先识别，确定语言后固定给其余分块使用
+        first_start, first_end = chunks[0]
+        results[0], detected_language = pool.submit(
+            _transcribe_chunk, audio_path, first_start, first_end, language, options
+        ).result()
+        language = language or detected_language
+        report(0)
+
+        futures = {
+            pool.submit(_transcribe_chunk, audio_path, start, end, language, options): idx
+            for idx, (start, end) in enumerate(chunks) if idx > 0
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            results[idx], _ = future.result()
+            report(idx)
+
+        segments = []
+        for idx in range(len(chunks)):
+            segments.extend(results[idx])
+        return segments, language
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# 全局分块识别器实例
+chunked_transcriber = ChunkedTranscriber()
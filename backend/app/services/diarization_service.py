@@ -19,9 +19,11 @@ os.environ.setdefault("TORCHAUDIO_USE_CODEC_BACKEND", "0")
 import logging
 import torch
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 import sys
+import threading
 from ..core.config import HF_TOKEN
+from .inference_executor import inference_executor
 
 logger = logging.getLogger(__name__)
 
@@ -246,9 +248,12 @@ if hasattr(torch, 'serialization'):
         logger.warning(f"添加安全全局变量时出错: {e}")
 
 class DiarizationService:
+    MODEL_NAME = "pyannote/speaker-diarization-3.1"
+
     def __init__(self):
         self.model = None
         self.pipeline = None
+        self._load_lock = threading.Lock()
 
     def load_model(self):
         """延迟加载说话人识别模型"""
@@ -281,13 +286,13 @@ class DiarizationService:
                 if HF_TOKEN:
                     logger.info("使用 HF_TOKEN 加载模型")
                     self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-3.1",
+                        self.MODEL_NAME,
                         use_auth_token=HF_TOKEN
                     )
                 else:
                     logger.info("不使用 HF_TOKEN 加载模型")
                     self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-3.1"
+                        self.MODEL_NAME
                     )
                 self.pipeline.to(device)
 
@@ -307,63 +312,128 @@ class DiarizationService:
             logger.error(f"加载说话人识别模型失败: {e}", exc_info=True)
             self.model = None
 
-    def assign_speakers(
+    # pyannote 说话人分离流程的主要步骤，用于估算进度
+    PIPELINE_STEPS = ["segmentation", "speaker_counting", "embeddings", "discrete_diarization"]
+
+    def _make_progress_hook(self, progress_callback: Callable[[float], None]):
+        """构造 pyannote pipeline 的 hook，把各步骤进度换算为 0-100 的百分比"""
+        steps = self.PIPELINE_STEPS
+
+        def hook(step_name, step_artifact, file=None, total=None, completed=None):
+            if step_name not in steps:
+                return
+            step_idx = steps.index(step_name)
+            step_fraction = completed / total if total and completed is not None else 1.0
+            progress_callback(100.0 * (step_idx + step_fraction) / len(steps))
+
+        return hook
+
+    def warm_up(self):
+        """预先加载模型（批量任务开始前调用，避免首个任务承担加载时间）"""
+        with self._load_lock:
+            if self.pipeline is None:
+                self.load_model()
+
+    def diarize(
         self,
         audio_path: str,
-        segments: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
+        progress_callback: Optional[Callable[[float], None]] = None,
+        waveform: Optional[np.ndarray] = None
+    ) -> Optional[List[Dict[str, Any]]]:
         """
-        为 Whisper 识别的片段分配说话人标签
+        执行说话人分离，只依赖音频，可与 Whisper 识别并行执行
 
         参数:
             audio_path: 音频文件路径
-            segments: Whisper 识别的片段列表
+            progress_callback: 进度回调函数，接受进度百分比（0-100）
+            waveform: 已解码的 16kHz float32 波形（可选），提供时以 {"waveform", "sample_rate"}
+                直接传给 pipeline，与识别共享同一块内存，不再读取 audio_path
 
         返回:
-            带有 speaker 信息的片段列表
+            说话人片段列表 [{"start", "end", "speaker"}]，模型不可用或失败时返回 None
         """
         try:
-            if self.pipeline is None:
-                self.load_model()
+            self.warm_up()
 
             if self.pipeline is None:
-                logger.warning("说话人识别模型未加载，分配默认说话人")
-                for seg in segments:
-                    seg["speaker"] = 0
-                return segments
+                logger.warning("说话人识别模型未加载")
+                return None
 
             logger.info("开始说话人识别...")
 
-            # 执行说话人分离
-            diarization = self.pipeline(audio_path)
+            if waveform is not None:
+                audio_input = {
+                    "waveform": torch.from_numpy(waveform).unsqueeze(0),
+                    "sample_rate": 16000
+                }
+            else:
+                audio_input = audio_path
+
+            if progress_callback:
+                diarization = self.pipeline(audio_input, hook=self._make_progress_hook(progress_callback))
+            else:
+                diarization = self.pipeline(audio_input)
 
-            # 将说话人分配到片段
-            result = self._assign_speakers_to_segments(segments, diarization)
+            turns = [
+                {"start": turn.start, "end": turn.end, "speaker": speaker}
+                for turn, _, speaker in diarization.itertracks(yield_label=True)
+            ]
 
-            # 统计说话人数量
-            unique_speakers = set(seg["speaker"] for seg in result)
-            logger.info(f"说话人识别完成，识别到 {len(unique_speakers)} 个说话人")
+            unique_speakers = set(turn["speaker"] for turn in turns)
+            logger.info(f"说话人分离完成，共 {len(turns)} 个片段，{len(unique_speakers)} 个说话人")
 
-            return result
+            return turns
 
         except Exception as e:
             logger.error(f"说话人识别失败: {e}", exc_info=True)
+            return None
+
+    def cache_params(self) -> Dict[str, Any]:
+        """影响说话人分离结果的参数，用于阶段缓存 key"""
+        return {"model": self.MODEL_NAME}
+
+    async def diarize_async(
+        self,
+        audio_path: str,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        waveform: Optional[np.ndarray] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """在推理线程池中执行 diarize，不阻塞事件循环"""
+        return await inference_executor.run(self.diarize, audio_path, progress_callback, waveform)
+
+    def assign_speakers_from_turns(
+        self,
+        segments: List[Dict[str, Any]],
+        turns: Optional[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        用 diarize 的结果为 Whisper 片段分配说话人，turns 为 None 时分配默认说话人
+        """
+        if turns is None:
             logger.warning("分配默认说话人标签")
             for seg in segments:
                 seg["speaker"] = 0
             return segments
 
+        result = self._assign_speakers_to_segments(segments, turns)
+
+        # 统计说话人数量
+        unique_speakers = set(seg["speaker"] for seg in result)
+        logger.info(f"说话人识别完成，识别到 {len(unique_speakers)} 个说话人")
+
+        return result
+
     def _assign_speakers_to_segments(
         self,
         segments: List[Dict[str, Any]],
-        diarization: Any
+        turns: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """
         将说话人分配到 Whisper 识别的片段
 
         参数:
             segments: Whisper 识别的片段
-            diarization: pyannote.audio 说话人分离结果
+            turns: diarize 返回的说话人片段列表
 
         返回:
             带有说话人标签的片段列表
@@ -376,24 +446,20 @@ class DiarizationService:
         for seg in segments:
             seg_start = seg["start"]
             seg_end = seg["end"]
-            seg_mid = (seg_start + seg_end) / 2
 
-            # 找到与片段中点重叠的说话人
+            # 找到与片段重叠时间最长的说话人
             best_speaker = None
             best_duration = 0
 
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                turn_start = turn.start
-                turn_end = turn.end
-
+            for turn in turns:
                 # 计算重叠时间
-                overlap_start = max(seg_start, turn_start)
-                overlap_end = min(seg_end, turn_end)
+                overlap_start = max(seg_start, turn["start"])
+                overlap_end = min(seg_end, turn["end"])
                 overlap_duration = max(0, overlap_end - overlap_start)
 
                 if overlap_duration > best_duration:
                     best_duration = overlap_duration
-                    best_speaker = speaker
+                    best_speaker = turn["speaker"]
 
             # 分配或映射说话人 ID
             if best_speaker is not None:
@@ -0,0 +1,284 @@
+"""
+URL 音频下载
+
+所有下载共用一个 aiohttp 会话（连接池），并用信号量限制同时进行的下载数。
+响应体边接收边写入磁盘（在线程池中执行）并增量计算 SHA256，
+Content-Length 或已接收的字节数超过 MAX_FILE_SIZE 时立即中止。
+服务器支持范围请求且文件较大时，把文件分成几段并行下载，各段直接写入文件中的对应位置。
+
+会话由 session_factory 创建，可以指向本地的 HTTP 服务进行测试。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from ..core.config import (
+    ALLOWED_EXTENSIONS, MAX_FILE_SIZE,
+    DOWNLOAD_MAX_CONCURRENT, DOWNLOAD_RANGE_PARTS, DOWNLOAD_PARALLEL_THRESHOLD, DOWNLOAD_READ_TIMEOUT
+)
+from ..utils.helpers import ensure_directory, file_sha256, write_at
+
+logger = logging.getLogger(__name__)
+
+# 每次从响应中读取的字节数
+DOWNLOAD_READ_SIZE = 64 * 1024
+
+# 缓冲达到该大小后写入磁盘
+DOWNLOAD_FLUSH_SIZE = 1024 * 1024
+
+# 建立连接的超时（秒）
+DOWNLOAD_CONNECT_TIMEOUT = 30
+
+
+class DownloadError(Exception):
+    """下载失败（HTTP 错误、文件过大、连接中断等），消息可直接返回给客户端"""
+
+
+class DownloadedFile:
+    """一个已下载的文件"""
+
+    def __init__(self, filename: str, path: str, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+
+def guess_extension(url: str, content_type: str) -> str:
+    """优先使用 URL 中受支持的扩展名，否则按内容类型推断，默认 .mp3"""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext in ALLOWED_EXTENSIONS:
+        return ext
+    if 'wav' in content_type:
+        return '.wav'
+    if 'm4a' in content_type:
+        return '.m4a'
+    if 'ogg' in content_type:
+        return '.ogg'
+    return '.mp3'
+
+
+class _StreamWriter:
+    """按顺序写入文件并计算 SHA256，在线程池中执行"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._hasher = hashlib.sha256()
+
+    def write(self, chunks: List[bytes]):
+        for chunk in chunks:
+            self._file.write(chunk)
+            self._hasher.update(chunk)
+
+    def close(self) -> str:
+        self._file.close()
+        return self._hasher.hexdigest()
+
+
+class Downloader:
+    """共享连接池、限制并发、流式写入的下载器"""
+
+    def __init__(
+        self,
+        max_file_size: int = MAX_FILE_SIZE,
+        max_concurrent: int = DOWNLOAD_MAX_CONCURRENT,
+        range_parts: int = DOWNLOAD_RANGE_PARTS,
+        parallel_threshold: int = DOWNLOAD_PARALLEL_THRESHOLD,
+        read_timeout: float = DOWNLOAD_READ_TIMEOUT,
+        session_factory: Optional[Callable[[], aiohttp.ClientSession]] = None
+    ):
+        self.max_file_size = max_file_size
+        self.max_concurrent = max_concurrent
+        self.range_parts = range_parts
+        self.parallel_threshold = parallel_threshold
+        self.read_timeout = read_timeout
+        self._session_factory = session_factory or self._create_session
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        # 每个下载最多 range_parts 个连接；不限制总时长，只限制连接和两次读取之间的等待
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent * max(1, self.range_parts))
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=DOWNLOAD_CONNECT_TIMEOUT, sock_read=self.read_timeout
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # 会话需要在事件循环中创建，首次使用时再创建
+        if self._session is None or self._session.closed:
+            self._session = self._session_factory()
+        return self._session
+
+    async def close(self):
+        """关闭连接池"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _check_size(self, size: Optional[int]):
+        if size is not None and size > self.max_file_size:
+            raise DownloadError(f"文件过大。最大支持 {self.max_file_size // (1024*1024)}MB")
+
+    async def download(self, url: str, dest_dir: str) -> DownloadedFile:
+        """
+        下载 url 到 dest_dir，文件名为 downloaded_xxxxxxxx 加推断的扩展名
+
+        超过并发上限时排队等待
+
+        Raises:
+            DownloadError: 下载失败或文件过大，已写入的部分会被删除
+        """
+        ensure_directory(dest_dir)
+        async with self._semaphore:
+            try:
+                return await self._download(url, dest_dir)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise DownloadError(f"下载失败: {str(e) or type(e).__name__}")
+
+    async def _download(self, url: str, dest_dir: str) -> DownloadedFile:
+        session = self._get_session()
+        path = None
+        response = await session.get(url)
+        try:
+            if response.status != 200:
+                raise DownloadError(f"下载失败，HTTP 状态码: {response.status}")
+
+            content_type = response.headers.get('Content-Type', '')
+            if not any(ct in content_type for ct in ['audio', 'octet-stream']):
+                logger.warning(f"内容类型可能不是音频: {content_type}")
+
+            # 声明的大小已超过上限时不读取响应体
+            size = response.content_length
+            self._check_size(size)
+
+            filename = f"downloaded_{uuid.uuid4().hex[:8]}{guess_extension(url, content_type)}"
+            path = os.path.join(dest_dir, filename)
+
+            if (
+                self.range_parts > 1
+                and size is not None
+                and size >= self.parallel_threshold
+                and response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            ):
+                # 放弃这个连接上未读取的数据，改为分段并行下载
+                response.close()
+                if await self._fetch_ranges(session, url, path, size):
+                    digest = await asyncio.to_thread(file_sha256, path)
+                    return DownloadedFile(filename, path, size, digest)
+                # 服务器实际上没有按范围返回，重新按顺序下载
+                logger.info(f"服务器不支持范围请求，按顺序下载: {url}")
+                response = await session.get(url)
+                if response.status != 200:
+                    raise DownloadError(f"下载失败，HTTP 状态码: {response.status}")
+                self._check_size(response.content_length)
+
+            written, digest = await self._stream_to_file(response, path)
+            return DownloadedFile(filename, path, written, digest)
+        except BaseException:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            response.release()
+
+    async def _stream_to_file(self, response: aiohttp.ClientResponse, path: str) -> Tuple[int, str]:
+        """顺序写入整个响应体，返回 (字节数, SHA256)"""
+        writer = await asyncio.to_thread(_StreamWriter, path)
+        written = 0
+        buffer: List[bytes] = []
+        buffered = 0
+        try:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_READ_SIZE):
+                written += len(chunk)
+                self._check_size(written)
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= DOWNLOAD_FLUSH_SIZE:
+                    chunks, buffer, buffered = buffer, [], 0
+                    await asyncio.to_thread(writer.write, chunks)
+            if buffer:
+                await asyncio.to_thread(writer.write, buffer)
+        finally:
+            digest = await asyncio.to_thread(writer.close)
+
+        if response.content_length is not None and written != response.content_length:
+            raise DownloadError("下载不完整：连接提前结束")
+        return written, digest
+
+    async def _fetch_ranges(self, session: aiohttp.ClientSession, url: str, path: str, size: int) -> bool:
+        """把文件分成 range_parts 段并行下载；服务器没有按范围返回时返回 False"""
+        part_size = -(-size // self.range_parts)
+        ranges = [(start, min(start + part_size, size)) for start in range(0, size, part_size)]
+
+        def allocate():
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        await asyncio.to_thread(allocate)
+        tasks = [
+            asyncio.create_task(self._fetch_range(session, url, path, start, end, size))
+            for start, end in ranges
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # 任一段失败时取消其余各段
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return all(results)
+
+    async def _fetch_range(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        path: str,
+        start: int,
+        end: int,
+        size: int
+    ) -> bool:
+        """下载 [start, end) 并写入文件的对应位置（每段使用自己的 fd）"""
+        async with session.get(url, headers={"Range": f"bytes={start}-{end - 1}"}) as response:
+            if response.status == 200:
+                return False
+            if response.status != 206:
+                raise DownloadError(f"下载失败，HTTP 状态码: {response.status}")
+            if response.headers.get('Content-Range', '') != f"bytes {start}-{end - 1}/{size}":
+                return False
+
+            position = start
+            buffer: List[bytes] = []
+            buffered = 0
+            fd = await asyncio.to_thread(os.open, path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+            try:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_READ_SIZE):
+                    if position + buffered + len(chunk) > end:
+                        raise DownloadError("服务器返回的数据超出请求的范围")
+                    buffer.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= DOWNLOAD_FLUSH_SIZE:
+                        data, buffer, buffered = b"".join(buffer), [], 0
+                        await asyncio.to_thread(write_at, fd, data, position)
+                        position += len(data)
+                if buffer:
+                    data = b"".join(buffer)
+                    await asyncio.to_thread(write_at, fd, data, position)
+                    position += len(data)
+            finally:
+                os.close(fd)
+
+        if position != end:
+            raise DownloadError("下载不完整：连接提前结束")
+        return True
+
+
+# 全局下载器实例
+downloader = Downloader()
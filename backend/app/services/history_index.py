@@ -0,0 +1,368 @@
+"""
+历史记录索引（SQLite）
+
+每个结果的元数据（文件名、时间、时长、说话人数、文本预览等）保存在索引中，
+结果保存、编辑和导入时同步更新。历史列表直接查询索引，支持分页、排序和按日期 / 时长 / 说话人数筛选，
+不需要遍历 RESULTS_DIR 并逐个解析结果文件。
+
+各句的原文和中英文翻译同时写入 FTS5 全文索引，用于跨所有结果搜索并定位到具体句子。
+中日韩文字之间没有空格，unicode61 分词器会把一整段连续的汉字当作一个词：
+索引和查询时在每个中日韩字符两侧加空格按单字切分，查询词再作为短语匹配（各字必须相邻），
+这样任意长度的中文词都能命中，英文仍按单词匹配。
+
+索引可以随时由磁盘上的结果文件重建，在 backend 目录下运行:
+    python -m app.services.history_index
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import HISTORY_INDEX_PATH, RESULTS_DIR
+from ..utils.helpers import ensure_directory
+
+logger = logging.getLogger(__name__)
+
+# 文本预览的长度
+PREVIEW_LENGTH = 100
+
+# 可用于排序的字段
+SORT_FIELDS = ["timestamp", "total_duration", "speaker_count", "filename", "processing_time"]
+
+_COLUMNS = [
+    "result_id", "filename", "timestamp", "updated_timestamp",
+    "total_duration", "speaker_count", "text_preview", "processing_time"
+]
+
+
+# 中日韩字符（假名、汉字、谚文、半角片假名）
+_CJK_CHAR = re.compile(
+    r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af\uff66-\uff9f])"
+)
+
+
+def segment_text(text: Optional[str]) -> str:
+    """在每个中日韩字符两侧加空格，使分词器按单字切分"""
+    return _CJK_CHAR.sub(r" \1 ", text or "")
+
+
+def build_match_query(query: str) -> str:
+    """
+    把用户输入转换为 FTS5 查询：按空白分成多个词，每个词作为一个短语，所有词都需出现在同一句中
+    （原文或任一翻译）
+
+    Raises:
+        ValueError: 没有可搜索的内容
+    """
+    phrases = []
+    for term in query.split():
+        if not any(ch.isalnum() for ch in term):
+            continue
+        phrase = " ".join(segment_text(term).split()).replace('"', '""')
+        phrases.append(f'"{phrase}"')
+    if not phrases:
+        raise ValueError("请输入要搜索的内容")
+    return " ".join(phrases)
+
+
+def is_result_file(filename: str) -> bool:
+    """RESULTS_DIR 中的结果 JSON（{result_id}.json）"""
+    return filename.endswith('.json') and not filename.startswith('.')
+
+
+def build_entry(result_data: Dict[str, Any], default_id: Optional[str] = None) -> Dict[str, Any]:
+    """由结果数据提取索引字段"""
+    text = result_data.get('text', '') or ''
+    preview = text[:PREVIEW_LENGTH] + '...' if len(text) > PREVIEW_LENGTH else text
+    result_id = result_data.get('result_id') or default_id
+    return {
+        "result_id": result_id,
+        "filename": result_data.get('filename') or f"{result_id}.json",
+        "timestamp": result_data.get('timestamp', '') or '',
+        "updated_timestamp": result_data.get('updated_timestamp'),
+        "total_duration": result_data.get('total_duration', 0) or 0,
+        "speaker_count": len(result_data.get('speakers', []) or []),
+        "text_preview": preview,
+        "processing_time": result_data.get('processing_time'),
+    }
+
+
+def build_sentence_rows(result_id: str, result_data: Dict[str, Any]) -> List[Tuple]:
+    """
+    全文索引的行: (result_id, 句子序号, 开始, 结束, 说话人, 原文, 中文翻译, 英文翻译)
+
+    整段文本 text 由各句组成，只在结果没有分句时才作为一行（句子序号为 None）写入
+    """
+    rows = []
+    for idx, sentence in enumerate(result_data.get('sentences') or []):
+        translation = sentence.get('translation') or {}
+        rows.append((
+            result_id, idx, sentence.get('start'), sentence.get('end'), sentence.get('speaker'),
+            sentence.get('text', '') or '', translation.get('zh') or None, translation.get('en') or None
+        ))
+    if not rows and result_data.get('text'):
+        rows.append((result_id, None, None, None, None, result_data['text'], None, None))
+    return rows
+
+
+class HistoryIndex:
+    """历史记录元数据索引"""
+
+    def __init__(self, db_path: str = HISTORY_INDEX_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        ensure_directory(os.path.dirname(os.path.abspath(db_path)))
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    result_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    updated_timestamp TEXT,
+                    total_duration REAL NOT NULL DEFAULT 0,
+                    speaker_count INTEGER NOT NULL DEFAULT 0,
+                    text_preview TEXT NOT NULL DEFAULT '',
+                    processing_time REAL
+                )
+                """
+            )
+            for field in ["timestamp", "total_duration", "speaker_count"]:
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_results_{field} ON results ({field})")
+
+            # 各句的原始内容；全文索引 sentences_fts 的 rowid 与 sentences.id 对应，保存切分后的文本
+            has_sentences = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sentences'"
+            ).fetchone() is not None
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sentences (
+                    id INTEGER PRIMARY KEY,
+                    result_id TEXT NOT NULL,
+                    sentence_index INTEGER,
+                    start_time REAL,
+                    end_time REAL,
+                    speaker INTEGER,
+                    text TEXT NOT NULL DEFAULT '',
+                    translation_zh TEXT,
+                    translation_en TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sentences_result ON sentences (result_id)")
+            try:
+                self._conn.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(
+                        text, translation_zh, translation_en,
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                    """
+                )
+                self.search_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite 不支持 FTS5，全文搜索不可用: {e}")
+                self.search_enabled = False
+            # 旧版本索引没有句子表，启动时需要重建
+            self._needs_rebuild = not has_sentences
+
+    def _upsert(self, entry: Dict[str, Any]):
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+            [entry[column] for column in _COLUMNS]
+        )
+
+    def _delete_sentences(self, result_id: str):
+        if self.search_enabled:
+            self._conn.execute(
+                "DELETE FROM sentences_fts WHERE rowid IN (SELECT id FROM sentences WHERE result_id = ?)",
+                (result_id,)
+            )
+        self._conn.execute("DELETE FROM sentences WHERE result_id = ?", (result_id,))
+
+    def _insert_sentences(self, rows: List[Tuple]):
+        for row in rows:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO sentences
+                    (result_id, sentence_index, start_time, end_time, speaker, text, translation_zh, translation_en)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                row
+            )
+            if self.search_enabled:
+                self._conn.execute(
+                    "INSERT INTO sentences_fts (rowid, text, translation_zh, translation_en) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, segment_text(row[5]), segment_text(row[6]), segment_text(row[7]))
+                )
+
+    def upsert(self, result_id: str, result_data: Dict[str, Any]):
+        """新增或更新一个结果的索引（元数据和全部句子）"""
+        entry = build_entry(result_data, default_id=result_id)
+        rows = build_sentence_rows(entry["result_id"], result_data)
+        with self._lock, self._conn:
+            self._upsert(entry)
+            self._delete_sentences(entry["result_id"])
+            self._insert_sentences(rows)
+
+    def remove(self, result_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE result_id = ?", (result_id,))
+            self._delete_sentences(result_id)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def query(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        sort: str = "timestamp",
+        descending: bool = True,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        分页查询，返回 (符合条件的总数, 当前页)
+
+        date_from / date_to 为与 timestamp 同格式（UTC ISO 8601）的字符串，范围为 [date_from, date_to)
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort}。可选: {', '.join(SORT_FIELDS)}")
+
+        conditions = []
+        params: List[Any] = []
+        for clause, value in [
+            ("timestamp >= ?", date_from),
+            ("timestamp < ?", date_to),
+            ("total_duration >= ?", min_duration),
+            ("total_duration <= ?", max_duration),
+            ("speaker_count >= ?", min_speakers),
+            ("speaker_count <= ?", max_speakers),
+        ]:
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM results {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"""
+                SELECT {', '.join(_COLUMNS)} FROM results {where}
+                ORDER BY {sort} {direction}, result_id {direction}
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            ).fetchall()
+        return total, [dict(row) for row in rows]
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 20,
+        result_id: Optional[str] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        全文搜索原文和中英文翻译，按相关度排序，返回 (命中的句子数, 当前页)
+
+        Raises:
+            ValueError: 没有可搜索的内容
+            RuntimeError: SQLite 不支持 FTS5
+        """
+        if not self.search_enabled:
+            raise RuntimeError("SQLite 不支持 FTS5，全文搜索不可用")
+        match = build_match_query(query)
+        where = "sentences_fts MATCH ?"
+        params: List[Any] = [match]
+        if result_id is not None:
+            where += " AND s.result_id = ?"
+            params.append(result_id)
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM sentences_fts JOIN sentences s ON s.id = sentences_fts.rowid WHERE {where}",
+                params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"""
+                SELECT s.result_id, r.filename, s.sentence_index, s.start_time AS start, s.end_time AS end,
+                       s.speaker, s.text, s.translation_zh, s.translation_en
+                FROM sentences_fts
+                JOIN sentences s ON s.id = sentences_fts.rowid
+                LEFT JOIN results r ON r.result_id = s.result_id
+                WHERE {where}
+                ORDER BY sentences_fts.rank, r.timestamp DESC, s.sentence_index
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            ).fetchall()
+        return total, [dict(row) for row in rows]
+
+    def rebuild(self, results_dir: str = RESULTS_DIR) -> int:
+        """清空索引并由 results_dir 中的结果文件重建（逐个读取，在一个事务中完成），返回索引的结果数"""
+        filenames = sorted(os.listdir(results_dir)) if os.path.exists(results_dir) else []
+        count = 0
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("DELETE FROM sentences")
+            if self.search_enabled:
+                self._conn.execute("DELETE FROM sentences_fts")
+            for filename in filenames:
+                if not is_result_file(filename):
+                    continue
+                try:
+                    with open(os.path.join(results_dir, filename), 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    entry = build_entry(data, default_id=filename[:-len('.json')])
+                    rows = build_sentence_rows(entry["result_id"], data)
+                except Exception as e:
+                    logger.warning(f"读取文件 {filename} 失败: {e}")
+                    continue
+                self._upsert(entry)
+                self._insert_sentences(rows)
+                count += 1
+            if self.search_enabled:
+                self._conn.execute("INSERT INTO sentences_fts (sentences_fts) VALUES ('optimize')")
+        self._needs_rebuild = False
+        logger.info(f"历史记录索引已重建: {count} 个结果")
+        return count
+
+    def ensure_built(self, results_dir: str = RESULTS_DIR):
+        """索引为空（首次启用索引）或缺少句子表（旧版本索引）而磁盘上已有结果时重建"""
+        if (self.count() > 0 and not self._needs_rebuild) or not os.path.exists(results_dir):
+            return
+        if any(is_result_file(filename) for filename in os.listdir(results_dir)):
+            self.rebuild(results_dir)
+
+
+# 全局历史记录索引实例
+history_index = HistoryIndex()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由结果文件重建历史记录索引")
+    parser.add_argument("--results-dir", default=RESULTS_DIR, help="结果目录")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    count = history_index.rebuild(args.results_dir)
+    print(f"已索引 {count} 个结果: {history_index.db_path}")
+
+
+if __name__ == "__main__":
+    main()
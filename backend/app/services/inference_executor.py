@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from ..core.config import INFERENCE_THREADS
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """
+    模型推理专用线程池
+
+    Whisper、说话人分离和翻译的推理都通过它执行，事件循环只负责等待结果，
+    推理期间 /api/status、/api/audio、/health 等请求仍可正常响应。
+    使用线程池而不是进程池：模型只需加载一份，且 CTranslate2 / PyTorch
+    推理时会释放 GIL；进度回调也可以直接通过 run_coroutine_threadsafe 回到事件循环。
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_THREADS):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="inference"
+            )
+            logger.info(f"推理线程池已创建: {self.max_workers} 个线程")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在推理线程池中执行同步函数并等待结果"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = False):
+        """关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+# 全局推理执行器实例
+inference_executor = InferenceExecutor()
@@ -0,0 +1,302 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+from .task_manager import task_manager
+from .scheduling import PRIORITY_CLASSES, DEFAULT_PRIORITY, SchedulingPolicy, create_policy, job_cost
+from ..core.config import JOB_WORKERS, JOB_QUEUE_SIZE, SCHEDULING_POLICY, SJF_AGING, ETA_INITIAL_RTF
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """任务队列已满，调用方应稍后重试"""
+
+
+# 每个优先级类别保留最近多少个任务的排队时长用于统计
+LATENCY_WINDOW = 1000
+
+# 处理耗时 / 音频时长的滑动平均系数（新完成任务的权重）
+ETA_RTF_SMOOTHING = 0.2
+
+
+class Job:
+    """队列中的一个待执行任务"""
+
+    def __init__(
+        self,
+        task_id: str,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        priority: str = DEFAULT_PRIORITY,
+        client_id: Optional[str] = None,
+        duration: Optional[float] = None
+    ):
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY
+        self.client_id = client_id or ""
+        self.duration = duration  # 音频时长（秒），未知时为 None
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+
+class JobQueue:
+    """
+    有界推理任务队列
+
+    固定数量的 worker 从队列中取任务执行，限制同时运行的识别任务数；
+    排队任务数超过上限时拒绝新任务，由 API 层返回 503 + Retry-After。
+    执行顺序先按优先级类别，同一类别内由调度策略（见 scheduling.py）决定。
+    """
+
+    def __init__(
+        self,
+        num_workers: int = JOB_WORKERS,
+        max_size: int = JOB_QUEUE_SIZE,
+        policy: Optional[SchedulingPolicy] = None
+    ):
+        self.num_workers = max(1, num_workers)
+        self.max_size = max(1, max_size)
+        self.policy = policy or create_policy(SCHEDULING_POLICY, sjf_aging=SJF_AGING)
+        self._pending: List[Job] = []
+        self._running: Dict[str, Job] = {}
+        self._cond = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
+        # 各优先级类别最近的排队时长（秒）和已开始执行的任务数
+        self._wait_times: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=LATENCY_WINDOW) for priority in PRIORITY_CLASSES
+        }
+        self._started: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        # 每秒音频的处理耗时（秒），用于估算预计完成时间
+        self.rtf = ETA_INITIAL_RTF
+
+    async def start(self):
+        """启动 worker"""
+        if self._workers:
+            return
+        for idx in range(self.num_workers):
+            self._workers.append(asyncio.create_task(self._worker(idx)))
+        logger.info(
+            f"任务队列已启动: {self.num_workers} 个 worker, 队列上限 {self.max_size}, "
+            f"调度策略 {self.policy.name}"
+        )
+
+    async def stop(self):
+        """停止所有 worker，正在执行的任务会被取消"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def is_full(self) -> bool:
+        """排队任务是否已达上限"""
+        return len(self._pending) >= self.max_size
+
+    @property
+    def depth(self) -> int:
+        """当前排队任务数"""
+        return len(self._pending)
+
+    @property
+    def active(self) -> int:
+        """当前正在执行的任务数"""
+        return len(self._running)
+
+    def _ordered_pending(self) -> List[Job]:
+        """排队任务的预计执行顺序：先按优先级类别，类别内按调度策略"""
+        ordered = []
+        for priority in PRIORITY_CLASSES:
+            jobs = [job for job in self._pending if job.priority == priority]
+            if jobs:
+                ordered.extend(self.policy.order(jobs, ordered))
+        return ordered
+
+    def _estimated_seconds(self, job: Job) -> float:
+        return job_cost(job) * self.rtf
+
+    def estimate_etas(self) -> Dict[str, float]:
+        """
+        估算执行中和排队任务多少秒后完成
+
+        执行中的任务按已运行时间扣除剩余耗时；排队任务按预计执行顺序依次分配给最早空闲的 worker
+        """
+        now = time.monotonic()
+        etas = {}
+        free_at = []
+        for job in self._running.values():
+            remaining = max(0.0, self._estimated_seconds(job) - (now - (job.started_at or now)))
+            etas[job.task_id] = remaining
+            free_at.append(remaining)
+        free_at += [0.0] * max(0, self.num_workers - len(free_at))
+        heapq.heapify(free_at)
+        for job in self._ordered_pending():
+            finish = heapq.heappop(free_at) + self._estimated_seconds(job)
+            etas[job.task_id] = finish
+            heapq.heappush(free_at, finish)
+        return etas
+
+    def _observe_rtf(self, job: Job):
+        """用成功完成的任务的实际耗时更新每秒音频的处理耗时"""
+        if not job.duration or job.started_at is None:
+            return
+        rtf = (time.monotonic() - job.started_at) / job.duration
+        self.rtf = (1 - ETA_RTF_SMOOTHING) * self.rtf + ETA_RTF_SMOOTHING * rtf
+
+    def get_position(self, task_id: str) -> Optional[int]:
+        """获取任务的排队位置（从 1 开始），不在队列中返回 None"""
+        for idx, job in enumerate(self._ordered_pending()):
+            if job.task_id == task_id:
+                return idx + 1
+        return None
+
+    async def submit(
+        self,
+        task_id: str,
+        func: Callable[..., Any],
+        *args,
+        priority: str = DEFAULT_PRIORITY,
+        client_id: Optional[str] = None,
+        duration: Optional[float] = None,
+        **kwargs
+    ) -> int:
+        """
+        提交任务到队列
+
+        Args:
+            priority: 优先级类别（high / normal / low）
+            client_id: 提交任务的客户端，用于公平分配
+            duration: 音频时长（秒），用于短任务优先
+
+        Returns:
+            排队位置（从 1 开始）
+
+        Raises:
+            QueueFullError: 队列已满
+        """
+        job = Job(task_id, func, args, kwargs, priority, client_id, duration)
+        return await self._enqueue(job, force=False)
+
+    async def requeue(
+        self,
+        task_id: str,
+        func: Callable[..., Any],
+        *args,
+        priority: str = DEFAULT_PRIORITY,
+        client_id: Optional[str] = None,
+        duration: Optional[float] = None,
+        **kwargs
+    ) -> int:
+        """
+        提交不受队列上限限制的任务（服务重启前未完成的任务、已整体检查过容量的批量子任务）
+
+        Returns:
+            排队位置（从 1 开始）
+        """
+        job = Job(task_id, func, args, kwargs, priority, client_id, duration)
+        return await self._enqueue(job, force=True)
+
+    async def _enqueue(self, job: Job, force: bool) -> int:
+        task_id = job.task_id
+        async with self._cond:
+            if not force and self.is_full():
+                raise QueueFullError(f"任务队列已满 ({self.max_size})")
+            self._pending.append(job)
+            position = self._ordered_pending().index(job) + 1
+            # 在唤醒 worker 之前写入排队状态，避免覆盖已开始执行的任务状态
+            await task_manager.update_task(
+                task_id,
+                queue_position=position,
+                message=f"排队中，前方还有 {position - 1} 个任务",
+                eta_seconds=self.estimate_etas().get(task_id)
+            )
+            self._cond.notify()
+        # 新任务可能插到已有任务前面
+        if position < len(self._pending):
+            await self._publish_positions()
+        return position
+
+    async def _next_job(self) -> Job:
+        async with self._cond:
+            while not self._pending:
+                await self._cond.wait()
+            job = self._ordered_pending()[0]
+            self._pending.remove(job)
+            self._running[job.task_id] = job
+            job.started_at = time.monotonic()
+            self.policy.on_start(job)
+            self._wait_times[job.priority].append(time.monotonic() - job.enqueued_at)
+            self._started[job.priority] += 1
+            return job
+
+    def _client_idle(self, client_id: str) -> bool:
+        """客户端是否已没有排队或执行中的任务"""
+        jobs = list(self._pending) + list(self._running.values())
+        return not any(job.client_id == client_id for job in jobs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各优先级类别的排队情况和最近的排队时长统计（秒）"""
+        classes = []
+        for priority in PRIORITY_CLASSES:
+            waits = sorted(self._wait_times[priority])
+            pending = [job for job in self._pending if job.priority == priority]
+            now = time.monotonic()
+            classes.append({
+                "priority": priority,
+                "pending": len(pending),
+                "started": self._started[priority],
+                "oldest_pending_wait": max((now - job.enqueued_at for job in pending), default=None),
+                "wait_samples": len(waits),
+                "wait_mean": sum(waits) / len(waits) if waits else None,
+                "wait_p50": waits[int(0.5 * (len(waits) - 1))] if waits else None,
+                "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else None,
+                "wait_max": waits[-1] if waits else None,
+            })
+        return {
+            "policy": self.policy.name,
+            "depth": self.depth,
+            "active": self.active,
+            "max_size": self.max_size,
+            "rtf": round(self.rtf, 4),
+            "classes": classes
+        }
+
+    async def _publish_positions(self):
+        """队列变化后刷新所有排队任务的位置，以及排队和执行中任务的预计完成时间"""
+        etas = self.estimate_etas()
+        for job in list(self._running.values()):
+            await task_manager.update_task(job.task_id, eta_seconds=etas.get(job.task_id))
+        for idx, job in enumerate(self._ordered_pending()):
+            await task_manager.update_task(
+                job.task_id,
+                queue_position=idx + 1,
+                message=f"排队中，前方还有 {idx} 个任务",
+                eta_seconds=etas.get(job.task_id)
+            )
+
+    async def _worker(self, idx: int):
+        while True:
+            job = await self._next_job()
+            await self._publish_positions()
+            logger.info(f"worker {idx} 开始执行任务 {job.task_id}")
+            try:
+                await job.func(*job.args, **job.kwargs)
+                task = await task_manager.get_task(job.task_id)
+                if task is not None and task.status == "completed":
+                    self._observe_rtf(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"任务 {job.task_id} 执行异常: {e}", exc_info=True)
+            finally:
+                self._running.pop(job.task_id, None)
+                self.policy.on_finish(job, self._client_idle(job.client_id))
+
+
+# 全局任务队列实例
+job_queue = JobQueue()
@@ -0,0 +1,359 @@
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from ..models.schemas import TaskStatus
+from ..core.config import JOB_STORE_PATH, CHECKPOINT_DIR
+from ..utils.helpers import get_current_timestamp, ensure_directory
+
+logger = logging.getLogger(__name__)
+
+# 识别流程的阶段，按执行顺序排列
+PIPELINE_STAGES = ["decode", "transcribe", "diarize", "translate", "persist"]
+
+# 未结束的任务状态，服务重启后需要恢复
+UNFINISHED_STATUSES = ("pending", "processing")
+
+
+class JobStore:
+    """
+    持久化任务存储（SQLite）
+
+    记录每个任务的状态、进度和已完成的阶段，各阶段的中间结果以 JSON
+    检查点的形式保存在 CHECKPOINT_DIR/{task_id}/{stage}.json。
+    服务重启后可据此从最后完成的阶段继续执行。
+    """
+
+    def __init__(self, db_path: str = JOB_STORE_PATH, checkpoint_dir: str = CHECKPOINT_DIR):
+        self.db_path = db_path
+        self.checkpoint_dir = checkpoint_dir
+        self._lock = threading.Lock()
+        ensure_directory(os.path.dirname(os.path.abspath(db_path)))
+        ensure_directory(checkpoint_dir)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    task_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    message TEXT NOT NULL DEFAULT '',
+                    result_id TEXT,
+                    stage TEXT,
+                    original_filename TEXT,
+                    uploaded_file_path TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            # 旧版本数据库缺少的列
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+            for column, column_type in [
+                ("cache_key", "TEXT"),
+                ("priority", "TEXT"),
+                ("client_id", "TEXT"),
+                ("audio_duration", "REAL"),
+            ]:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_cache_key ON jobs (cache_key)")
+            # 音频内容 + 流程参数 -> result_id 索引
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS result_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    result_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            # 批量提交及其子任务（相同音频去重后，子任务可能指向其他批次或单独上传的任务）
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batch_tasks (
+                    batch_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    task_id TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    PRIMARY KEY (batch_id, position)
+                )
+                """
+            )
+            # 可续传上传会话：received 为已接收的字节范围 [[start, end), ...]（JSON），expires_at 为 Unix 时间
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS upload_sessions (
+                    upload_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    priority TEXT,
+                    client_id TEXT,
+                    sha256 TEXT,
+                    received TEXT NOT NULL DEFAULT '[]',
+                    created_at TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    # ------------------------------------------------------------------
+    # 任务记录
+    # ------------------------------------------------------------------
+
+    def create_job(
+        self,
+        task: TaskStatus,
+        original_filename: Optional[str] = None,
+        uploaded_file_path: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        audio_duration: Optional[float] = None
+    ):
+        """新建任务记录（priority / client_id / audio_duration 供服务重启后按原调度信息恢复）"""
+        now = get_current_timestamp()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO jobs
+                    (task_id, status, progress, message, result_id, stage,
+                     original_filename, uploaded_file_path, cache_key,
+                     priority, client_id, audio_duration, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (task.task_id, task.status, task.progress, task.message, task.result_id,
+                 original_filename, uploaded_file_path, cache_key,
+                 priority, client_id, audio_duration, now, now)
+            )
+
+    def save_task(self, task: TaskStatus):
+        """保存任务状态"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, progress = ?, message = ?, result_id = ?, updated_at = ?
+                WHERE task_id = ?
+                """,
+                (task.status, task.progress, task.message, task.result_id,
+                 get_current_timestamp(), task.task_id)
+            )
+
+    def get_job(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务的完整记录"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_task(self, task_id: str) -> Optional[TaskStatus]:
+        """获取任务状态"""
+        job = self.get_job(task_id)
+        if job is None:
+            return None
+        return TaskStatus(
+            task_id=job["task_id"],
+            status=job["status"],
+            progress=job["progress"],
+            message=job["message"],
+            result_id=job["result_id"]
+        )
+
+    def list_unfinished(self) -> List[Dict[str, Any]]:
+        """列出未结束（排队中或处理中）的任务，按创建时间排序"""
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                UNFINISHED_STATUSES
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_active_job(self, cache_key: str) -> Optional[str]:
+        """查找相同输入、尚未结束的任务，返回其 task_id"""
+        placeholders = ", ".join("?" for _ in UNFINISHED_STATUSES)
+        with self._lock:
+            row = self._conn.execute(
+                f"""
+                SELECT task_id FROM jobs
+                WHERE cache_key = ? AND status IN ({placeholders})
+                ORDER BY created_at LIMIT 1
+                """,
+                (cache_key, *UNFINISHED_STATUSES)
+            ).fetchone()
+        return row["task_id"] if row else None
+
+    # ------------------------------------------------------------------
+    # 结果缓存索引
+    # ------------------------------------------------------------------
+
+    def find_cached_result(self, cache_key: str) -> Optional[str]:
+        """查找相同输入已有的识别结果，返回 result_id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result_id FROM result_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row["result_id"] if row else None
+
+    def save_cached_result(self, cache_key: str, result_id: str):
+        """记录输入对应的识别结果"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (cache_key, result_id, created_at) VALUES (?, ?, ?)",
+                (cache_key, result_id, get_current_timestamp())
+            )
+
+    def remove_cached_result(self, cache_key: str):
+        """删除失效的缓存记录"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM result_cache WHERE cache_key = ?", (cache_key,))
+
+    # ------------------------------------------------------------------
+    # 批量提交
+    # ------------------------------------------------------------------
+
+    def create_batch(self, batch_id: str, tasks: List[Tuple[str, str]]):
+        """记录批量提交，tasks 为按提交顺序排列的 (task_id, 文件名)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO batches (batch_id, created_at) VALUES (?, ?)",
+                (batch_id, get_current_timestamp())
+            )
+            self._conn.executemany(
+                "INSERT INTO batch_tasks (batch_id, position, task_id, filename) VALUES (?, ?, ?, ?)",
+                [(batch_id, idx, task_id, filename) for idx, (task_id, filename) in enumerate(tasks)]
+            )
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """获取批量提交记录，包含按顺序排列的子任务 [{"task_id", "filename"}]"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+            if row is None:
+                return None
+            tasks = self._conn.execute(
+                "SELECT task_id, filename FROM batch_tasks WHERE batch_id = ? ORDER BY position",
+                (batch_id,)
+            ).fetchall()
+        return {
+            "batch_id": row["batch_id"],
+            "created_at": row["created_at"],
+            "tasks": [dict(task) for task in tasks]
+        }
+
+    # ------------------------------------------------------------------
+    # 可续传上传
+    # ------------------------------------------------------------------
+
+    def create_upload_session(
+        self,
+        upload_id: str,
+        filename: str,
+        size: int,
+        priority: Optional[str],
+        client_id: Optional[str],
+        sha256: Optional[str],
+        expires_at: float
+    ):
+        """新建上传会话"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO upload_sessions
+                    (upload_id, filename, size, priority, client_id, sha256, received, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, '[]', ?, ?)
+                """,
+                (upload_id, filename, size, priority, client_id, sha256, get_current_timestamp(), expires_at)
+            )
+
+    def get_upload_session(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """获取上传会话，received 已解析为列表"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM upload_sessions WHERE upload_id = ?", (upload_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        session["received"] = json.loads(session["received"])
+        return session
+
+    def update_upload_session(self, upload_id: str, received: List[List[int]], expires_at: float):
+        """记录已接收的字节范围并延长有效期"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE upload_sessions SET received = ?, expires_at = ? WHERE upload_id = ?",
+                (json.dumps(received), expires_at, upload_id)
+            )
+
+    def delete_upload_session(self, upload_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM upload_sessions WHERE upload_id = ?", (upload_id,))
+
+    def list_expired_upload_sessions(self, now: float) -> List[str]:
+        """已过期的上传会话 ID"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT upload_id FROM upload_sessions WHERE expires_at < ?", (now,)
+            ).fetchall()
+        return [row["upload_id"] for row in rows]
+
+    # ------------------------------------------------------------------
+    # 阶段检查点
+    # ------------------------------------------------------------------
+
+    def _checkpoint_path(self, task_id: str, stage: str) -> str:
+        return os.path.join(self.checkpoint_dir, task_id, f"{stage}.json")
+
+    def save_checkpoint(self, task_id: str, stage: str, data: Any):
+        """保存阶段输出并记录该阶段已完成（先写临时文件再替换，避免写入一半）"""
+        if stage not in PIPELINE_STAGES:
+            raise ValueError(f"未知的阶段: {stage}")
+
+        path = self._checkpoint_path(task_id, stage)
+        ensure_directory(os.path.dirname(path))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ? WHERE task_id = ?",
+                (stage, get_current_timestamp(), task_id)
+            )
+        logger.info(f"任务 {task_id} 阶段 {stage} 检查点已保存")
+
+    def load_checkpoint(self, task_id: str, stage: str) -> Optional[Any]:
+        """读取阶段输出，不存在或损坏时返回 None"""
+        path = self._checkpoint_path(task_id, stage)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"读取检查点 {path} 失败: {e}")
+            return None
+
+    def clear_checkpoints(self, task_id: str):
+        """删除任务的全部检查点"""
+        shutil.rmtree(os.path.join(self.checkpoint_dir, task_id), ignore_errors=True)
+
+
+# 全局任务存储实例
+job_store = JobStore()
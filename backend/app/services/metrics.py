@@ -0,0 +1,207 @@
+"""
+识别流程的分阶段耗时统计与 Prometheus 指标
+
+每个任务用 StageTimer 记录各阶段的墙钟时间、CPU 时间、峰值内存和实时率（RTF = 耗时 / 音频时长），
+结果写入结果 JSON 的 stage_timings 字段，同时累计到全局指标中，由 /metrics 以 Prometheus 文本格式导出。
+
+CPU 时间和内存是进程级的：并行执行的阶段（识别与说话人分离）或同时运行的多个任务会互相计入，
+分块识别的 worker 子进程不计入。
+"""
+import contextlib
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# RSS 采样间隔（秒）
+RSS_SAMPLE_INTERVAL = 0.05
+
+# 阶段耗时直方图的桶（秒）
+DURATION_BUCKETS = [0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600]
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存（字节），非 Linux 平台返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssSampler:
+    """在后台线程中定期采样 RSS，记录一段时间内的峰值"""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def start(self):
+        if self.peak is not None:
+            self._thread.start()
+
+    def stop(self) -> Optional[int]:
+        """停止采样并返回峰值（字节）"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+
+class StageTimer:
+    """记录一个任务各阶段的耗时和资源占用"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextlib.asynccontextmanager
+    async def stage(self, name: str):
+        """统计 async with 块内的耗时；阶段失败也会记录"""
+        sampler = RssSampler()
+        sampler.start()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            peak_rss = sampler.stop()
+            self.stages[name] = {
+                "wall_time": round(wall_time, 3),
+                "cpu_time": round(cpu_time, 3),
+                "peak_rss_mb": round(peak_rss / (1024 * 1024), 1) if peak_rss is not None else None
+            }
+            pipeline_metrics.observe_stage(name, wall_time, cpu_time, peak_rss)
+
+    def summary(self, audio_duration: float) -> Dict[str, Dict[str, Any]]:
+        """各阶段统计，附加实时率（耗时 / 音频时长）"""
+        result = {}
+        for name, stats in self.stages.items():
+            rtf = stats["wall_time"] / audio_duration if audio_duration and audio_duration > 0 else None
+            result[name] = {**stats, "rtf": round(rtf, 4) if rtf is not None else None}
+        return result
+
+
+class Histogram:
+    """按标签区分的累计直方图"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts: Dict[str, List[int]] = {}
+        self.sums: Dict[str, float] = {}
+        self.totals: Dict[str, int] = {}
+
+    def observe(self, label: str, value: float):
+        counts = self.counts.setdefault(label, [0] * len(self.buckets))
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[idx] += 1
+        self.sums[label] = self.sums.get(label, 0.0) + value
+        self.totals[label] = self.totals.get(label, 0) + 1
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class PipelineMetrics:
+    """全局流程指标，观测来自推理线程和事件循环，使用线程锁"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_duration = Histogram(DURATION_BUCKETS)
+        self.stage_cpu_seconds: Dict[str, float] = {}
+        self.stage_peak_rss: Dict[str, int] = {}
+        self.tasks_total: Dict[str, int] = {}
+        self.audio_seconds_total = 0.0
+
+    def observe_stage(self, stage: str, wall_time: float, cpu_time: float, peak_rss: Optional[int]):
+        with self._lock:
+            self.stage_duration.observe(stage, wall_time)
+            self.stage_cpu_seconds[stage] = self.stage_cpu_seconds.get(stage, 0.0) + cpu_time
+            if peak_rss is not None:
+                self.stage_peak_rss[stage] = peak_rss
+
+    def observe_task(self, status: str, audio_duration: float = 0.0):
+        """任务结束（completed / failed）"""
+        with self._lock:
+            self.tasks_total[status] = self.tasks_total.get(status, 0) + 1
+            self.audio_seconds_total += audio_duration or 0.0
+
+    def render(self, queue_stats: Dict[str, Any], models: Dict[str, bool]) -> str:
+        """导出 Prometheus 文本格式（exposition format 0.0.4）"""
+        lines = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List[tuple]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}{suffix}{label_text} {_format_value(value)}")
+
+        with self._lock:
+            histogram = self.stage_duration
+            samples = []
+            for stage in histogram.counts:
+                for bound, count in zip(histogram.buckets, histogram.counts[stage]):
+                    samples.append(("_bucket", {"stage": stage, "le": _format_value(bound)}, count))
+                samples.append(("_bucket", {"stage": stage, "le": "+Inf"}, histogram.totals[stage]))
+                samples.append(("_sum", {"stage": stage}, histogram.sums[stage]))
+                samples.append(("_count", {"stage": stage}, histogram.totals[stage]))
+            metric("asr_stage_duration_seconds", "histogram", "Wall time of pipeline stages", samples)
+
+            metric("asr_stage_cpu_seconds_total", "counter", "Process CPU time spent in pipeline stages", [
+                ("", {"stage": stage}, value) for stage, value in self.stage_cpu_seconds.items()
+            ])
+            metric("asr_stage_peak_rss_bytes", "gauge", "Peak resident memory during the last run of each stage", [
+                ("", {"stage": stage}, value) for stage, value in self.stage_peak_rss.items()
+            ])
+            metric("asr_tasks_total", "counter", "Finished tasks by status", [
+                ("", {"status": status}, value) for status, value in self.tasks_total.items()
+            ])
+            metric("asr_audio_seconds_total", "counter", "Audio seconds of finished tasks", [
+                ("", {}, self.audio_seconds_total)
+            ])
+
+        metric("asr_queue_depth", "gauge", "Queued tasks by priority class", [
+            ("", {"priority": item["priority"]}, item["pending"]) for item in queue_stats["classes"]
+        ])
+        metric("asr_queue_capacity", "gauge", "Maximum number of queued tasks", [
+            ("", {}, queue_stats["max_size"])
+        ])
+        metric("asr_active_jobs", "gauge", "Tasks currently being processed", [
+            ("", {}, queue_stats["active"])
+        ])
+        metric("asr_model_loaded", "gauge", "Whether a model is loaded in memory", [
+            ("", {"model": name}, 1 if loaded else 0) for name, loaded in models.items()
+        ])
+
+        rss = current_rss_bytes()
+        if rss is not None:
+            metric("asr_process_resident_memory_bytes", "gauge", "Resident memory of the API process", [
+                ("", {}, rss)
+            ])
+
+        return "\n".join(lines) + "\n"
+
+
+# 全局流程指标实例
+pipeline_metrics = PipelineMetrics()
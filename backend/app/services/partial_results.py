@@ -0,0 +1,110 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class PartialResult:
+    """单个任务的中间结果"""
+
+    def __init__(self):
+        self.segments: List[Dict[str, Any]] = []
+        self.transcription_done = False
+        self.speakers_ready = False
+        self.translations_ready = False
+
+
+class PartialResultStore:
+    """
+    任务进行中的识别结果
+
+    Whisper 每识别出一个片段就追加进来，说话人和翻译在对应阶段完成后回填，
+    客户端无需等到任务结束即可看到已识别的内容。写入来自推理线程，因此使用线程锁。
+    任务结束后结果以 /api/result 为准，中间结果随即释放。
+    """
+
+    def __init__(self):
+        self._results: Dict[str, PartialResult] = {}
+        self._lock = threading.Lock()
+
+    def start(self, task_id: str):
+        """开始记录任务的中间结果（重新执行时清空旧数据）"""
+        with self._lock:
+            self._results[task_id] = PartialResult()
+
+    def add_segment(self, task_id: str, segment: Dict[str, Any]):
+        """追加一个识别完成的片段"""
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is None:
+                return
+            partial.segments.append({
+                "index": len(partial.segments),
+                "text": segment["text"],
+                "start": segment["start"],
+                "end": segment["end"],
+                "speaker": None,
+                "translation": None
+            })
+
+    def set_segments(self, task_id: str, segments: List[Dict[str, Any]]):
+        """一次性设置全部识别片段（从检查点或缓存恢复时），并标记识别完成"""
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is None:
+                return
+            partial.segments = []
+        for segment in segments:
+            self.add_segment(task_id, segment)
+        self.mark_transcription_done(task_id)
+
+    def mark_transcription_done(self, task_id: str):
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is not None:
+                partial.transcription_done = True
+
+    def set_speakers(self, task_id: str, segments: List[Dict[str, Any]]):
+        """回填说话人（segments 与已记录的片段一一对应）"""
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is None:
+                return
+            for item, segment in zip(partial.segments, segments):
+                item["speaker"] = segment.get("speaker", 0)
+            partial.speakers_ready = True
+
+    def set_translation(self, task_id: str, index: int, translation: Dict[str, str]):
+        """回填单个片段的翻译"""
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is None or index >= len(partial.segments):
+                return
+            partial.segments[index]["translation"] = translation
+
+    def mark_translations_ready(self, task_id: str):
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is not None:
+                partial.translations_ready = True
+
+    def get(self, task_id: str, since: int = 0) -> Optional[Dict[str, Any]]:
+        """获取中间结果，segments 只包含索引 >= since 的片段"""
+        with self._lock:
+            partial = self._results.get(task_id)
+            if partial is None:
+                return None
+            return {
+                "segments": [dict(seg) for seg in partial.segments[since:]],
+                "total_segments": len(partial.segments),
+                "transcription_done": partial.transcription_done,
+                "speakers_ready": partial.speakers_ready,
+                "translations_ready": partial.translations_ready
+            }
+
+    def discard(self, task_id: str):
+        """任务结束后释放中间结果"""
+        with self._lock:
+            self._results.pop(task_id, None)
+
+
+# 全局中间结果存储实例
+partial_results = PartialResultStore()
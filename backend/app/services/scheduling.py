@@ -0,0 +1,132 @@
+"""
+任务调度策略
+
+排队任务先按优先级分类（high > normal > low）严格排序，同一类别内由调度策略决定顺序：
+- fifo: 先提交先执行
+- sjf:  短任务优先（按探测到的音频时长），等待时间会抵消时长，避免长任务一直排不上
+- fair: 按客户端公平分配，优先执行已占用识别时长最少的客户端的任务
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from .job_queue import Job
+
+# 优先级类别，按从高到低排列
+PRIORITY_CLASSES = ["high", "normal", "low"]
+DEFAULT_PRIORITY = "normal"
+
+# 时长未知的任务按此时长估计（秒）
+UNKNOWN_DURATION = 600.0
+
+
+def job_cost(job: "Job") -> float:
+    """任务的预估开销（音频秒数）"""
+    return job.duration if job.duration is not None else UNKNOWN_DURATION
+
+
+class SchedulingPolicy(ABC):
+    """调度策略基类：给出同一优先级类别内排队任务的执行顺序"""
+
+    name = ""
+
+    @abstractmethod
+    def order(self, jobs: List["Job"], ahead: List["Job"]) -> List["Job"]:
+        """
+        返回执行顺序
+
+        Args:
+            jobs: 同一优先级类别的排队任务，按提交顺序排列
+            ahead: 更高优先级类别中排在前面的任务
+        """
+
+    def on_start(self, job: "Job"):
+        """任务开始执行"""
+
+    def on_finish(self, job: "Job", client_idle: bool):
+        """任务执行结束，client_idle 表示该客户端已没有排队或执行中的任务"""
+
+
+class FifoPolicy(SchedulingPolicy):
+    name = "fifo"
+
+    def order(self, jobs: List["Job"], ahead: List["Job"]) -> List["Job"]:
+        return list(jobs)
+
+
+class ShortestJobFirstPolicy(SchedulingPolicy):
+    """
+    短任务优先
+
+    排序依据为 音频时长 - 已等待秒数 × aging，aging 为 0 时退化为纯 SJF（长任务可能饿死）
+    """
+
+    name = "sjf"
+
+    def __init__(self, aging: float = 1.0):
+        self.aging = aging
+
+    def order(self, jobs: List["Job"], ahead: List["Job"]) -> List["Job"]:
+        now = time.monotonic()
+        return sorted(
+            jobs,
+            key=lambda job: (job_cost(job) - self.aging * (now - job.enqueued_at), job.enqueued_at)
+        )
+
+
+class FairSharePolicy(SchedulingPolicy):
+    """
+    按客户端公平分配
+
+    记录每个活跃客户端已开始执行的音频总时长，每次从占用最少的客户端取其最早提交的任务；
+    客户端的任务全部结束后清零，空闲一段时间后再提交不会因历史用量被推后。
+    """
+
+    name = "fair"
+
+    def __init__(self):
+        self._served: Dict[str, float] = {}
+
+    def order(self, jobs: List["Job"], ahead: List["Job"]) -> List["Job"]:
+        served = dict(self._served)
+        for job in ahead:
+            served[job.client_id] = served.get(job.client_id, 0.0) + job_cost(job)
+        queues: Dict[str, List["Job"]] = {}
+        for job in jobs:
+            queues.setdefault(job.client_id, []).append(job)
+
+        # 模拟依次取任务，得到完整的预计执行顺序（用于排队位置）
+        result = []
+        while queues:
+            client = min(queues, key=lambda c: (served.get(c, 0.0), queues[c][0].enqueued_at))
+            job = queues[client].pop(0)
+            result.append(job)
+            served[client] = served.get(client, 0.0) + job_cost(job)
+            if not queues[client]:
+                del queues[client]
+        return result
+
+    def on_start(self, job: "Job"):
+        self._served[job.client_id] = self._served.get(job.client_id, 0.0) + job_cost(job)
+
+    def on_finish(self, job: "Job", client_idle: bool):
+        if client_idle:
+            self._served.pop(job.client_id, None)
+
+
+# 可用的调度策略
+POLICIES = {
+    FifoPolicy.name: FifoPolicy,
+    ShortestJobFirstPolicy.name: ShortestJobFirstPolicy,
+    FairSharePolicy.name: FairSharePolicy,
+}
+
+
+def create_policy(name: str, sjf_aging: float = 1.0) -> SchedulingPolicy:
+    """按名称创建调度策略"""
+    if name not in POLICIES:
+        raise ValueError(f"未知的调度策略: {name}，可选: {', '.join(POLICIES)}")
+    if name == ShortestJobFirstPolicy.name:
+        return ShortestJobFirstPolicy(aging=sjf_aging)
+    return POLICIES[name]()
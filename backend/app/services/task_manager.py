@@ -1,30 +1,99 @@
 import asyncio
+import copy
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 from datetime import datetime
 from ..models.schemas import TaskStatus
+from .job_store import job_store
 
 logger = logging.getLogger(__name__)
 
 
 class TaskManager:
-    """任务状态管理器"""
+    """任务状态管理器（内存缓存 + SQLite 持久化）"""
 
     def __init__(self):
         self.tasks: Dict[str, TaskStatus] = {}
         self.lock = asyncio.Lock()
+        # 任务状态订阅者（SSE 连接），状态变化时置位对应的 Event
+        self.subscribers: Dict[str, Set[asyncio.Event]] = {}
+        # 等待写入 SQLite 的任务状态快照（每个任务只保留最新一份）和正在写入的任务
+        self._pending: Dict[str, TaskStatus] = {}
+        self._persisting: Set[str] = set()
 
-    async def create_task(self, task_id: str) -> TaskStatus:
+    def subscribe(self, task_id: str) -> asyncio.Event:
+        """
+        订阅任务状态变化
+
+        返回的 Event 在状态变化时被置位；订阅者读取最新状态后自行清除，
+        两次读取之间的多次更新会被合并为一次
+        """
+        event = asyncio.Event()
+        event.set()  # 订阅后立即推送一次当前状态
+        self.subscribers.setdefault(task_id, set()).add(event)
+        return event
+
+    def unsubscribe(self, task_id: str, event: asyncio.Event):
+        """取消订阅"""
+        events = self.subscribers.get(task_id)
+        if events is None:
+            return
+        events.discard(event)
+        if not events:
+            del self.subscribers[task_id]
+
+    def _publish(self, task_id: str):
+        for event in self.subscribers.get(task_id, ()):
+            event.set()
+
+    async def _persist(self, task_id: str):
+        """
+        在线程池中把任务的最新状态写入 SQLite（在锁外调用，不阻塞事件循环）
+
+        同一任务已有写入在进行时直接返回，由那次写入完成后接着写入最新的快照，
+        写入期间的多次进度更新只落盘一次，且不会出现旧状态覆盖新状态
+        """
+        if task_id in self._persisting:
+            return
+        self._persisting.add(task_id)
+        try:
+            while task_id in self._pending:
+                snapshot = self._pending.pop(task_id)
+                await asyncio.to_thread(job_store.save_task, snapshot)
+        finally:
+            self._persisting.discard(task_id)
+
+    async def create_task(
+        self,
+        task_id: str,
+        original_filename: Optional[str] = None,
+        uploaded_file_path: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        status: str = "pending",
+        progress: float = 0.0,
+        message: str = "任务已创建",
+        result_id: Optional[str] = None,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        audio_duration: Optional[float] = None
+    ) -> TaskStatus:
         """创建新任务"""
+        task = TaskStatus(
+            task_id=task_id,
+            status=status,
+            progress=progress,
+            message=message,
+            result_id=result_id
+        )
+        # 先在线程池中写入 SQLite 再放入内存：任务对其他协程可见之前记录已存在，之后的更新不会落空
+        await asyncio.to_thread(
+            job_store.create_job,
+            task, original_filename, uploaded_file_path, cache_key,
+            priority, client_id, audio_duration
+        )
         async with self.lock:
-            task = TaskStatus(
-                task_id=task_id,
-                status="pending",
-                progress=0.0,
-                message="任务已创建"
-            )
             self.tasks[task_id] = task
-            return task
+        return task
 
     async def update_task(
         self,
@@ -32,7 +101,9 @@ class TaskManager:
         status: Optional[str] = None,
         progress: Optional[float] = None,
         message: Optional[str] = None,
-        result_id: Optional[str] = None
+        result_id: Optional[str] = None,
+        queue_position: Optional[int] = None,
+        eta_seconds: Optional[float] = None
     ) -> bool:
         """更新任务状态"""
         async with self.lock:
@@ -43,22 +114,60 @@ class TaskManager:
 
             if status is not None:
                 task.status = status
+                # 离开排队状态后不再有排队位置，结束后不再有预计完成时间
+                if status != "pending":
+                    task.queue_position = None
+                if status in ("completed", "failed"):
+                    task.eta_seconds = None
             if progress is not None:
                 task.progress = progress
             if message is not None:
                 task.message = message
             if result_id is not None:
                 task.result_id = result_id
+            if queue_position is not None and task.status == "pending":
+                task.queue_position = queue_position
+            if eta_seconds is not None and task.status in ("pending", "processing"):
+                task.eta_seconds = round(eta_seconds, 1)
 
-            return True
+            self._pending[task_id] = copy.copy(task)
+            self._publish(task_id)
+
+        await self._persist(task_id)
+        return True
 
     async def get_task(self, task_id: str) -> Optional[TaskStatus]:
-        """获取任务状态"""
+        """获取任务状态（内存中不存在时从持久化存储读取，例如服务重启后）"""
+        # 读取内存中的任务不需要加锁：事件循环单线程执行，字典读取不会与更新交错
+        task = self.tasks.get(task_id) or self._pending.get(task_id)
+        if task is not None:
+            return task
+
+        async with self.lock:
+            task = self.tasks.get(task_id) or self._pending.get(task_id)
+            if task is None:
+                task = job_store.get_task(task_id)
+                if task is not None and task.status not in ["completed", "failed"]:
+                    self.tasks[task_id] = task
+            return task
+
+    async def restore_task(self, task_id: str) -> Optional[TaskStatus]:
+        """服务重启后把未完成的任务重新载入内存，状态重置为排队中"""
         async with self.lock:
-            return self.tasks.get(task_id)
+            task = job_store.get_task(task_id)
+            if task is None:
+                return None
+            task.status = "pending"
+            task.message = "服务重启，任务等待恢复执行"
+            self.tasks[task_id] = task
+            self._pending[task_id] = copy.copy(task)
+            self._publish(task_id)
+
+        await self._persist(task_id)
+        return task
 
     async def cleanup_task(self, task_id: str):
-        """清理已完成或失败的任务"""
+        """清理已完成或失败的任务（仅从内存中移除，持久化记录保留）"""
         async with self.lock:
             if task_id in self.tasks:
                 task = self.tasks[task_id]
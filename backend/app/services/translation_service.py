@@ -1,8 +1,10 @@
 import logging
 import os
+import threading
 import torch
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, Tuple
 from app.core.config import TRANSLATION_ENABLED
+from app.services.inference_executor import inference_executor
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ class TranslationService:
         self.tokenizer_en_zh = None
         self.model_zh_en = None
         self.tokenizer_zh_en = None
+        # 预加载（warm_up）与翻译任务可能同时在推理线程池中加载模型，串行执行避免重复加载
+        self._load_lock = threading.Lock()
         logger.info(f"翻译服务初始化完成，使用设备: {self.device}")
 
     def _load_model_en_zh(self):
@@ -28,52 +32,68 @@ class TranslationService:
         if self.model_en_zh is not None:
             return
 
-        try:
-            logger.info(f"正在加载 {self.MODEL_EN_ZH} 模型...")
-            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-
-            self.tokenizer_en_zh = AutoTokenizer.from_pretrained(
-                self.MODEL_EN_ZH,
-                local_files_only=True
-            )
-            self.model_en_zh = AutoModelForSeq2SeqLM.from_pretrained(
-                self.MODEL_EN_ZH,
-                local_files_only=True,
-                torch_dtype=torch.float16 if self.device.type == "cuda" else torch.float32
-            ).to(self.device)
-
-            logger.info(f"{self.MODEL_EN_ZH} 模型加载完成")
-
-        except Exception as e:
-            logger.error(f"加载 {self.MODEL_EN_ZH} 模型失败: {e}")
-            self.model_en_zh = None
-            self.tokenizer_en_zh = None
+        with self._load_lock:
+            # 等待锁期间可能已由其他线程加载完成
+            if self.model_en_zh is not None:
+                return
+
+            try:
+                logger.info(f"正在加载 {self.MODEL_EN_ZH} 模型...")
+                from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+                tokenizer = AutoTokenizer.from_pretrained(
+                    self.MODEL_EN_ZH,
+                    local_files_only=True
+                )
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    self.MODEL_EN_ZH,
+                    local_files_only=True,
+                    torch_dtype=torch.float16 if self.device.type == "cuda" else torch.float32
+                ).to(self.device)
+
+                # 先设置分词器再设置模型：其他线程看到模型已加载时分词器一定可用
+                self.tokenizer_en_zh = tokenizer
+                self.model_en_zh = model
+                logger.info(f"{self.MODEL_EN_ZH} 模型加载完成")
+
+            except Exception as e:
+                logger.error(f"加载 {self.MODEL_EN_ZH} 模型失败: {e}")
+                self.model_en_zh = None
+                self.tokenizer_en_zh = None
 
     def _load_model_zh_en(self):
         """延迟加载中文→英文模型"""
         if self.model_zh_en is not None:
             return
 
-        try:
-            logger.info(f"正在加载 {self.MODEL_ZH_EN} 模型...")
-            from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-
-            self.tokenizer_zh_en = AutoTokenizer.from_pretrained(
-                self.MODEL_ZH_EN,
-                local_files_only=True
-            )
-            self.model_zh_en = AutoModelForSeq2SeqLM.from_pretrained(
-                self.MODEL_ZH_EN,
-                local_files_only=True,
-                torch_dtype=torch.float16 if self.device.type == "cuda" else torch.float32
-            ).to(self.device)
-
-            logger.info(f"{self.MODEL_ZH_EN} 模型加载完成")
-
-        except Exception as e:
-            logger.error(f"加载 {self.MODEL_ZH_EN} 模型失败: {e}")
-            self.model_zh_en = None
-            self.tokenizer_zh_en = None
+        with self._load_lock:
+            # 等待锁期间可能已由其他线程加载完成
+            if self.model_zh_en is not None:
+                return
+
+            try:
+                logger.info(f"正在加载 {self.MODEL_ZH_EN} 模型...")
+                from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+                tokenizer = AutoTokenizer.from_pretrained(
+                    self.MODEL_ZH_EN,
+                    local_files_only=True
+                )
+                model = AutoModelForSeq2SeqLM.from_pretrained(
+                    self.MODEL_ZH_EN,
+                    local_files_only=True,
+                    torch_dtype=torch.float16 if self.device.type == "cuda" else torch.float32
+                ).to(self.device)
+
+                # 先设置分词器再设置模型：其他线程看到模型已加载时分词器一定可用
+                self.tokenizer_zh_en = tokenizer
+                self.model_zh_en = model
+                logger.info(f"{self.MODEL_ZH_EN} 模型加载完成")
+
+            except Exception as e:
+                logger.error(f"加载 {self.MODEL_ZH_EN} 模型失败: {e}")
+                self.model_zh_en = None
+                self.tokenizer_zh_en = None
 
     def _detect_language(self, text: str) -> str:
         """检测文本语言"""
@@ -96,12 +116,16 @@ class TranslationService:
         Returns:
             翻译后的文本
         """
+        return self._translate(text, source_lang, target_lang)[0]
+
+    def _translate(self, text: str, source_lang: str, target_lang: str) -> Tuple[str, bool]:
+        """translate 的实现，返回 (译文, 是否降级)；模型不可用或翻译出错而返回原文时为降级"""
         if not text or not text.strip():
-            return text
+            return text, False
 
         if not self.enabled:
             logger.warning("Translation service is disabled, returning original text")
-            return text
+            return text, False
 
         try:
             # 如果是自动检测，先检测语言
@@ -117,7 +141,7 @@ class TranslationService:
                 self._load_model_en_zh()
                 if self.model_en_zh is None:
                     logger.warning("英文→中文模型未加载，返回原文")
-                    return text
+                    return text, True
 
                 # Tokenize
                 inputs = self.tokenizer_en_zh(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
@@ -130,14 +154,14 @@ class TranslationService:
                 # Decode
                 translated_text = self.tokenizer_en_zh.decode(outputs[0], skip_special_tokens=True)
                 logger.info(f"Translated text from en to zh")
-                return translated_text
+                return translated_text, False
 
             # 中文 → 英文
             elif sl == "zh" and tl == "en":
                 self._load_model_zh_en()
                 if self.model_zh_en is None:
                     logger.warning("中文→英文模型未加载，返回原文")
-                    return text
+                    return text, True
 
                 # Tokenize
                 inputs = self.tokenizer_zh_en(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
@@ -150,15 +174,15 @@ class TranslationService:
                 # Decode
                 translated_text = self.tokenizer_zh_en.decode(outputs[0], skip_special_tokens=True)
                 logger.info(f"Translated text from zh to en")
-                return translated_text
+                return translated_text, False
 
             else:
                 logger.warning(f"不支持的语言方向: {sl} → {tl}")
-                return text
+                return text, False
 
         except Exception as e:
             logger.error(f"Translation failed: {str(e)}", exc_info=True)
-            return text
+            return text, True
 
     def translate_segment(self, text: str, source_lang: str = "en") -> Dict[str, str]:
         """
@@ -171,6 +195,11 @@ class TranslationService:
         Returns:
             包含原文、译文和源语言的字典
         """
+        return self._translate_segment(text, source_lang)[0]
+
+    def _translate_segment(self, text: str, source_lang: str) -> Tuple[Dict[str, str], bool]:
+        """translate_segment 的实现，返回 (翻译结果, 是否降级)"""
+        degraded = False
         result = {
             "zh": "",
             "en": "",
@@ -178,7 +207,7 @@ class TranslationService:
         }
 
         if not text or not text.strip():
-            return result
+            return result, False
 
         # 如果是自动检测，则先检测语言
         if source_lang == "auto":
@@ -190,16 +219,17 @@ class TranslationService:
             # 根据源语言进行相应翻译
             if source_lang == "en":
                 result["en"] = text
-                result["zh"] = self.translate(text, source_lang="en", target_lang="zh")
+                result["zh"], degraded = self._translate(text, source_lang="en", target_lang="zh")
             elif source_lang == "zh":
                 result["zh"] = text
-                result["en"] = self.translate(text, source_lang="zh", target_lang="en")
+                result["en"], degraded = self._translate(text, source_lang="zh", target_lang="en")
             else:
                 # 默认当作英文处理
                 result["en"] = text
-                result["zh"] = self.translate(text, source_lang="auto", target_lang="zh")
+                result["zh"], degraded = self._translate(text, source_lang="auto", target_lang="zh")
         except Exception as e:
             logger.error(f"Segment translation failed: {str(e)}")
+            degraded = True
             # 失败时保存原文
             if source_lang == "en":
                 result["en"] = text
@@ -208,31 +238,69 @@ class TranslationService:
                 result["zh"] = text
                 result["en"] = text
 
-        return result
+        return result, degraded
 
-    def translate_all(self, segments: list) -> list:
+    def warm_up(self):
+        """预先加载两个方向的翻译模型（批量任务开始前调用）"""
+        if not self.enabled:
+            return
+        self._load_model_en_zh()
+        self._load_model_zh_en()
+
+    def cache_params(self) -> Dict[str, Any]:
+        """影响翻译结果的参数，用于阶段缓存 key"""
+        return {
+            "enabled": self.enabled,
+            "model_en_zh": self.MODEL_EN_ZH,
+            "model_zh_en": self.MODEL_ZH_EN,
+        }
+
+    def translate_all(
+        self,
+        segments: list,
+        segment_callback: Optional[Callable[[int, Dict[str, str]], None]] = None
+    ) -> Tuple[list, bool]:
         """
         翻译所有文本片段
 
         Args:
             segments: 文本片段列表，每个片段应包含 'text' 字段
+            segment_callback: 每翻译完一个片段调用一次，参数为 (片段索引, 翻译结果)
 
         Returns:
-            翻译后的片段列表
+            (翻译后的片段列表, 是否降级)；有片段因模型不可用或翻译出错而保留原文时为降级，
+            这样的结果不应缓存
         """
+        degraded = False
         if not segments:
-            return segments
+            return segments, degraded
 
-        for segment in segments:
+        for idx, segment in enumerate(segments):
             text = segment.get("text", "")
 
             # 检测语言
             source_lang = self._detect_language(text)
 
             # 翻译该片段
-            segment["translation"] = self.translate_segment(text, source_lang)
+            segment["translation"], segment_degraded = self._translate_segment(text, source_lang)
+            degraded = degraded or segment_degraded
+
+            if segment_callback:
+                segment_callback(idx, segment["translation"])
+
+        return segments, degraded
+
+    async def translate_segment_async(self, text: str, source_lang: str = "en") -> Dict[str, str]:
+        """在推理线程池中执行 translate_segment，不阻塞事件循环"""
+        return await inference_executor.run(self.translate_segment, text, source_lang)
 
-        return segments
+    async def translate_all_async(
+        self,
+        segments: list,
+        segment_callback: Optional[Callable[[int, Dict[str, str]], None]] = None
+    ) -> Tuple[list, bool]:
+        """在推理线程池中执行 translate_all，不阻塞事件循环"""
+        return await inference_executor.run(self.translate_all, segments, segment_callback)
 
 
 translation_service = TranslationService()
@@ -0,0 +1,287 @@
+"""
+可续传分块上传
+
+大文件（几 GB 的录音）在不稳定的网络下很难一次传完。客户端先创建上传会话，
+再按任意顺序、可并发地把各分块 PUT 到对应偏移量，断线后查询已接收的范围只补传缺失部分，
+全部收齐后完成上传，文件转入普通的识别流程。
+
+会话记录在 job_store 中（服务重启后仍可续传），数据直接写入预先分配大小的 .part 文件；
+超过 UPLOAD_SESSION_TTL 没有收到数据的会话由后台定期清理。
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+from ..core.config import UPLOAD_SESSION_DIR, UPLOAD_SESSION_TTL
+from ..utils.helpers import ensure_directory, file_sha256, write_at
+from .job_store import job_store
+
+logger = logging.getLogger(__name__)
+
+# 缓冲达到该大小后写入磁盘
+WRITE_FLUSH_SIZE = 1024 * 1024
+
+# 清理过期会话的间隔（秒）
+GC_INTERVAL = 300
+
+
+def merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """合并重叠和相邻的 [start, end) 范围"""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class UploadSessionManager:
+    """管理上传会话的创建、分块写入、完成和过期清理"""
+
+    def __init__(self, data_dir: str = UPLOAD_SESSION_DIR, ttl: int = UPLOAD_SESSION_TTL):
+        self.data_dir = data_dir
+        self.ttl = ttl
+        ensure_directory(data_dir)
+        # 更新已接收范围时需要读-改-写，串行执行
+        self._lock = asyncio.Lock()
+        # 每个会话正在写入的请求数；有写入时不能完成或清理
+        self._writers: Dict[str, int] = {}
+        # 正在完成的会话，不再接受写入
+        self._completing: Set[str] = set()
+        self._gc_task: Optional[asyncio.Task] = None
+
+    def _data_path(self, upload_id: str) -> str:
+        return os.path.join(self.data_dir, f"{upload_id}.part")
+
+    @staticmethod
+    def describe(session: Dict[str, Any]) -> Dict[str, Any]:
+        """会话的对外描述"""
+        received_bytes = sum(end - start for start, end in session["received"])
+        expires_at = datetime.fromtimestamp(session["expires_at"], tz=timezone.utc)
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "size": session["size"],
+            "received": session["received"],
+            "received_bytes": received_bytes,
+            "complete": received_bytes == session["size"],
+            "expires_at": expires_at.isoformat()
+        }
+
+    async def create(
+        self,
+        filename: str,
+        size: int,
+        priority: Optional[str] = None,
+        client_id: Optional[str] = None,
+        sha256: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """创建会话并预先分配数据文件"""
+        upload_id = str(uuid.uuid4())
+        path = self._data_path(upload_id)
+
+        def allocate():
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        await asyncio.to_thread(allocate)
+        job_store.create_upload_session(
+            upload_id, filename, size, priority, client_id,
+            sha256.lower() if sha256 else None, time.time() + self.ttl
+        )
+        logger.info(f"创建上传会话: {upload_id} ({filename}, {size} 字节)")
+        return job_store.get_upload_session(upload_id)
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """获取会话，已过期的视为不存在"""
+        session = job_store.get_upload_session(upload_id)
+        if session is None or session["expires_at"] < time.time():
+            return None
+        return session
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        把请求体写入 offset 开始的位置，返回更新后的会话；会话不存在时返回 None
+
+        客户端中途断开时，已写入的部分同样记录为已接收，续传时只需补齐剩余部分
+
+        Raises:
+            ValueError: 偏移量无效或数据超出文件大小
+        """
+        session = self.get(upload_id)
+        if session is None:
+            return None
+        size = session["size"]
+        if offset < 0 or offset > size:
+            raise ValueError(f"偏移量需在 0 到 {size} 之间")
+        if upload_id in self._completing:
+            raise ValueError("上传正在完成，不再接受数据")
+
+        position = offset
+        buffer: List[bytes] = []
+        buffered = 0
+        self._writers[upload_id] = self._writers.get(upload_id, 0) + 1
+        try:
+            fd = await asyncio.to_thread(os.open, self._data_path(upload_id), os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        except BaseException:
+            self._release_writer(upload_id)
+            raise
+        try:
+            async for chunk in chunks:
+                if position + buffered + len(chunk) > size:
+                    raise ValueError(f"数据超出文件大小（{size} 字节）")
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= WRITE_FLUSH_SIZE:
+                    data, buffer, buffered = b"".join(buffer), [], 0
+                    await asyncio.to_thread(write_at, fd, data, position)
+                    position += len(data)
+            if buffer:
+                data = b"".join(buffer)
+                await asyncio.to_thread(write_at, fd, data, position)
+                position += len(data)
+        finally:
+            os.close(fd)
+            self._release_writer(upload_id)
+            if position > offset:
+                session = await self._mark_received(upload_id, offset, position)
+        return session
+
+    def _release_writer(self, upload_id: str):
+        self._writers[upload_id] -= 1
+        if not self._writers[upload_id]:
+            del self._writers[upload_id]
+
+    async def _mark_received(self, upload_id: str, start: int, end: int) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            session = job_store.get_upload_session(upload_id)
+            if session is None:
+                return None
+            session["received"] = merge_ranges(session["received"] + [[start, end]])
+            session["expires_at"] = time.time() + self.ttl
+            job_store.update_upload_session(upload_id, session["received"], session["expires_at"])
+            return session
+
+    async def complete(self, upload_id: str, dest_path: str) -> Optional[str]:
+        """
+        校验数据已收齐，把文件移动到 dest_path，返回文件的 SHA256；会话不存在时返回 None
+
+        会话记录仍然保留（不再接受写入），文件成功入队后调用 finish 删除，
+        入队失败（如队列已满）时调用 restore 把文件移回，客户端之后可以重试而不必重新上传
+
+        Raises:
+            ValueError: 数据未收齐、仍有分块正在写入，或与创建时提供的 SHA256 不一致
+                （校验失败时会话被删除，需要重新上传）
+        """
+        async with self._lock:
+            session = self.get(upload_id)
+            if session is None:
+                return None
+            described = self.describe(session)
+            if not described["complete"]:
+                raise ValueError(f"上传未完成：已接收 {described['received_bytes']}/{session['size']} 字节")
+            if self._writers.get(upload_id):
+                raise ValueError("仍有分块正在上传，请稍后再试")
+            self._completing.add(upload_id)
+
+        try:
+            path = self._data_path(upload_id)
+            if not os.path.exists(path):
+                # 上次完成时文件已移走但会话未删除（如服务中途退出），会话已无法使用
+                job_store.delete_upload_session(upload_id)
+                return None
+            digest = await asyncio.to_thread(file_sha256, path)
+            if session["sha256"] and digest != session["sha256"]:
+                await self._remove(upload_id)
+                raise ValueError("文件校验失败（SHA256 不一致），请重新上传")
+            await asyncio.to_thread(shutil.move, path, dest_path)
+        except BaseException:
+            self._completing.discard(upload_id)
+            raise
+        return digest
+
+    def finish(self, upload_id: str):
+        """文件已交给识别流程，删除会话"""
+        job_store.delete_upload_session(upload_id)
+        self._completing.discard(upload_id)
+        logger.info(f"上传会话完成: {upload_id}")
+
+    async def restore(self, upload_id: str, dest_path: str):
+        """把 complete 移走的文件移回会话，延长有效期，之后可以再次完成"""
+        try:
+            if os.path.exists(dest_path):
+                await asyncio.to_thread(shutil.move, dest_path, self._data_path(upload_id))
+                session = job_store.get_upload_session(upload_id)
+                if session is not None:
+                    job_store.update_upload_session(upload_id, session["received"], time.time() + self.ttl)
+            else:
+                job_store.delete_upload_session(upload_id)
+        finally:
+            self._completing.discard(upload_id)
+
+    async def abort(self, upload_id: str) -> bool:
+        """
+        取消会话并删除已接收的数据
+
+        Raises:
+            ValueError: 会话正在完成
+        """
+        if job_store.get_upload_session(upload_id) is None:
+            return False
+        if upload_id in self._completing:
+            raise ValueError("上传正在完成，无法取消")
+        await self._remove(upload_id)
+        logger.info(f"上传会话已取消: {upload_id}")
+        return True
+
+    async def _remove(self, upload_id: str):
+        job_store.delete_upload_session(upload_id)
+        path = self._data_path(upload_id)
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+
+    async def collect_expired(self) -> int:
+        """删除过期会话，返回删除的数量"""
+        removed = 0
+        for upload_id in job_store.list_expired_upload_sessions(time.time()):
+            if self._writers.get(upload_id) or upload_id in self._completing:
+                continue
+            await self._remove(upload_id)
+            removed += 1
+        if removed:
+            logger.info(f"已清理 {removed} 个过期上传会话")
+        return removed
+
+    async def _gc_loop(self):
+        while True:
+            try:
+                await self.collect_expired()
+            except Exception as e:
+                logger.warning(f"清理过期上传会话失败: {e}")
+            await asyncio.sleep(GC_INTERVAL)
+
+    async def start(self):
+        """启动过期会话的定期清理"""
+        if self._gc_task is None:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def stop(self):
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            await asyncio.gather(self._gc_task, return_exceptions=True)
+            self._gc_task = None
+
+
+# 全局上传会话管理器实例
+upload_session_manager = UploadSessionManager()
@@ -1,12 +1,30 @@
 from faster_whisper import WhisperModel
 import logging
-from typing import List, Dict, Any, Optional, Callable
-from ..core.config import WHISPER_MODEL_NAME, WHISPER_DEVICE, COMPUTE_TYPE
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+from ..core.config import (
+    WHISPER_MODEL_NAME, WHISPER_DEVICE, COMPUTE_TYPE,
+    TRANSCRIBE_WORKERS, LONG_AUDIO_THRESHOLD, LONG_AUDIO_CHUNK_SECONDS
+)
+from .inference_executor import inference_executor
+from .chunked_transcriber import chunked_transcriber, segment_to_dict
 
 logger = logging.getLogger(__name__)
 
 
 class WhisperService:
+    # 传给 model.transcribe 的解码参数，同时参与阶段缓存 key 的计算
+    TRANSCRIBE_OPTIONS = {
+        "word_timestamps": True,
+        "beam_size": 5,
+        "vad_filter": True,
+        # 优化参数
+        "condition_on_previous_text": True,
+        "suppress_tokens": [],  # 不抑制任何token，保留标点和大小写
+        "prepend_punctuations": "\"'([{<",
+        "append_punctuations": "\"').。,!?;:]}>",
+    }
+
     def __init__(self):
         logger.info(f"正在加载 Whisper 模型: {WHISPER_MODEL_NAME}")
         self.model = WhisperModel(
@@ -16,6 +34,22 @@ class WhisperService:
             local_files_only=True
         )
         logger.info("Whisper 模型加载完成")
+
+    def cache_params(self, duration: float, language: str = None) -> Dict[str, Any]:
+        """影响识别结果的参数，用于阶段缓存 key；duration 为音频时长（秒），决定是否分块识别"""
+        params = {
+            "model": WHISPER_MODEL_NAME,
+            "compute_type": COMPUTE_TYPE,
+            "language": language,
+            "options": self.TRANSCRIBE_OPTIONS,
+        }
+        # 分块识别会在分块边界处产生细微差异，需区分缓存；不分块的音频与串行识别共用缓存
+        if self._should_chunk(duration):
+            params["chunking"] = {
+                "threshold": LONG_AUDIO_THRESHOLD,
+                "chunk_seconds": LONG_AUDIO_CHUNK_SECONDS,
+            }
+        return params
     
     def _post_process_text(self, text: str) -> str:
         """
@@ -63,69 +97,67 @@ class WhisperService:
         
         return ' '.join(processed_sentences)
     
-    def transcribe(self, audio_path: str, language: str = None, progress_callback: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+    def _get_duration(self, audio_path: str) -> float:
+        """读取 WAV 文件头获取时长（秒）"""
+        import soundfile
+        return soundfile.info(audio_path).duration
+
+    def _should_chunk(self, duration: float) -> bool:
+        """是否启用长音频分块并行识别"""
+        return TRANSCRIBE_WORKERS > 1 and duration >= LONG_AUDIO_THRESHOLD
+
+    def transcribe(
+        self,
+        audio_path: str,
+        language: str = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        waveform: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
         """
         执行语音识别
         返回格式化后的结果
+
+        超过 LONG_AUDIO_THRESHOLD 的长音频在 TRANSCRIBE_WORKERS > 1 时分块并行识别，
+        否则整段串行识别
         
         Args:
             audio_path: 音频文件路径
             language: 语言代码（可选）
             progress_callback: 进度回调函数，接受进度百分比（0-100）
+            segment_callback: 片段回调函数，按时间顺序接收每个识别完成的片段
+            waveform: 已解码的 16kHz float32 波形（可选），提供时直接识别，不再读取 audio_path；
+                分块识别的 worker 进程仍按 audio_path 读取各自的分块
         """
         try:
-            # 使用优化的参数改善识别结果
-            segments, info = self.model.transcribe(
-                audio_path,
-                language=language,
-                word_timestamps=True,
-                beam_size=5,
-                vad_filter=True,
-                # 优化参数
-                condition_on_previous_text=True,
-                suppress_tokens=[],  # 不抑制任何token，保留标点和大小写
-                prepend_punctuations="\"'([{<",
-                append_punctuations="\"').。,!?;:]}>"
-            )
-            
+            if TRANSCRIBE_WORKERS <= 1:
+                duration = 0.0
+            elif waveform is not None:
+                duration = len(waveform) / 16000.0
+            else:
+                duration = self._get_duration(audio_path)
+
+            if self._should_chunk(duration):
+                segment_list, detected_language = chunked_transcriber.transcribe(
+                    audio_path,
+                    duration,
+                    self.TRANSCRIBE_OPTIONS,
+                    language=language,
+                    progress_callback=progress_callback,
+                    segment_callback=segment_callback
+                )
+            else:
+                segment_list, detected_language = self._transcribe_serial(
+                    waveform if waveform is not None else audio_path,
+                    language, progress_callback, segment_callback
+                )
+
             result = {
-                "text": "",
-                "segments": [],
-                "language": info.language
+                "text": " ".join(seg["text"] for seg in segment_list),
+                "segments": segment_list,
+                "language": detected_language
             }
             
-            full_text = []
-            segment_count = 0
-            total_duration = info.duration
-            
-            for segment in segments:
-                segment_count += 1
-                segment_data = {
-                    "text": segment.text.strip(),
-                    "start": segment.start,
-                    "end": segment.end,
-                    "words": []
-                }
-                
-                if segment.words:
-                    for word in segment.words:
-                        segment_data["words"].append({
-                            "word": word.word,
-                            "start": word.start,
-                            "end": word.end,
-                            "probability": word.probability
-                        })
-                
-                result["segments"].append(segment_data)
-                full_text.append(segment.text.strip())
-                
-                # 调用进度回调，基于当前识别进度
-                if progress_callback and total_duration > 0:
-                    progress = 50.0 + (segment.end / total_duration) * 15.0  # 50% -> 65%
-                    progress_callback(min(progress, 65.0))
-            
-            result["text"] = " ".join(full_text)
-            
             # 对文本进行后处理：句首大写和标点符号规范化
             result["text"] = self._post_process_text(result["text"])
             
@@ -135,3 +167,54 @@ class WhisperService:
         except Exception as e:
             logger.error(f"语音识别失败: {e}")
             raise
+
+    def _transcribe_serial(
+        self,
+        audio: Union[str, np.ndarray],
+        language: str = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """整段音频串行识别（audio 为文件路径或 16kHz float32 波形），返回 (片段列表, 语言)"""
+        # 使用优化的参数改善识别结果
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            **self.TRANSCRIBE_OPTIONS
+        )
+
+        segment_list = []
+        total_duration = info.duration
+
+        for segment in segments:
+            segment_data = segment_to_dict(segment)
+            segment_list.append(segment_data)
+
+            if segment_callback:
+                segment_callback(segment_data)
+
+            # 调用进度回调，基于当前识别进度
+            if progress_callback and total_duration > 0:
+                progress = (segment.end / total_duration) * 100.0
+                progress_callback(min(progress, 100.0))
+
+        return segment_list, info.language
+
+    async def transcribe_async(
+        self,
+        audio_path: str,
+        language: str = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        segment_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        waveform: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """
+        在推理线程池中执行 transcribe，不阻塞事件循环
+
+        progress_callback / segment_callback 在推理线程中被调用，需自行切换回事件循环
+        """
+        return await inference_executor.run(
+            self.transcribe, audio_path, language=language,
+            progress_callback=progress_callback, segment_callback=segment_callback,
+            waveform=waveform
+        )
@@ -1,111 +1,257 @@
 from pydub import AudioSegment
+from pydub.utils import get_prober_name
+import asyncio
+import hashlib
+import json
 import os
-from typing import Tuple
+import subprocess
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import soundfile
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def convert_to_wav(input_path: str, output_path: str) -> Tuple[str, float]:
+# 识别流程使用的采样率
+TARGET_SAMPLE_RATE = 16000
+
+# 流式解码每次从 ffmpeg 读取的样本数（约 16 秒音频，1MB），解码时的内存占用与文件长度无关
+DECODE_BLOCK_SAMPLES = TARGET_SAMPLE_RATE * 16
+
+
+class _DecodeSink:
     """
-    将音频文件转换为 16kHz 单声道 WAV 格式
-    返回: (输出路径, 持续时间(秒))
+    接收解码后的 float32 数据块：写入 16 位 PCM WAV、追加到 float32 暂存文件，并增量计算哈希
+
+    暂存文件是匿名临时文件（POSIX 上创建后即删除），解码结束后以 memmap 映射为波形数组，
+    由操作系统按需换入换出，映射释放后空间自动回收
     """
-    try:
-        audio = AudioSegment.from_file(input_path)
-        
-        # 转换为单声道
-        audio = audio.set_channels(1)
-        
-        # 重采样到 16kHz
-        audio = audio.set_frame_rate(16000)
-
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # 导出为 WAV
-        audio.export(output_path, format="wav")
-        
-        duration = len(audio) / 1000.0  # 毫秒转秒
-        
-        logger.info(f"音频转换完成: {input_path} -> {output_path}, 时长: {duration:.2f}秒")
-        return output_path, duration
-        
-    except Exception as e:
-        logger.error(f"音频转换失败: {e}")
-        raise
 
+    def __init__(self, output_path: str):
+        directory = os.path.dirname(output_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        self.tmp_path = output_path + ".tmp"
+        self.wav = soundfile.SoundFile(
+            self.tmp_path, 'w', samplerate=TARGET_SAMPLE_RATE, channels=1,
+            subtype='PCM_16', format='WAV'
+        )
+        self.scratch = tempfile.TemporaryFile(dir=directory, suffix=".f32")
+        self.hasher = hashlib.sha256()
+        self.samples = 0
 
-def get_audio_duration(file_path: str) -> float:
-    """获取音频文件时长（秒）"""
-    audio = AudioSegment.from_file(file_path)
-    return len(audio) / 1000.0
+    def write(self, block: bytes):
+        samples = np.frombuffer(block, dtype=np.float32)
+        self.wav.write(samples)
+        self.scratch.write(block)
+        self.hasher.update(block)
+        self.samples += len(samples)
 
+    def finish(self, output_path: str) -> np.ndarray:
+        """关闭 WAV 并替换到 output_path，返回映射暂存文件的波形数组"""
+        self.wav.close()
+        os.replace(self.tmp_path, output_path)
+        self.scratch.flush()
+        waveform = np.memmap(self.scratch, dtype=np.float32, mode='r+', shape=(self.samples,))
+        # 映射建立后即可关闭文件，映射本身保持有效
+        self.scratch.close()
+        return waveform
 
-def is_valid_audio_file(file_path: str) -> bool:
-    """检查是否为有效的音频文件"""
-    valid_extensions = ['.wav', '.mp3', '.m4a', '.flac', '.ogg', '.aac']
-    ext = os.path.splitext(file_path)[1].lower()
-    return ext in valid_extensions
+    def abort(self):
+        self.wav.close()
+        self.scratch.close()
+        _remove_quietly(self.tmp_path)
 
 
-def trim_audio(
+async def decode_audio(
     input_path: str,
     output_path: str,
-    start_time: float = None,
-    end_time: float = None
-) -> Tuple[str, float]:
+    start_time: Optional[float] = None
+) -> Tuple[np.ndarray, float, str]:
     """
-    剪切音频文件
+    单次流式解码：剪掉开头 start_time 秒、下混为单声道、重采样到 16kHz
 
-    Args:
-        input_path: 输入音频文件路径
-        output_path: 输出音频文件路径
-        start_time: 开始时间（秒），None 表示从头开始
-        end_time: 结束时间（秒），None 表示到文件末尾
+    由 ffmpeg 子进程完成解码、下混和重采样（均为流式处理），输出按固定大小的块读取，
+    逐块写出 16 位 PCM WAV（用于播放和任务恢复）、float32 暂存文件并更新哈希，
+    因此峰值内存只与块大小有关，与音频时长无关。
+    返回的波形是暂存文件的 memmap，供识别和说话人分离直接使用；WAV 先写临时文件再替换，失败时不留下中间文件
 
     Returns:
-        (输出路径, 持续时间(秒))
+        (float32 单声道波形, 持续时间(秒), float32 波形数据的 SHA256)
 
     Raises:
-        ValueError: 当时间参数无效时
+        ValueError: 开始时间无效或剪切后音频为空
+        RuntimeError: ffmpeg 解码失败
     """
+    if start_time is not None and start_time < 0:
+        raise ValueError(f"开始时间不能为负数: {start_time}")
+
+    cmd = [AudioSegment.converter, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if start_time:
+        # 放在 -i 之前：边解码边丢弃，不会输出开头部分
+        cmd += ["-ss", f"{start_time:.3f}"]
+    cmd += [
+        "-i", input_path,
+        "-vn", "-map_metadata", "-1",
+        "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE),
+        "-f", "f32le", "pipe:1"
+    ]
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    # 同时读取 stderr，避免管道写满后 ffmpeg 阻塞
+    stderr_task = asyncio.ensure_future(process.stderr.read())
+    sink = await asyncio.to_thread(_DecodeSink, output_path)
+    block_bytes = DECODE_BLOCK_SAMPLES * 4
     try:
-        audio = AudioSegment.from_file(input_path)
+        while True:
+            try:
+                block = await process.stdout.readexactly(block_bytes)
+            except asyncio.IncompleteReadError as e:
+                # 最后一块：丢弃不足一个样本的尾部字节
+                block = e.partial[:len(e.partial) - len(e.partial) % 4]
+                if block:
+                    await asyncio.to_thread(sink.write, block)
+                break
+            await asyncio.to_thread(sink.write, block)
+
+        await process.wait()
+        stderr = await stderr_task
+        if process.returncode != 0:
+            message = stderr.decode('utf-8', errors='replace').strip()
+            logger.error(f"音频解码失败: {input_path}: {message}")
+            raise RuntimeError(f"音频解码失败: {message}")
+        if sink.samples == 0:
+            raise ValueError(f"剪切开头 {start_time or 0} 秒后音频为空")
+
+        waveform = await asyncio.to_thread(sink.finish, output_path)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr_task.cancel()
+        await asyncio.to_thread(sink.abort)
+        raise
+
+    duration = sink.samples / float(TARGET_SAMPLE_RATE)
+    logger.info(f"音频解码完成: {input_path} -> {output_path}, 时长: {duration:.2f}秒")
+    return waveform, duration, sink.hasher.hexdigest()
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class AudioProbeError(ValueError):
+    """文件无法识别为音频（损坏、没有音频流或格式不支持）"""
 
-        # 验证时间参数
-        duration = len(audio) / 1000.0
 
-        if start_time is not None and start_time < 0:
-            raise ValueError(f"开始时间不能为负数: {start_time}")
+class AudioInfo:
+    """探测得到的音频流信息"""
 
-        if end_time is not None and end_time > duration:
-            logger.warning(f"结束时间 {end_time} 超过音频时长 {duration}，将使用音频末尾")
-            end_time = duration
+    def __init__(
+        self,
+        codec: Optional[str],
+        channels: Optional[int],
+        sample_rate: Optional[int],
+        duration: Optional[float],
+        format_name: Optional[str] = None
+    ):
+        self.codec = codec
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.duration = duration  # 秒，容器和音频流都没有记录时为 None
+        self.format_name = format_name
 
-        if start_time is not None and end_time is not None and start_time >= end_time:
-            raise ValueError(f"开始时间 {start_time} 必须小于结束时间 {end_time}")
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "codec": self.codec,
+            "channels": self.channels,
+            "sample_rate": self.sample_rate,
+            "duration": self.duration,
+            "format_name": self.format_name
+        }
 
-        # 转换为毫秒
-        start_ms = int(start_time * 1000) if start_time is not None else 0
-        end_ms = int(end_time * 1000) if end_time is not None else len(audio)
 
-        # 剪切音频
-        trimmed_audio = audio[start_ms:end_ms]
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    return result if result > 0 else None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 
-        # 确保输出目录存在
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+def _hide_path(message: str, file_path: str) -> str:
+    """错误信息会返回给客户端，把其中的服务器路径替换为文件名"""
+    return message.replace(file_path, os.path.basename(file_path))
 
-        # 导出剪切后的音频
-        trimmed_audio.export(output_path, format="wav")
 
-        new_duration = len(trimmed_audio) / 1000.0
+def probe_audio(file_path: str, timeout: float = 30.0) -> AudioInfo:
+    """
+    只读取容器和音频流头信息，获取编码、声道数、采样率和时长，不解码音频数据
+
+    使用 ffprobe；未安装 ffprobe 时退回到 soundfile（只支持 WAV / FLAC / OGG 等 libsndfile 格式）
+
+    Raises:
+        AudioProbeError: 文件损坏、没有音频流或无法识别（错误信息中不包含服务器路径）
+    """
+    cmd = [
+        get_prober_name(), "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,channels,sample_rate,duration:format=format_name,duration",
+        "-of", "json", file_path
+    ]
+    try:
+        completed = subprocess.run(cmd, capture_output=True, timeout=timeout)
+    except FileNotFoundError:
+        return _probe_with_soundfile(file_path)
+    except subprocess.TimeoutExpired:
+        raise AudioProbeError("读取音频信息超时")
 
-        logger.info(f"音频剪切完成: {input_path} -> {output_path}, 原始时长: {duration:.2f}秒, 剪切后: {new_duration:.2f}秒")
-        return output_path, new_duration
+    if completed.returncode != 0:
+        message = completed.stderr.decode('utf-8', errors='replace').strip()
+        raise AudioProbeError(f"无法识别的音频文件: {_hide_path(message, file_path) or '未知错误'}")
 
+    try:
+        data = json.loads(completed.stdout or b"{}")
     except ValueError:
-        raise
+        raise AudioProbeError("无法识别的音频文件")
+    streams = data.get("streams") or []
+    if not streams:
+        raise AudioProbeError("文件中没有音频流")
+
+    stream, fmt = streams[0], data.get("format") or {}
+    return AudioInfo(
+        codec=stream.get("codec_name"),
+        channels=_to_int(stream.get("channels")),
+        sample_rate=_to_int(stream.get("sample_rate")),
+        # 部分容器只在流或只在格式中记录时长
+        duration=_to_float(stream.get("duration")) or _to_float(fmt.get("duration")),
+        format_name=fmt.get("format_name")
+    )
+
+
+def _probe_with_soundfile(file_path: str) -> AudioInfo:
+    try:
+        info = soundfile.info(file_path)
     except Exception as e:
-        logger.error(f"音频剪切失败: {e}")
-        raise
+        raise AudioProbeError(f"无法识别的音频文件: {_hide_path(str(e), file_path)}")
+    return AudioInfo(
+        codec=info.subtype.lower(),
+        channels=info.channels,
+        sample_rate=info.samplerate,
+        duration=_to_float(info.duration),
+        format_name=info.format.lower()
+    )
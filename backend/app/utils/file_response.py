@@ -0,0 +1,231 @@
+"""
+支持范围请求和缓存校验的文件响应
+
+用于 /api/audio：播放器每次拖动进度都会发起 Range 请求，这里按 RFC 9110 处理
+单范围 / 多范围（multipart/byteranges）、416、ETag / Last-Modified 条件请求和 If-Range，
+文件内容按块读取发送（服务器支持 ASGI zerocopysend 扩展时交给 sendfile），不会把整个范围读入内存。
+"""
+import email.utils
+import os
+import secrets
+from typing import BinaryIO, List, Mapping, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# 不支持零拷贝时每次读取并发送的字节数
+CHUNK_SIZE = 256 * 1024
+
+# 合并后的范围数超过此值时忽略 Range，返回整个文件
+MAX_RANGES = 16
+
+# 结果音频保存后不再改变，可以长期缓存；过期后凭 ETag 重新校验
+MEDIA_CACHE_CONTROL = "public, max-age=86400"
+
+
+def parse_ranges(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    解析 Range 请求头，返回按起点排序、合并了重叠和相邻部分的 [(start, end)]（end 包含在内）
+
+    单位不是 bytes 或语法无效时返回 None（应忽略 Range）；
+    语法有效但没有可满足的范围时返回空列表（应返回 416）
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # 后缀范围：最后 N 个字节
+            if not last:
+                return None
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(0, size - length), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            end = int(last) if last else size - 1
+            ranges.append((start, min(end, size - 1)))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_listed(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较"""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _parse_http_date(value: str) -> Optional[int]:
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return int(parsed.timestamp()) if parsed is not None else None
+
+
+def _read_at(f: BinaryIO, offset: int, size: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(f.fileno(), size, offset)
+    f.seek(offset)
+    return f.read(size)
+
+
+class RangeFileResponse(Response):
+    """
+    文件响应：处理条件请求和 Range 请求
+
+    - If-None-Match / If-Modified-Since 命中时返回 304
+    - Range 有效时返回 206（单个范围直接返回，多个范围使用 multipart/byteranges），
+      没有可满足的范围时返回 416，语法无效时忽略 Range 返回整个文件
+    - If-Range 与当前 ETag（强比较）或 Last-Modified 不一致时忽略 Range
+    """
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Mapping[str, str],
+        method: str = "GET",
+        media_type: str = "application/octet-stream",
+        filename: Optional[str] = None,
+        cache_control: str = MEDIA_CACHE_CONTROL
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.send_body = method.upper() != "HEAD"
+        # 要发送的内容：[(分段头, 起点, 终点)]，以及最后的分隔符
+        self.parts: List[Tuple[bytes, int, int]] = []
+        self.trailer = b""
+
+        st = os.stat(path)
+        size = st.st_size
+        etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+        mtime = int(st.st_mtime)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": email.utils.formatdate(mtime, usegmt=True),
+            "cache-control": cache_control,
+        }
+        if filename:
+            headers["content-disposition"] = f'attachment; filename="{filename}"'
+
+        if self._not_modified(request_headers, etag, mtime):
+            self.status_code = 304
+            self.init_headers(headers)
+            return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers.get("if-range"), etag, mtime):
+            ranges = parse_ranges(range_header, size)
+            if ranges is not None and len(ranges) > MAX_RANGES:
+                ranges = None
+
+        if ranges is None:
+            self.status_code = 200
+            if size > 0:
+                self.parts.append((b"", 0, size - 1))
+            headers["content-length"] = str(size)
+        elif not ranges:
+            self.status_code = 416
+            headers["content-range"] = f"bytes */{size}"
+            headers["content-length"] = "0"
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.parts.append((b"", start, end))
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+        else:
+            boundary = secrets.token_hex(16)
+            self.status_code = 206
+            length = 0
+            for idx, (start, end) in enumerate(ranges):
+                # 每个分段的数据之后、下一个分隔符之前有一个 CRLF
+                separator = "\r\n" if idx else ""
+                prefix = (
+                    f"{separator}--{boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1")
+                self.parts.append((prefix, start, end))
+                length += len(prefix) + end - start + 1
+            self.trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            length += len(self.trailer)
+            headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            headers["content-length"] = str(length)
+
+        self.init_headers(headers)
+
+    @staticmethod
+    def _not_modified(request_headers: Mapping[str, str], etag: str, mtime: int) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_listed(if_none_match, etag)
+        since = request_headers.get("if-modified-since")
+        if since is not None:
+            timestamp = _parse_http_date(since)
+            return timestamp is not None and mtime <= timestamp
+        return False
+
+    @staticmethod
+    def _if_range_matches(if_range: Optional[str], etag: str, mtime: int) -> bool:
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range 要求强比较，弱 ETag 永远不匹配
+            return if_range == etag
+        return _parse_http_date(if_range) == mtime
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or not self.parts:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {})
+        with open(self.path, "rb") as f:
+            for prefix, start, end in self.parts:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                if zerocopy:
+                    await send({
+                        "type": "http.response.zerocopysend",
+                        "file": f,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": True
+                    })
+                    continue
+                offset = start
+                while offset <= end:
+                    chunk = await anyio.to_thread.run_sync(
+                        _read_at, f, offset, min(CHUNK_SIZE, end - offset + 1)
+                    )
+                    if not chunk:
+                        raise RuntimeError(f"文件在发送过程中被截断: {self.path}")
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    offset += len(chunk)
+        await send({"type": "http.response.body", "body": self.trailer, "more_body": False})
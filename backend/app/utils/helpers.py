@@ -1,10 +1,14 @@
 import hashlib
 import os
+import threading
 from datetime import datetime
 from typing import Optional
 import uuid
 import aiofiles
 
+# 不支持 pwrite 的平台上 seek + write 不是原子操作，用进程内的锁串行执行
+_seek_write_lock = threading.Lock()
+
 
 async def calculate_audio_hash(file_path: str) -> str:
     """计算音频文件的 SHA256 哈希值"""
@@ -15,6 +19,36 @@ async def calculate_audio_hash(file_path: str) -> str:
     return sha256_hash.hexdigest()
 
 
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """同步计算文件的 SHA256（大块读取，适合在线程池中处理大文件）"""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(block_size):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+def write_at(fd: int, data: bytes, offset: int) -> None:
+    """
+    把 data 写入文件描述符的 offset 位置，可以在多个线程中并发写入同一个 fd 的不同位置
+
+    使用 pwrite，不依赖也不改变共享的文件位置；不支持 pwrite 的平台（Windows）退化为 seek + write，
+    由进程内的锁保证并发写入不会互相改变对方的写入位置。锁只在本进程内有效，
+    其他进程不能与之共享同一个 fd 并发写入
+    """
+    view = memoryview(data)
+    if hasattr(os, "pwrite"):
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    with _seek_write_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while view:
+            view = view[os.write(fd, view):]
+
+
 def generate_result_id() -> str:
     """生成唯一的结果 ID"""
     return str(uuid.uuid4())
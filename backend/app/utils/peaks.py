@@ -0,0 +1,146 @@
+"""
+波形峰值金字塔
+
+保存结果时对音频计算一次各缩放级别的 min/max 峰值，写入紧凑的二进制文件 {result_id}_peaks.bin，
+前端按需读取任意级别和时间范围绘制波形，不需要下载和分析整个 WAV。
+
+文件格式（小端）:
+    头部: 魔数 b"WPK1", 采样率 (uint32), 级别数 (uint32)
+    级别表: 每个级别 每个峰值覆盖的样本数 (uint32), 峰值数 (uint32), 数据偏移 (uint64)
+    数据: 每个级别依次存放 int16 的 (min, max) 对
+"""
+import os
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import soundfile
+
+PEAKS_MAGIC = b"WPK1"
+
+# 各级别每个峰值覆盖的样本数（16kHz 下最细 62.5 个/秒，最粗约 4 秒一个）
+PEAK_LEVELS = [256, 1024, 4096, 16384, 65536]
+
+# 一次读取的音频帧数（PEAK_LEVELS[0] 的整数倍）
+PEAK_READ_FRAMES = PEAK_LEVELS[0] * 1024
+
+_HEADER = struct.Struct("<4sII")
+_LEVEL = struct.Struct("<IIQ")
+
+
+def _reduce(pairs: np.ndarray, factor: int) -> np.ndarray:
+    """把相邻 factor 个 (min, max) 合并为一个，末尾不足的部分按最后一个值补齐"""
+    groups = -(-len(pairs) // factor)
+    if groups * factor != len(pairs):
+        pairs = np.pad(pairs, ((0, groups * factor - len(pairs)), (0, 0)), mode="edge")
+    grouped = pairs.reshape(groups, factor, 2)
+    return np.stack([grouped[:, :, 0].min(axis=1), grouped[:, :, 1].max(axis=1)], axis=1)
+
+
+def compute_peaks(audio_path: str, peaks_path: str):
+    """
+    按块读取音频计算峰值金字塔并写入 peaks_path（先写临时文件再替换）
+
+    多声道音频取所有声道的 min / max。只有最细级别的峰值（音频数据量的 1/128）常驻内存，
+    更粗的级别由它逐级合并得到
+    """
+    base = PEAK_LEVELS[0]
+    chunks = []
+    with soundfile.SoundFile(audio_path) as f:
+        sample_rate = f.samplerate
+        for block in f.blocks(blocksize=PEAK_READ_FRAMES, dtype="int16", always_2d=True):
+            frames = len(block)
+            groups = -(-frames // base)
+            if groups * base != frames:
+                block = np.pad(block, ((0, groups * base - frames), (0, 0)), mode="edge")
+            grouped = block.reshape(groups, -1)
+            chunks.append(np.stack([grouped.min(axis=1), grouped.max(axis=1)], axis=1))
+
+    levels = [np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=np.int16)]
+    for prev, spp in zip(PEAK_LEVELS, PEAK_LEVELS[1:]):
+        levels.append(_reduce(levels[-1], spp // prev))
+
+    offset = _HEADER.size + _LEVEL.size * len(levels)
+    table = []
+    for spp, pairs in zip(PEAK_LEVELS, levels):
+        table.append(_LEVEL.pack(spp, len(pairs), offset))
+        offset += pairs.size * 2
+
+    tmp_path = peaks_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(_HEADER.pack(PEAKS_MAGIC, sample_rate, len(levels)))
+            out.write(b"".join(table))
+            for pairs in levels:
+                out.write(pairs.astype("<i2").tobytes())
+        os.replace(tmp_path, peaks_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_peak_levels(peaks_path: str) -> Tuple[int, List[Tuple[int, int, int]]]:
+    """读取头部，返回 (采样率, [(每个峰值的样本数, 峰值数, 数据偏移)])"""
+    with open(peaks_path, "rb") as f:
+        magic, sample_rate, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != PEAKS_MAGIC:
+            raise ValueError("波形峰值文件格式错误")
+        table = f.read(_LEVEL.size * count)
+    return sample_rate, [_LEVEL.unpack_from(table, idx * _LEVEL.size) for idx in range(count)]
+
+
+def read_peaks(
+    peaks_path: str,
+    level: Optional[int] = None,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    width: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    读取某个级别在 [start, end) 秒内的峰值，只读取这一段数据
+
+    未指定 level 时按 width（要绘制的像素数）选择：峰值数不少于 width 的最粗级别；
+    两者都未指定时使用最细级别
+
+    Raises:
+        ValueError: 级别或时间范围无效
+    """
+    sample_rate, levels = read_peak_levels(peaks_path)
+    if not levels:
+        raise ValueError("波形峰值文件为空")
+    total_samples = levels[0][0] * levels[0][1]
+    total_duration = total_samples / sample_rate
+
+    if start < 0 or (end is not None and end <= start):
+        raise ValueError("时间范围无效")
+    end = total_duration if end is None else min(end, total_duration)
+    start = min(start, end)
+
+    if level is None:
+        level = 0
+        if width:
+            span = (end - start) * sample_rate
+            for idx, (spp, _, _) in enumerate(levels):
+                if span / spp >= width:
+                    level = idx
+    elif not 0 <= level < len(levels):
+        raise ValueError(f"级别需在 0 到 {len(levels) - 1} 之间")
+
+    spp, count, offset = levels[level]
+    first = min(int(start * sample_rate // spp), count)
+    last = min(-(-int(end * sample_rate) // spp), count)
+    with open(peaks_path, "rb") as f:
+        f.seek(offset + first * 4)
+        pairs = np.fromfile(f, dtype="<i2", count=(last - first) * 2)
+
+    return {
+        "level": level,
+        "levels": [item[0] for item in levels],
+        "samples_per_peak": spp,
+        "sample_rate": sample_rate,
+        "duration": total_duration,
+        "start": first * spp / sample_rate,
+        "end": min(last * spp / sample_rate, total_duration),
+        "peaks": pairs.tolist()
+    }
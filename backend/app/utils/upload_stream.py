@@ -0,0 +1,223 @@
+"""
+流式接收 multipart 上传
+
+直接用 python-multipart 解析 request.stream()，文件内容按块写入磁盘（在线程池中执行，不阻塞事件循环），
+写入的同时增量计算 SHA256，之后不需要再读一遍文件计算哈希。
+文件超过大小上限或扩展名不受支持时立即中止，不会继续接收剩余数据。
+每个上传只缓冲不超过 UPLOAD_FLUSH_SIZE 的数据，并发上传再多，内存占用也保持平稳。
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+# 缓冲达到该大小后写入磁盘
+UPLOAD_FLUSH_SIZE = 1024 * 1024
+
+# 普通表单字段（如 priority）的大小上限
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """上传不符合要求（格式、大小或请求格式），消息可直接返回给客户端"""
+
+
+class ReceivedFile:
+    """一个已接收的文件字段"""
+
+    def __init__(self, field_name: str, filename: str, path: Optional[str]):
+        self.field_name = field_name
+        self.filename = filename
+        self.path = path  # 出错时为 None，已写入的部分会被删除
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self.error: Optional[str] = None
+        self._file: Optional[BinaryIO] = None
+        self._hasher = hashlib.sha256()
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def _open(self):
+        self._file = open(self.path, "wb")
+
+    def _write_buffer(self, chunks: List[bytes]):
+        for chunk in chunks:
+            self._file.write(chunk)
+            self._hasher.update(chunk)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _discard(self):
+        self._close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def _content_disposition(headers: Dict[bytes, bytes]) -> Tuple[str, Optional[str]]:
+    """返回 (字段名, 文件名)，普通字段的文件名为 None"""
+    _, options = parse_options_header(headers.get(b"content-disposition", b""))
+    name = options.get(b"name", b"").decode("utf-8", errors="replace")
+    filename = options.get(b"filename")
+    return name, filename.decode("utf-8", errors="replace") if filename is not None else None
+
+
+async def receive_multipart(
+    request: Request,
+    dest_dir: str,
+    max_file_size: int,
+    allowed_extensions: Sequence[str],
+    fail_fast: bool = True,
+    max_body_size: Optional[int] = None
+) -> Tuple[List[ReceivedFile], Dict[str, str]]:
+    """
+    流式接收 multipart/form-data 请求，文件保存到 dest_dir（以随机 ID 加原扩展名命名）
+
+    Args:
+        fail_fast: 为 True 时任一文件不符合要求就抛出 UploadRejected 并中止接收；
+            为 False 时该文件记录 error 并丢弃其余数据，继续接收其他文件（批量上传）
+        max_body_size: Content-Length 超过该值时直接拒绝，不读取请求体
+
+    Returns:
+        (文件列表, 普通字段)
+
+    Raises:
+        UploadRejected: 请求格式错误，或 fail_fast 时文件不符合要求
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadRejected("请求必须是 multipart/form-data 格式")
+
+    content_length = request.headers.get("content-length")
+    if max_body_size is not None and content_length and content_length.isdigit() \
+            and int(content_length) > max_body_size:
+        raise UploadRejected(f"文件过大。最大支持 {max_file_size // (1024*1024)}MB")
+
+    # 解析器的回调是同步的：先记录事件，每喂入一块数据后再异步处理
+    events: List[Tuple[str, object]] = []
+    header_field = bytearray()
+    header_value = bytearray()
+    headers: Dict[bytes, bytes] = {}
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        events.append(("headers", dict(headers)))
+
+    def on_part_data(data: bytes, start: int, end: int):
+        events.append(("data", data[start:end]))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = multipart.MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    files: List[ReceivedFile] = []
+    fields: Dict[str, str] = {}
+    current: Optional[ReceivedFile] = None
+    field_name: Optional[str] = None
+    field_value = bytearray()
+
+    async def flush(received: ReceivedFile):
+        if received._buffer:
+            chunks, received._buffer, received._buffered = received._buffer, [], 0
+            await asyncio.to_thread(received._write_buffer, chunks)
+
+    async def reject(received: ReceivedFile, error: str):
+        received.error = error
+        received._buffer, received._buffered = [], 0
+        await asyncio.to_thread(received._discard)
+        if fail_fast:
+            raise UploadRejected(error)
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, payload in events:
+                if kind == "headers":
+                    name, filename = _content_disposition(payload)
+                    if filename is None:
+                        current, field_name = None, name
+                        field_value.clear()
+                        continue
+                    field_name = None
+                    ext = os.path.splitext(filename)[1].lower()
+                    current = ReceivedFile(name, filename, os.path.join(dest_dir, f"{uuid.uuid4()}{ext}"))
+                    files.append(current)
+                    if ext not in allowed_extensions:
+                        current.path = None
+                        await reject(current, f"不支持的文件格式。支持的格式: {', '.join(allowed_extensions)}")
+                    else:
+                        await asyncio.to_thread(current._open)
+                elif kind == "data":
+                    if current is not None:
+                        if current.error is not None:
+                            continue
+                        current.size += len(payload)
+                        if current.size > max_file_size:
+                            await reject(current, f"文件过大。最大支持 {max_file_size // (1024*1024)}MB")
+                            continue
+                        current._buffer.append(payload)
+                        current._buffered += len(payload)
+                        if current._buffered >= UPLOAD_FLUSH_SIZE:
+                            await flush(current)
+                    elif field_name is not None:
+                        field_value.extend(payload)
+                        if len(field_value) > MAX_FIELD_SIZE:
+                            raise UploadRejected(f"表单字段 {field_name} 过长")
+                elif kind == "end":
+                    if current is not None:
+                        if current.error is None:
+                            await flush(current)
+                            await asyncio.to_thread(current._close)
+                            current.sha256 = current._hasher.hexdigest()
+                        current = None
+                    elif field_name is not None:
+                        fields[field_name] = field_value.decode("utf-8", errors="replace")
+                        field_name = None
+            events.clear()
+        parser.finalize()
+
+        if current is not None:
+            # 请求体在文件中途结束
+            raise UploadRejected("上传数据不完整")
+    except BaseException:
+        for received in files:
+            await asyncio.to_thread(received._discard)
+        raise
+
+    return files, fields
@@ -0,0 +1,57 @@
+"""
+流式生成 ZIP
+
+边读取源文件边生成压缩包并按块输出，不在内存中构建整个 ZIP：
+输出流不可 seek，zipfile 会在每个条目的数据之后写入数据描述符（大小和 CRC），
+因此不需要预先知道压缩后的大小。内存占用只与块大小有关，与文件大小无关。
+"""
+import zipfile
+from typing import Iterator, List, Tuple
+
+# 每次从源文件读取的字节数
+ZIP_READ_SIZE = 256 * 1024
+
+
+class _ChunkSink:
+    """zipfile 的输出目标：收集写入的数据，由生成器取走；不提供 tell / seek，zipfile 按不可 seek 的流处理"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b"".join(chunks)
+
+
+def iter_zip(entries: List[Tuple[str, str, int]]) -> Iterator[bytes]:
+    """
+    按块生成 ZIP 内容
+
+    Args:
+        entries: [(压缩包内文件名, 源文件路径, 压缩方式)]，压缩方式为 zipfile.ZIP_STORED / ZIP_DEFLATED
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for arcname, path, compress_type in entries:
+            # 保留源文件的修改时间；大于 2GB 的文件自动使用 ZIP64
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = compress_type
+            with open(path, "rb") as src, archive.open(info, "w") as dst:
+                while True:
+                    chunk = src.read(ZIP_READ_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    # 中央目录
+    yield from sink.drain()
@@ -0,0 +1,51 @@
+"""
+比较两次基准测试的结果
+
+    python -m benchmarks.compare base.json new.json
+"""
+import argparse
+import json
+from typing import Optional
+
+
+def _change(base: Optional[float], new: Optional[float]) -> str:
+    if base is None or new is None:
+        return "-"
+    if base == 0:
+        return "n/a"
+    return f"{(new - base) / base * 100:+.1f}%"
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较两次基准测试结果")
+    parser.add_argument("base", help="基准结果 JSON")
+    parser.add_argument("new", help="新结果 JSON")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')}  new: {new['meta'].get('commit')}")
+    print(f"{'metric':<32}{'base':>12}{'new':>12}{'change':>10}")
+    for key in ("jobs_per_hour", "audio_hours_per_hour", "peak_rss_mb"):
+        b, n = base["summary"].get(key), new["summary"].get(key)
+        print(f"{key:<32}{_fmt(b):>12}{_fmt(n):>12}{_change(b, n):>10}")
+    b, n = base["summary"]["latency"]["p50"], new["summary"]["latency"]["p50"]
+    print(f"{'latency p50 (s)':<32}{_fmt(b):>12}{_fmt(n):>12}{_change(b, n):>10}")
+
+    for name in sorted(set(base["stages"]) | set(new["stages"])):
+        for key in ("wall_time", "cpu_time", "peak_rss_mb"):
+            b = base["stages"].get(name, {}).get(key, {}).get("mean")
+            n = new["stages"].get(name, {}).get(key, {}).get("mean")
+            label = f"{name}.{key} mean"
+            print(f"{label:<32}{_fmt(b):>12}{_fmt(n):>12}{_change(b, n):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+流式解码的内存检查
+
+用 ffmpeg 生成一段数小时的立体声 44.1kHz 合成音频（需经过下混和重采样），
+用 decode_audio 解码并采样进程 RSS：峰值内存增量应只与解码块大小有关，与音频时长无关。
+超过 --max-rss-mb 时以非零状态退出，可作为回归检查。
+
+在 backend 目录下运行:
+    python -m benchmarks.decode_memory --hours 3 --max-rss-mb 150
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="检查流式解码的峰值内存")
+    parser.add_argument("--hours", type=float, default=3.0, help="合成音频时长（小时）")
+    parser.add_argument("--format", default="mp3", help="输入音频格式（扩展名）")
+    parser.add_argument("--max-rss-mb", type=float, default=150.0, help="允许的峰值 RSS 增量（MB）")
+    parser.add_argument("--input", help="使用已有的音频文件，不生成合成音频")
+    return parser.parse_args()
+
+
+def generate_long_audio(path: str, seconds: float):
+    """由 ffmpeg 直接生成并编码，不在本进程中持有整段音频"""
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={seconds}",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.05:sample_rate=44100:duration={seconds}",
+            "-filter_complex", "[0:a][1:a]amerge=inputs=2[a]", "-map", "[a]",
+            "-ac", "2", path
+        ],
+        check=True
+    )
+
+
+def main():
+    args = parse_args()
+    from app.services.metrics import RssSampler, current_rss_bytes
+    from app.utils.audio_processor import decode_audio
+
+    if current_rss_bytes() is None:
+        print("当前平台无法读取 RSS（需要 /proc/self/statm）", file=sys.stderr)
+        sys.exit(2)
+
+    work_dir = tempfile.mkdtemp(prefix="asr-decode-")
+    try:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(work_dir, f"long.{args.format.lstrip('.')}")
+            generate_long_audio(input_path, args.hours * 3600)
+        input_mb = os.path.getsize(input_path) / (1024 * 1024)
+
+        baseline = current_rss_bytes()
+        sampler = RssSampler()
+        sampler.start()
+        started = time.perf_counter()
+        waveform, duration, _ = asyncio.run(
+            decode_audio(input_path, os.path.join(work_dir, "processed.wav"))
+        )
+        elapsed = time.perf_counter() - started
+        peak = sampler.stop()
+        del waveform
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    growth_mb = (peak - baseline) / (1024 * 1024)
+    # 整段 float32 波形常驻内存时的大小，作为对照
+    full_mb = duration * 16000 * 4 / (1024 * 1024)
+    print(f"输入: {input_mb:.1f} MB, 时长: {duration / 3600:.2f} 小时, 解码耗时: {elapsed:.1f} 秒")
+    print(f"峰值 RSS 增量: {growth_mb:.1f} MB（整段波形 {full_mb:.1f} MB，上限 {args.max_rss_mb:.0f} MB）")
+    if growth_mb > args.max_rss_mb:
+        print("峰值内存超过上限", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+确定性的伪造模型引擎
+
+替换 faster-whisper、pyannote 和 MarianMT 模型对象（而不是服务类），
+服务层的回调、缓存、检查点和说话人分配逻辑照常执行。
+推理开销用 sleep 模拟（与真实推理一样释放 GIL），按音频时长或文本长度计费，同样的输入总得到同样的输出。
+"""
+import hashlib
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile
+
+from .synthetic import SAMPLE_RATE, SPEAKER_FREQS
+
+# 语音检测：帧长（秒）、能量阈值、合并间隔短于此值的语音段（秒）
+FRAME_SECONDS = 0.02
+ENERGY_THRESHOLD = 0.02
+MERGE_GAP_SECONDS = 0.25
+
+WORDS = [
+    "the", "meeting", "budget", "quarter", "team", "project", "schedule", "review",
+    "design", "customer", "release", "plan", "update", "risk", "metric", "launch",
+]
+
+
+def _load_audio(audio: Any) -> np.ndarray:
+    """接受文件路径或 16kHz float32 数组"""
+    if isinstance(audio, str):
+        data, _ = soundfile.read(audio, dtype="float32", always_2d=False)
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        return data
+    return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    """按帧能量检测语音段 [(开始秒, 结束秒)]"""
+    frame = int(FRAME_SECONDS * sample_rate)
+    count = len(audio) // frame
+    if count == 0:
+        return []
+    rms = np.sqrt(np.mean(audio[:count * frame].reshape(count, frame) ** 2, axis=1))
+    voiced = rms > ENERGY_THRESHOLD
+
+    regions = []
+    start = None
+    for idx, is_voiced in enumerate(voiced):
+        if is_voiced and start is None:
+            start = idx
+        elif not is_voiced and start is not None:
+            regions.append([start * FRAME_SECONDS, idx * FRAME_SECONDS])
+            start = None
+    if start is not None:
+        regions.append([start * FRAME_SECONDS, count * FRAME_SECONDS])
+
+    merged = []
+    for region in regions:
+        if merged and region[0] - merged[-1][1] < MERGE_GAP_SECONDS:
+            merged[-1][1] = region[1]
+        else:
+            merged.append(region)
+    return [(round(start, 3), round(end, 3)) for start, end in merged if end - start >= 0.3]
+
+
+def _dominant_speaker(audio: np.ndarray, start: float, end: float, sample_rate: int = SAMPLE_RATE) -> int:
+    """按主频率找最接近的说话人基频"""
+    chunk = audio[int(start * sample_rate):int(end * sample_rate)]
+    if len(chunk) == 0:
+        return 0
+    spectrum = np.abs(np.fft.rfft(chunk))
+    freqs = np.fft.rfftfreq(len(chunk), 1.0 / sample_rate)
+    peak = freqs[int(np.argmax(spectrum))]
+    return int(np.argmin([abs(peak - freq) for freq in SPEAKER_FREQS]))
+
+
+def _words_for(start: float, count: int) -> List[str]:
+    digest = hashlib.sha256(f"{start:.2f}".encode()).digest()
+    return [WORDS[digest[idx % len(digest)] % len(WORDS)] for idx in range(count)]
+
+
+# ----------------------------------------------------------------------
+# faster-whisper
+# ----------------------------------------------------------------------
+
+class FakeWord:
+    def __init__(self, word: str, start: float, end: float):
+        self.word = word
+        self.start = start
+        self.end = end
+        self.probability = 0.99
+
+
+class FakeSegment:
+    def __init__(self, text: str, start: float, end: float, words: List[FakeWord]):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.words = words
+
+
+class FakeTranscriptionInfo:
+    def __init__(self, language: str, duration: float):
+        self.language = language
+        self.language_probability = 1.0
+        self.duration = duration
+
+
+class FakeWhisperModel:
+    """与 faster_whisper.WhisperModel.transcribe 接口一致：返回 (片段生成器, info)，片段在迭代时才"识别" """
+
+    def __init__(self, rtf: float = 0.02):
+        self.rtf = rtf
+
+    def transcribe(self, audio: Any, language: Optional[str] = None, **options) -> Tuple[Iterator[FakeSegment], FakeTranscriptionInfo]:
+        samples = _load_audio(audio)
+        duration = len(samples) / SAMPLE_RATE
+        regions = detect_speech(samples)
+
+        def segments() -> Iterator[FakeSegment]:
+            for start, end in regions:
+                time.sleep(self.rtf * (end - start))
+                count = max(1, int((end - start) * 2.5))
+                step = (end - start) / count
+                words = [
+                    FakeWord(f" {word}", start + idx * step, start + (idx + 1) * step)
+                    for idx, word in enumerate(_words_for(start, count))
+                ]
+                yield FakeSegment(" " + " ".join(word.word.strip() for word in words) + ".", start, end, words)
+
+        return segments(), FakeTranscriptionInfo(language or "en", duration)
+
+
+# ----------------------------------------------------------------------
+# pyannote
+# ----------------------------------------------------------------------
+
+class FakeTurn:
+    def __init__(self, start: float, end: float):
+        self.start = start
+        self.end = end
+
+
+class FakeAnnotation:
+    def __init__(self, tracks: List[Tuple[float, float, str]]):
+        self.tracks = tracks
+
+    def itertracks(self, yield_label: bool = False):
+        for idx, (start, end, label) in enumerate(self.tracks):
+            if yield_label:
+                yield FakeTurn(start, end), idx, label
+            else:
+                yield FakeTurn(start, end), idx
+
+
+class FakeDiarizationPipeline:
+    """与 pyannote Pipeline 的调用方式一致，接受文件路径或 {"waveform", "sample_rate"}"""
+
+    STEPS = ["segmentation", "speaker_counting", "embeddings", "discrete_diarization"]
+
+    def __init__(self, rtf: float = 0.01):
+        self.rtf = rtf
+
+    def __call__(self, audio: Any, hook=None) -> FakeAnnotation:
+        if isinstance(audio, dict):
+            waveform = audio["waveform"]
+            samples = _load_audio(waveform.numpy() if hasattr(waveform, "numpy") else waveform)
+        else:
+            samples = _load_audio(audio)
+        duration = len(samples) / SAMPLE_RATE
+
+        for step in self.STEPS:
+            time.sleep(self.rtf * duration / len(self.STEPS))
+            if hook is not None:
+                hook(step, None, total=1, completed=1)
+
+        tracks = [
+            (start, end, f"SPEAKER_{_dominant_speaker(samples, start, end):02d}")
+            for start, end in detect_speech(samples)
+        ]
+        return FakeAnnotation(tracks)
+
+
+# ----------------------------------------------------------------------
+# MarianMT
+# ----------------------------------------------------------------------
+
+class FakeTensor:
+    def __init__(self, text: str):
+        self.text = text
+
+    def to(self, device: Any) -> "FakeTensor":
+        return self
+
+
+class FakeMarianTokenizer:
+    def __call__(self, text: str, **kwargs) -> Dict[str, FakeTensor]:
+        return {"input_ids": FakeTensor(text)}
+
+    def decode(self, output: str, skip_special_tokens: bool = True) -> str:
+        return output
+
+
+class FakeMarianModel:
+    """generate 返回"译文"：按字符数计费，输出为原文加目标语言标记"""
+
+    def __init__(self, target_lang: str, seconds_per_char: float = 0.0002):
+        self.target_lang = target_lang
+        self.seconds_per_char = seconds_per_char
+
+    def generate(self, input_ids: FakeTensor, **kwargs) -> List[str]:
+        time.sleep(self.seconds_per_char * len(input_ids.text))
+        return [f"[{self.target_lang}] {input_ids.text}"]
+
+
+# ----------------------------------------------------------------------
+# 安装
+# ----------------------------------------------------------------------
+
+def install_fake_engines(asr_rtf: float, diarization_rtf: float, translation_seconds_per_char: float):
+    """把服务中的模型对象替换为伪造引擎（需在 app 模块导入后、任务开始前调用）"""
+    from app.api import routes
+    from app.services.whisper_service import WhisperService
+    from app.services.diarization_service import diarization_service
+    from app.services.translation_service import translation_service
+
+    # 跳过 WhisperService.__init__ 中的模型加载
+    whisper = WhisperService.__new__(WhisperService)
+    whisper.model = FakeWhisperModel(rtf=asr_rtf)
+    routes.whisper_service = whisper
+
+    diarization_service.pipeline = FakeDiarizationPipeline(rtf=diarization_rtf)
+    diarization_service.model = diarization_service.pipeline
+
+    # 只替换模型对象，是否翻译仍由 TRANSLATION_ENABLED（--no-translation）决定
+    translation_service.tokenizer_en_zh = FakeMarianTokenizer()
+    translation_service.model_en_zh = FakeMarianModel("zh", translation_seconds_per_char)
+    translation_service.tokenizer_zh_en = FakeMarianTokenizer()
+    translation_service.model_zh_en = FakeMarianModel("en", translation_seconds_per_char)
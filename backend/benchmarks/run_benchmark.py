@@ -0,0 +1,227 @@
+"""
+离线流程基准测试
+
+生成合成音频，经 enqueue_audio_task -> 任务队列 -> process_audio_task 完整执行识别流程，
+输出分阶段耗时、任务吞吐量和内存占用（JSON），用于比较不同提交之间的性能。
+
+默认使用伪造的模型引擎（不需要下载模型，结果确定）；--engines real 使用本地已缓存的真实模型。
+存储目录默认使用临时目录，不影响 storage/ 下的数据，阶段缓存和结果缓存均为冷启动。
+
+在 backend 目录下运行:
+    python -m benchmarks.run_benchmark --durations 60,600 --jobs 4 --speakers 2 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from .synthetic import generate_audio_file
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="识别流程基准测试")
+    parser.add_argument("--engines", choices=["fake", "real"], default="fake", help="模型引擎")
+    parser.add_argument("--durations", default="120", help="音频时长（秒），逗号分隔，各任务轮流使用")
+    parser.add_argument("--speakers", type=int, default=2, help="说话人数")
+    parser.add_argument("--jobs", type=int, default=4, help="任务数")
+    parser.add_argument("--workers", type=int, default=1, help="同时执行的任务数（JOB_WORKERS）")
+    parser.add_argument("--format", default="mp3", help="输入音频格式（扩展名），mp3 等格式需要 ffmpeg")
+    parser.add_argument("--no-diarization", action="store_true", help="关闭说话人分离")
+    parser.add_argument("--no-translation", action="store_true", help="关闭翻译")
+    parser.add_argument("--seed", type=int, default=0, help="合成音频的随机种子")
+    parser.add_argument("--fake-asr-rtf", type=float, default=0.02, help="伪造 Whisper 每秒音频的耗时（秒）")
+    parser.add_argument("--fake-diarization-rtf", type=float, default=0.01, help="伪造 pyannote 每秒音频的耗时（秒）")
+    parser.add_argument("--fake-translation-char-seconds", type=float, default=0.0002, help="伪造 MarianMT 每个字符的耗时（秒）")
+    parser.add_argument("--storage-dir", help="存储目录（默认使用临时目录，结束后删除）")
+    parser.add_argument("--output", help="结果 JSON 输出路径（默认输出到标准输出）")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace, storage_dir: str):
+    """设置 app 读取的环境变量，必须在导入 app 之前调用"""
+    os.environ["STORAGE_DIR"] = storage_dir
+    os.environ.pop("JOB_STORE_PATH", None)
+    os.environ["JOB_WORKERS"] = str(args.workers)
+    os.environ["JOB_QUEUE_SIZE"] = str(max(args.jobs, 1))
+    os.environ["ENABLE_DIARIZATION"] = "false" if args.no_diarization else "true"
+    os.environ["TRANSLATION_ENABLED"] = "false" if args.no_translation else "true"
+    if args.engines == "fake":
+        # 分块识别的 worker 进程会加载真实模型，伪造引擎只能走串行识别
+        os.environ["TRANSCRIBE_WORKERS"] = "1"
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))]
+
+
+def summarize_values(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "mean": round(sum(values) / len(values), 4) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else None,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024, 1)
+
+
+async def run_jobs(args: argparse.Namespace, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """提交全部任务并等待结束，返回每个任务的统计"""
+    from app.api import routes
+    from app.core.config import UPLOAD_DIR, RESULTS_DIR
+    from app.services.job_queue import job_queue
+    from app.services.task_manager import task_manager
+    from app.utils.helpers import generate_result_id
+
+    if args.engines == "fake":
+        from .fake_engines import install_fake_engines
+        install_fake_engines(args.fake_asr_rtf, args.fake_diarization_rtf, args.fake_translation_char_seconds)
+
+    await job_queue.start()
+    try:
+        submitted = {}
+        for item in inputs:
+            # 与 /api/upload 一样先把文件放进上传目录，再交给 enqueue_audio_task
+            task_id = generate_result_id()
+            upload_path = os.path.join(UPLOAD_DIR, f"{task_id}{os.path.splitext(item['path'])[1]}")
+            shutil.copyfile(item["path"], upload_path)
+            task = await routes.enqueue_audio_task(
+                task_id, os.path.basename(item["path"]), upload_path, bypass_limit=True
+            )
+            submitted[task.task_id] = {**item, "submitted_at": time.perf_counter()}
+
+        results = {}
+        while len(results) < len(submitted):
+            for task_id, item in submitted.items():
+                if task_id in results:
+                    continue
+                task = await task_manager.get_task(task_id)
+                if task is not None and task.status in ("completed", "failed"):
+                    results[task_id] = (task, time.perf_counter() - item["submitted_at"])
+            await asyncio.sleep(0.05)
+    finally:
+        await job_queue.stop()
+
+    jobs = []
+    for task_id, item in submitted.items():
+        task, latency = results[task_id]
+        record = {
+            "task_id": task_id,
+            "audio_seconds": item["duration"],
+            "status": task.status,
+            "latency": round(latency, 3),
+        }
+        if task.status == "completed":
+            with open(os.path.join(RESULTS_DIR, f"{task.result_id}.json"), encoding="utf-8") as f:
+                result = json.load(f)
+            record["processing_time"] = result.get("processing_time")
+            record["stage_timings"] = result.get("stage_timings", {})
+            record["segments"] = len(result.get("sentences", []))
+            record["speakers"] = len(result.get("speakers", []))
+        else:
+            record["message"] = task.message
+        jobs.append(record)
+    return jobs
+
+
+def summarize(args: argparse.Namespace, jobs: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    completed = [job for job in jobs if job["status"] == "completed"]
+    audio_seconds = sum(job["audio_seconds"] for job in completed)
+
+    stages: Dict[str, Dict[str, List[float]]] = {}
+    for job in completed:
+        for name, timing in job["stage_timings"].items():
+            stage = stages.setdefault(name, {"wall_time": [], "cpu_time": [], "peak_rss_mb": [], "rtf": []})
+            for key in stage:
+                if timing.get(key) is not None:
+                    stage[key].append(timing[key])
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "summary": {
+            "jobs": len(jobs),
+            "completed": len(completed),
+            "failed": len(jobs) - len(completed),
+            "wall_time": round(wall_time, 3),
+            "jobs_per_hour": round(len(completed) / wall_time * 3600, 2) if wall_time > 0 else None,
+            # 每小时处理的音频小时数（即整体实时倍数）
+            "audio_hours_per_hour": round(audio_seconds / wall_time, 3) if wall_time > 0 else None,
+            "latency": summarize_values([job["latency"] for job in completed]),
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "stages": {
+            name: {key: summarize_values(values) for key, values in stage.items()}
+            for name, stage in stages.items()
+        },
+        "jobs": jobs,
+    }
+
+
+def main():
+    args = parse_args()
+    durations = [float(value) for value in args.durations.split(",") if value.strip()]
+
+    storage_dir = args.storage_dir or tempfile.mkdtemp(prefix="asr-bench-")
+    configure_environment(args, storage_dir)
+    try:
+        input_dir = os.path.join(storage_dir, "bench_inputs")
+        os.makedirs(input_dir, exist_ok=True)
+        inputs = []
+        for idx in range(args.jobs):
+            duration = durations[idx % len(durations)]
+            path = os.path.join(input_dir, f"synthetic_{idx:03d}.{args.format.lstrip('.')}")
+            # 每个任务使用不同的种子，内容哈希不同，不会命中去重和阶段缓存
+            generate_audio_file(path, duration, args.speakers, seed=args.seed + idx)
+            inputs.append({"path": path, "duration": duration})
+
+        started = time.perf_counter()
+        jobs = asyncio.run(run_jobs(args, inputs))
+        report = summarize(args, jobs, time.perf_counter() - started)
+    finally:
+        if not args.storage_dir:
+            shutil.rmtree(storage_dir, ignore_errors=True)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
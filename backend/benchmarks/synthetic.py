@@ -0,0 +1,120 @@
+"""
+合成测试音频
+
+按给定时长和说话人数生成一段"对话"：每个说话人用不同基频的谐波音加上音节节奏的幅度调制模拟语音，
+语句之间插入静音。同一 seed 生成的音频完全相同，不同 seed 的音频内容哈希不同（避免命中结果缓存）。
+
+也可以单独使用:
+    python -m benchmarks.synthetic out.wav --duration 600 --speakers 3
+"""
+import argparse
+import os
+import subprocess
+from typing import Any, Dict, List
+
+import numpy as np
+import soundfile
+
+SAMPLE_RATE = 16000
+
+# 各说话人的基频（Hz），伪造的说话人分离引擎按主频率区分说话人
+SPEAKER_FREQS = [140.0, 220.0, 310.0, 420.0, 530.0, 650.0, 780.0, 900.0]
+
+# 语句和停顿的时长范围（秒）
+UTTERANCE_SECONDS = (1.5, 8.0)
+PAUSE_SECONDS = (0.4, 1.5)
+
+# 语句幅度和底噪幅度
+SPEECH_AMPLITUDE = 0.3
+NOISE_AMPLITUDE = 0.002
+
+
+def generate_script(duration: float, speakers: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成语句时间表 [{"start", "end", "speaker"}]"""
+    if not 1 <= speakers <= len(SPEAKER_FREQS):
+        raise ValueError(f"说话人数需在 1 到 {len(SPEAKER_FREQS)} 之间")
+
+    rng = np.random.default_rng(seed)
+    script = []
+    position = float(rng.uniform(*PAUSE_SECONDS))
+    speaker = 0
+    while position < duration:
+        length = float(rng.uniform(*UTTERANCE_SECONDS))
+        end = min(position + length, duration)
+        if end - position >= 0.5:
+            script.append({"start": round(position, 3), "end": round(end, 3), "speaker": speaker})
+        position = end + float(rng.uniform(*PAUSE_SECONDS))
+        # 多数时候换人说话，偶尔同一人连续两句
+        if speakers > 1 and rng.random() < 0.8:
+            speaker = (speaker + int(rng.integers(1, speakers))) % speakers
+    return script
+
+
+def synthesize(script: List[Dict[str, Any]], duration: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """按时间表合成 float32 单声道音频"""
+    rng = np.random.default_rng(seed + 1)
+    audio = (rng.standard_normal(int(duration * sample_rate)) * NOISE_AMPLITUDE).astype(np.float32)
+
+    for item in script:
+        start = int(item["start"] * sample_rate)
+        end = min(int(item["end"] * sample_rate), len(audio))
+        t = np.arange(end - start, dtype=np.float32) / sample_rate
+        freq = SPEAKER_FREQS[item["speaker"]]
+        # 基频 + 两个泛音
+        tone = (
+            np.sin(2 * np.pi * freq * t)
+            + 0.5 * np.sin(2 * np.pi * 2 * freq * t)
+            + 0.25 * np.sin(2 * np.pi * 3 * freq * t)
+        )
+        # 约 4Hz 的音节节奏，保持为正值，语句中间不会出现长静音
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * rng.uniform(3.0, 5.0) * t) ** 2
+        # 首尾 20ms 淡入淡出
+        fade = min(len(t) // 2, int(0.02 * sample_rate))
+        if fade > 0:
+            ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+            envelope[:fade] *= ramp
+            envelope[-fade:] *= ramp[::-1]
+        audio[start:end] += (SPEECH_AMPLITUDE / 1.75) * tone * envelope
+
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+
+def write_audio(path: str, audio: np.ndarray, sample_rate: int = SAMPLE_RATE):
+    """写入音频文件，WAV / FLAC / OGG 直接写入，其他格式（mp3、m4a 等）通过 ffmpeg 编码"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".wav", ".flac", ".ogg"):
+        soundfile.write(path, audio, sample_rate)
+        return
+
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "f32le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+            path
+        ],
+        input=audio.astype(np.float32).tobytes(),
+        check=True
+    )
+
+
+def generate_audio_file(path: str, duration: float, speakers: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成合成音频文件，返回语句时间表"""
+    script = generate_script(duration, speakers, seed)
+    write_audio(path, synthesize(script, duration, seed))
+    return script
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成测试音频")
+    parser.add_argument("output", help="输出文件路径（扩展名决定格式）")
+    parser.add_argument("--duration", type=float, default=60.0, help="时长（秒）")
+    parser.add_argument("--speakers", type=int, default=2, help="说话人数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    script = generate_audio_file(args.output, args.duration, args.speakers, args.seed)
+    print(f"{args.output}: {args.duration:.1f}秒, {args.speakers} 个说话人, {len(script)} 句")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: 运行较慢的测试（生成并解码长音频等），可用 -m \"not slow\" 跳过")
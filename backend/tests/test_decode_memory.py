@@ -0,0 +1,48 @@
+"""
+流式解码的内存测试：解码一段长音频，进程 RSS 的增量应只与解码块大小有关，与音频时长无关
+
+合成音频由 ffmpeg 生成（见 benchmarks/decode_memory.py），未安装 ffmpeg 时跳过。
+运行: cd backend && python -m pytest tests -m slow
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault("STORAGE_DIR", tempfile.mkdtemp(prefix="decode-memory-test-"))
+
+import pytest
+
+from app.services.metrics import RssSampler, current_rss_bytes
+from app.utils.audio_processor import decode_audio
+from benchmarks.decode_memory import generate_long_audio
+
+# 合成音频时长（秒）；整段 float32 波形约 110 MB
+AUDIO_SECONDS = 1800
+
+# 允许的峰值 RSS 增量（MB），远小于整段波形
+MAX_RSS_GROWTH_MB = 64
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+@pytest.mark.skipif(current_rss_bytes() is None, reason="当前平台无法读取 RSS")
+def test_decode_memory_is_bounded(tmp_path):
+    input_path = str(tmp_path / "long.mp3")
+    generate_long_audio(input_path, AUDIO_SECONDS)
+
+    baseline = current_rss_bytes()
+    sampler = RssSampler()
+    sampler.start()
+    waveform, duration, audio_hash = asyncio.run(
+        decode_audio(input_path, str(tmp_path / "processed.wav"))
+    )
+    peak = sampler.stop()
+
+    assert duration == pytest.approx(AUDIO_SECONDS, abs=1.0)
+    assert len(waveform) == pytest.approx(AUDIO_SECONDS * 16000, abs=16000)
+    assert len(audio_hash) == 64
+    del waveform
+
+    growth_mb = (peak - baseline) / (1024 * 1024)
+    assert growth_mb < MAX_RSS_GROWTH_MB, f"解码峰值 RSS 增量 {growth_mb:.1f} MB"
@@ -0,0 +1,218 @@
+"""
+Downloader 测试：用本地 aiohttp 服务模拟各种 HTTP 服务器，通过 session_factory 注入客户端会话
+
+运行: cd backend && python -m pytest tests
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("STORAGE_DIR", tempfile.mkdtemp(prefix="downloader-test-"))
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.downloader import Downloader, DownloadError
+from app.utils.helpers import write_at
+
+DATA = os.urandom(300 * 1024 + 7)
+RANGE_PATTERN = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+def make_app(requests: list) -> web.Application:
+    """requests 记录收到的每个请求的 (路径, Range 头)"""
+
+    async def ranged(request: web.Request) -> web.StreamResponse:
+        requests.append((request.path, request.headers.get("Range")))
+        match = RANGE_PATTERN.fullmatch(request.headers.get("Range", ""))
+        if match is None:
+            return web.Response(body=DATA, content_type="audio/mpeg", headers={"Accept-Ranges": "bytes"})
+        start, end = int(match.group(1)), int(match.group(2))
+        return web.Response(
+            status=206,
+            body=DATA[start:end + 1],
+            content_type="audio/mpeg",
+            headers={"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{len(DATA)}"}
+        )
+
+    async def ignores_range(request: web.Request) -> web.Response:
+        # 声称支持范围请求，但总是返回完整内容
+        requests.append((request.path, request.headers.get("Range")))
+        return web.Response(body=DATA, content_type="audio/mpeg", headers={"Accept-Ranges": "bytes"})
+
+    async def chunked(request: web.Request) -> web.StreamResponse:
+        # 不声明 Content-Length，只能在接收过程中检查大小
+        requests.append((request.path, request.headers.get("Range")))
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for start in range(0, len(DATA), 64 * 1024):
+            await response.write(DATA[start:start + 64 * 1024])
+        await response.write_eof()
+        return response
+
+    async def truncated(request: web.Request) -> web.StreamResponse:
+        # 声明完整长度，只发送一半后断开连接
+        requests.append((request.path, request.headers.get("Range")))
+        response = web.StreamResponse(headers={"Content-Type": "audio/mpeg"})
+        response.content_length = len(DATA)
+        await response.prepare(request)
+        await response.write(DATA[:len(DATA) // 2])
+        request.transport.close()
+        return response
+
+    async def truncated_range(request: web.Request) -> web.StreamResponse:
+        # 范围请求中最后一段只发送一半
+        requests.append((request.path, request.headers.get("Range")))
+        match = RANGE_PATTERN.fullmatch(request.headers.get("Range", ""))
+        if match is None:
+            return web.Response(body=DATA, content_type="audio/mpeg", headers={"Accept-Ranges": "bytes"})
+        start, end = int(match.group(1)), int(match.group(2))
+        body = DATA[start:end + 1]
+        response = web.StreamResponse(
+            status=206,
+            headers={
+                "Content-Type": "audio/mpeg",
+                "Accept-Ranges": "bytes",
+                "Content-Range": f"bytes {start}-{end}/{len(DATA)}"
+            }
+        )
+        response.content_length = len(body)
+        await response.prepare(request)
+        if end + 1 == len(DATA):
+            await response.write(body[:len(body) // 2])
+            request.transport.close()
+            return response
+        await response.write(body)
+        await response.write_eof()
+        return response
+
+    async def missing(request: web.Request) -> web.Response:
+        requests.append((request.path, request.headers.get("Range")))
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/ranged.mp3", ranged)
+    app.router.add_get("/ignores-range.mp3", ignores_range)
+    app.router.add_get("/chunked.mp3", chunked)
+    app.router.add_get("/truncated.mp3", truncated)
+    app.router.add_get("/truncated-range.mp3", truncated_range)
+    app.router.add_get("/missing.mp3", missing)
+    return app
+
+
+def run_download(path: str, dest_dir: str, **options):
+    """启动本地服务并下载 path，返回 (DownloadedFile 或 DownloadError, 收到的请求)"""
+    requests: list = []
+
+    async def main():
+        server = TestServer(make_app(requests))
+        await server.start_server()
+        downloader = Downloader(
+            session_factory=aiohttp.ClientSession,
+            **{"range_parts": 4, "parallel_threshold": 1024, **options}
+        )
+        try:
+            return await downloader.download(str(server.make_url(path)), dest_dir)
+        except DownloadError as e:
+            return e
+        finally:
+            await downloader.close()
+            await server.close()
+
+    return asyncio.run(main()), requests
+
+
+def read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_ranged_download(tmp_path):
+    result, requests = run_download("/ranged.mp3", str(tmp_path))
+    assert not isinstance(result, DownloadError), result
+    assert read_file(result.path) == DATA
+    assert result.size == len(DATA)
+    assert result.sha256 == hashlib.sha256(DATA).hexdigest()
+    assert result.filename.endswith(".mp3")
+    assert len([r for r in requests if r[1] is not None]) == 4
+
+
+def test_small_file_is_downloaded_sequentially(tmp_path):
+    result, requests = run_download("/ranged.mp3", str(tmp_path), parallel_threshold=len(DATA) + 1)
+    assert read_file(result.path) == DATA
+    assert requests == [("/ranged.mp3", None)]
+
+
+def test_server_ignoring_range_falls_back_to_sequential(tmp_path):
+    result, requests = run_download("/ignores-range.mp3", str(tmp_path))
+    assert not isinstance(result, DownloadError), result
+    assert read_file(result.path) == DATA
+    assert result.sha256 == hashlib.sha256(DATA).hexdigest()
+    # 最后一次是不带 Range 的重新下载
+    assert requests[-1] == ("/ignores-range.mp3", None)
+    assert os.listdir(tmp_path) == [result.filename]
+
+
+def test_declared_size_over_limit(tmp_path):
+    result, requests = run_download("/ranged.mp3", str(tmp_path), max_file_size=len(DATA) - 1)
+    assert isinstance(result, DownloadError)
+    assert "文件过大" in str(result)
+    assert requests == [("/ranged.mp3", None)]
+    assert os.listdir(tmp_path) == []
+
+
+def test_streamed_size_over_limit(tmp_path):
+    result, _ = run_download("/chunked.mp3", str(tmp_path), max_file_size=100 * 1024)
+    assert isinstance(result, DownloadError)
+    assert "文件过大" in str(result)
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunked_download_within_limit(tmp_path):
+    result, _ = run_download("/chunked.mp3", str(tmp_path))
+    assert read_file(result.path) == DATA
+    assert result.size == len(DATA)
+
+
+def test_truncated_body(tmp_path):
+    result, _ = run_download("/truncated.mp3", str(tmp_path), range_parts=1)
+    assert isinstance(result, DownloadError)
+    assert os.listdir(tmp_path) == []
+
+
+def test_truncated_range(tmp_path):
+    result, _ = run_download("/truncated-range.mp3", str(tmp_path))
+    assert isinstance(result, DownloadError)
+    assert os.listdir(tmp_path) == []
+
+
+def test_http_error(tmp_path):
+    result, _ = run_download("/missing.mp3", str(tmp_path))
+    assert isinstance(result, DownloadError)
+    assert "404" in str(result)
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("use_pwrite", [True, False])
+def test_write_at_concurrent_writers_share_fd(tmp_path, monkeypatch, use_pwrite):
+    """多个线程通过同一个 fd 写入不同位置；不支持 pwrite 时走 seek + write 的加锁路径"""
+    if not use_pwrite:
+        monkeypatch.delattr(os, "pwrite", raising=False)
+    path = str(tmp_path / "data.bin")
+    part_size = 4096
+    parts = [DATA[start:start + part_size] for start in range(0, len(DATA), part_size)]
+    with open(path, "wb") as f:
+        f.truncate(len(DATA))
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: write_at(fd, parts[i], i * part_size), reversed(range(len(parts)))))
+    finally:
+        os.close(fd)
+    assert read_file(path) == DATA
@@ -22,6 +22,7 @@ function App() {
   const [uploadMethod, setUploadMethod] = useState<UploadMethod>('file')
   const [audioUrl, setAudioUrl] = useState('')
   const [isDownloading, setIsDownloading] = useState(false)
+  const [initialTime, setInitialTime] = useState<number | undefined>(undefined)
 
   const handleUpload = async (file: File) => {
     setIsUploading(true)
@@ -66,6 +67,7 @@ function App() {
     try {
       const resultData = await getResult(resultId)
       setResult(resultData)
+      setInitialTime(undefined)
       setAppState('result')
     } catch (error) {
       console.error('Failed to get result:', error)
@@ -82,12 +84,14 @@ function App() {
     setAppState('upload')
     setTaskId('')
     setResult(null)
+    setInitialTime(undefined)
     setIsUploading(false)
     setUploadProgress(0)
   }
 
-  const handleLoadHistory = (history: ASRResult) => {
+  const handleLoadHistory = (history: ASRResult, startTime?: number) => {
     setResult(history)
+    setInitialTime(startTime)
     setAppState('result')
   }
 
@@ -99,6 +103,7 @@ function App() {
     try {
       const resultData = await getResult(resultId)
       setResult(resultData)
+      setInitialTime(undefined)
       setAppState('result')
       setIsImportModalOpen(false)
     } catch (error) {
@@ -232,7 +237,7 @@ function App() {
           )}
 
           {appState === 'result' && result && (
-            <ResultViewer result={result} onResultUpdate={handleResultUpdate} />
+            <ResultViewer result={result} onResultUpdate={handleResultUpdate} initialTime={initialTime} />
           )}
         </div>
       </main>
@@ -1,21 +1,29 @@
 import { useState, useEffect } from 'react'
-import { Clock, Mic, Users, X, Loader2, Zap } from 'lucide-react'
+import { Clock, Mic, Users, X, Loader2, Zap, Search } from 'lucide-react'
 import { Button } from './ui/button'
 import { Card, CardContent } from './ui/card'
 import { ScrollArea } from './ui/scroll-area'
-import { getHistoryList, loadHistory } from '@/services/historyApi'
-import type { HistoryItem } from '@/types/history'
+import { getHistoryList, loadHistory, searchHistory } from '@/services/historyApi'
+import type { HistoryItem, SearchHit } from '@/types/history'
 import { formatDuration } from '@/lib/utils'
 
 interface HistoryModalProps {
   isOpen: boolean
   onClose: () => void
-  onLoadHistory: (history: any) => void
+  onLoadHistory: (history: any, startTime?: number) => void
 }
 
+const PAGE_SIZE = 50
+
 export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalProps) => {
   const [historyList, setHistoryList] = useState<HistoryItem[]>([])
+  const [total, setTotal] = useState(0)
   const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [query, setQuery] = useState('')
+  const [hits, setHits] = useState<SearchHit[]>([])
+  const [hitTotal, setHitTotal] = useState(0)
+  const [searching, setSearching] = useState(false)
   const [loadingDetail, setLoadingDetail] = useState<string | null>(null)
 
   useEffect(() => {
@@ -24,11 +32,40 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
     }
   }, [isOpen])
 
+  // 输入停止 300ms 后再搜索
+  useEffect(() => {
+    const q = query.trim()
+    if (!q) {
+      setHits([])
+      setHitTotal(0)
+      return
+    }
+    let cancelled = false
+    setSearching(true)
+    const timer = setTimeout(() => {
+      searchHistory(q, { limit: PAGE_SIZE })
+        .then((page) => {
+          if (cancelled) return
+          setHits(page.hits)
+          setHitTotal(page.total)
+        })
+        .catch((error) => console.error('搜索失败:', error))
+        .finally(() => {
+          if (!cancelled) setSearching(false)
+        })
+    }, 300)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [query])
+
   const fetchHistoryList = async () => {
     setLoading(true)
     try {
-      const list = await getHistoryList()
-      setHistoryList(list)
+      const page = await getHistoryList({ limit: PAGE_SIZE })
+      setHistoryList(page.items)
+      setTotal(page.total)
     } catch (error) {
       console.error('获取历史记录失败:', error)
     } finally {
@@ -36,11 +73,24 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
     }
   }
 
-  const handleLoadHistory = async (item: HistoryItem) => {
+  const fetchMore = async () => {
+    setLoadingMore(true)
+    try {
+      const page = await getHistoryList({ offset: historyList.length, limit: PAGE_SIZE })
+      setHistoryList((list) => [...list, ...page.items])
+      setTotal(page.total)
+    } catch (error) {
+      console.error('获取历史记录失败:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const handleLoadHistory = async (item: { result_id: string }, startTime?: number) => {
     setLoadingDetail(item.result_id)
     try {
       const detail = await loadHistory(item.result_id)
-      onLoadHistory(detail)
+      onLoadHistory(detail, startTime)
       onClose()
     } catch (error) {
       console.error('加载历史记录失败:', error)
@@ -97,7 +147,7 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
               <div>
                 <h2 className="text-xl font-bold text-white">历史记录</h2>
                 <p className="text-sm text-slate-400">
-                  {historyList.length > 0 ? `共 ${historyList.length} 条记录` : '暂无记录'}
+                  {total > 0 ? `共 ${total} 条记录` : '暂无记录'}
                 </p>
               </div>
             </div>
@@ -111,9 +161,53 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
             </Button>
           </div>
 
+          {/* 搜索框 */}
+          <div className="relative mb-4">
+            <Search className="absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-slate-500" />
+            <input
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
+              placeholder="搜索所有记录的原文和翻译"
+              className="w-full pl-9 pr-3 py-2 bg-slate-800/50 border border-slate-700/50 rounded-lg text-sm text-white placeholder:text-slate-500 focus:outline-none focus:border-primary"
+            />
+          </div>
+
           {/* 列表内容 */}
           <div className="min-h-[300px] max-h-[500px]">
-            {loading ? (
+            {query.trim() ? (
+              searching && hits.length === 0 ? (
+                <div className="flex items-center justify-center h-[300px]">
+                  <Loader2 className="w-8 h-8 text-primary animate-spin" />
+                </div>
+              ) : hits.length === 0 ? (
+                <div className="flex items-center justify-center h-[300px] text-slate-400">没有找到匹配的内容</div>
+              ) : (
+                <ScrollArea className="h-[500px]">
+                  <div className="space-y-2 pr-4">
+                    <p className="text-xs text-slate-500">共 {hitTotal} 处匹配</p>
+                    {hits.map((hit) => (
+                      <button
+                        key={`${hit.result_id}-${hit.sentence_index}`}
+                        onClick={() => handleLoadHistory(hit, hit.start ?? undefined)}
+                        disabled={loadingDetail === hit.result_id}
+                        className="w-full text-left p-3 bg-slate-800/50 hover:bg-slate-800 rounded-lg border border-slate-700/50 transition-all"
+                      >
+                        <div className="flex items-center justify-between gap-2 text-xs text-slate-400 mb-1">
+                          <span className="truncate">{hit.filename || `记录 #${hit.result_id.slice(0, 8)}`}</span>
+                          {hit.start !== null && (
+                            <span className="flex-shrink-0 text-primary">{formatDuration(hit.start)}</span>
+                          )}
+                        </div>
+                        <p className="text-sm text-white line-clamp-2">{hit.text}</p>
+                        {hit.translation_zh && hit.translation_zh !== hit.text && (
+                          <p className="mt-1 text-xs text-slate-500 line-clamp-1">{hit.translation_zh}</p>
+                        )}
+                      </button>
+                    ))}
+                  </div>
+                </ScrollArea>
+              )
+            ) : loading ? (
               <div className="flex items-center justify-center h-[300px]">
                 <Loader2 className="w-8 h-8 text-primary animate-spin" />
               </div>
@@ -126,9 +220,9 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
             ) : (
               <ScrollArea className="h-[500px]">
                 <div className="space-y-3 pr-4">
-                  {historyList.map((item, index) => (
+                  {historyList.map((item) => (
                     <div
-                      key={index}
+                      key={item.result_id}
                       className="p-4 bg-slate-800/50 hover:bg-slate-800 rounded-lg border border-slate-700/50 transition-all group"
                     >
                       <div className="flex items-start justify-between gap-4">
@@ -189,6 +283,17 @@ export const HistoryModal = ({ isOpen, onClose, onLoadHistory }: HistoryModalPro
                       </div>
                     </div>
                   ))}
+                  {historyList.length < total && (
+                    <Button
+                      onClick={fetchMore}
+                      disabled={loadingMore}
+                      variant="ghost"
+                      size="sm"
+                      className="w-full text-slate-400 hover:text-white"
+                    >
+                      {loadingMore ? <Loader2 className="w-4 h-4 animate-spin" /> : `加载更多（剩余 ${total - historyList.length} 条）`}
+                    </Button>
+                  )}
                 </div>
               </ScrollArea>
             )}
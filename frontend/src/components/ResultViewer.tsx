@@ -4,6 +4,7 @@ import { Card, CardContent, CardHeader, CardTitle } from './ui/card'
 import { Button } from './ui/button'
 import { ScrollArea } from './ui/scroll-area'
 import { SentenceItem } from './SentenceItem'
+import { Waveform } from './Waveform'
 import { useAudioPlayer } from '@/hooks/useAudioPlayer'
 import { getAudioUrl, api } from '@/services/api'
 import type { ASRResult, SentenceSegment } from '@/types/api'
@@ -12,10 +13,11 @@ import { formatDuration } from '@/lib/utils'
 interface ResultViewerProps {
   result: ASRResult
   onResultUpdate?: (updatedResult: ASRResult) => void
+  initialTime?: number  // 音频就绪后跳转到的位置（秒），如搜索命中的句子
 }
 
-export const ResultViewer = ({ result, onResultUpdate }: ResultViewerProps) => {
-  const { audioRef, isPlaying, currentTime, duration, toggle, playRange, isReady } = useAudioPlayer()
+export const ResultViewer = ({ result, onResultUpdate, initialTime }: ResultViewerProps) => {
+  const { audioRef, isPlaying, currentTime, duration, toggle, seek, playRange, isReady } = useAudioPlayer()
   const [activeSegmentId, setActiveSegmentId] = useState<number | null>(null)
   const [sentences, setSentences] = useState<SentenceSegment[]>(result.sentences)
   const scrollAreaRef = useRef<HTMLDivElement>(null)
@@ -51,6 +53,12 @@ export const ResultViewer = ({ result, onResultUpdate }: ResultViewerProps) => {
     }
   }, [audioUrl, audioRef])
 
+  useEffect(() => {
+    if (isReady && initialTime !== undefined) {
+      seek(initialTime)
+    }
+  }, [isReady, initialTime])
+
   const handleSegmentClick = (segment: SentenceSegment) => {
     console.log('Segment clicked:', segment, 'isReady:', isReady)
     if (!isReady) {
@@ -217,6 +225,15 @@ export const ResultViewer = ({ result, onResultUpdate }: ResultViewerProps) => {
 
             <audio ref={audioRef} src={audioUrl} preload="auto" className="w-full" />
 
+            <div className="mt-3">
+              <Waveform
+                resultId={result.result_id}
+                currentTime={currentTime}
+                duration={duration}
+                onSeek={seek}
+              />
+            </div>
+
             <div className="mt-3 flex items-center space-x-3 text-sm">
               <span className="text-slate-400">
                 {duration > 0 ? formatDuration(currentTime) : '0:00'}
@@ -2,7 +2,9 @@ import { useEffect, useState } from 'react'
 import { Clock, CheckCircle, XCircle, Loader2 } from 'lucide-react'
 import { Card, CardContent } from './ui/card'
 import { Progress } from './ui/progress'
-import { getTaskStatus, type TaskStatus } from '@/services/api'
+import { getTaskStatus, getTaskEventsUrl, getPartialResult, type TaskStatus } from '@/services/api'
+import { formatTimestamp } from '@/lib/utils'
+import type { PartialSegment } from '@/types/api'
 
 interface TaskStatusComponentProps {
   taskId: string
@@ -12,27 +14,100 @@ interface TaskStatusComponentProps {
 
 export const TaskStatusComponent = ({ taskId, onComplete, onError }: TaskStatusComponentProps) => {
   const [status, setStatus] = useState<TaskStatus | null>(null)
+  const [partialSegments, setPartialSegments] = useState<PartialSegment[]>([])
+  const isProcessing = status?.status === 'processing'
 
   useEffect(() => {
-    const pollInterval = setInterval(async () => {
+    let finished = false
+    let eventSource: EventSource | null = null
+    let pollInterval: ReturnType<typeof setInterval> | null = null
+
+    const stop = () => {
+      finished = true
+      eventSource?.close()
+      if (pollInterval) clearInterval(pollInterval)
+    }
+
+    const handleStatus = (result: TaskStatus) => {
+      if (finished) return
+      setStatus(result)
+
+      if (result.status === 'completed' && result.result_id) {
+        stop()
+        onComplete(result.result_id)
+      } else if (result.status === 'failed') {
+        stop()
+        onError(result.message)
+      }
+    }
+
+    // 服务端推送不可用时回退为轮询
+    const startPolling = () => {
+      if (finished || pollInterval) return
+      pollInterval = setInterval(async () => {
+        try {
+          handleStatus(await getTaskStatus(taskId))
+        } catch (error) {
+          console.error('Failed to fetch task status:', error)
+        }
+      }, 2000)
+    }
+
+    if (typeof EventSource !== 'undefined') {
+      eventSource = new EventSource(getTaskEventsUrl(taskId))
+      eventSource.addEventListener('status', (event) => {
+        handleStatus(JSON.parse((event as MessageEvent).data))
+      })
+      eventSource.onerror = () => {
+        eventSource?.close()
+        startPolling()
+      }
+    } else {
+      startPolling()
+    }
+
+    return stop
+  }, [taskId, onComplete, onError])
+
+  // 处理过程中增量拉取已识别的片段；说话人或翻译就绪后从头重新拉取一次，获取回填的字段
+  useEffect(() => {
+    if (!isProcessing) return
+    let cancelled = false
+    let since = 0
+    let speakersReady = false
+    let translationsReady = false
+
+    const poll = async () => {
       try {
-        const result = await getTaskStatus(taskId)
-        setStatus(result)
-        
-        if (result.status === 'completed' && result.result_id) {
-          clearInterval(pollInterval)
-          onComplete(result.result_id)
-        } else if (result.status === 'failed') {
-          clearInterval(pollInterval)
-          onError(result.message)
+        const partial = await getPartialResult(taskId, since)
+        if (cancelled) return
+        if (partial.segments.length > 0) {
+          setPartialSegments((previous) => {
+            const next = [...previous]
+            for (const segment of partial.segments) {
+              next[segment.index] = segment
+            }
+            return next
+          })
         }
+        since = Math.max(since, ...partial.segments.map((segment) => segment.index + 1))
+        if ((partial.speakers_ready && !speakersReady) || (partial.translations_ready && !translationsReady)) {
+          since = 0
+        }
+        speakersReady = partial.speakers_ready
+        translationsReady = partial.translations_ready
       } catch (error) {
-        console.error('Failed to fetch task status:', error)
+        console.error('Failed to fetch partial result:', error)
       }
-    }, 2000)
+    }
 
-    return () => clearInterval(pollInterval)
-  }, [taskId, onComplete, onError])
+    poll()
+    const interval = setInterval(poll, 2000)
+    return () => {
+      cancelled = true
+      clearInterval(interval)
+    }
+  }, [taskId, isProcessing])
 
   if (!status) {
     return (
@@ -71,6 +146,11 @@ export const TaskStatusComponent = ({ taskId, onComplete, onError }: TaskStatusC
     }
   }
 
+  const formatEta = (seconds: number) => {
+    if (seconds < 60) return '预计不到 1 分钟后完成'
+    return `预计 ${Math.round(seconds / 60)} 分钟后完成`
+  }
+
   return (
     <Card>
       <CardContent className="p-6">
@@ -80,6 +160,9 @@ export const TaskStatusComponent = ({ taskId, onComplete, onError }: TaskStatusC
             <div className="flex-1">
               <p className="font-semibold text-white text-lg">{getStatusText()}</p>
               <p className="text-sm text-slate-400">{status.message}</p>
+              {status.eta_seconds != null && (status.status === 'pending' || status.status === 'processing') && (
+                <p className="text-xs text-slate-500">{formatEta(status.eta_seconds)}</p>
+              )}
             </div>
             {status.progress > 0 && (
               <span className="text-2xl font-bold text-primary">
@@ -94,6 +177,32 @@ export const TaskStatusComponent = ({ taskId, onComplete, onError }: TaskStatusC
             </div>
           )}
 
+          {status.status === 'processing' && partialSegments.length > 0 && (
+            <div className="space-y-2">
+              <p className="text-sm text-slate-400">已识别 {partialSegments.length} 个片段</p>
+              <div className="max-h-64 overflow-y-auto space-y-2 pr-1">
+                {partialSegments.map((segment) => segment && (
+                  <div key={segment.index} className="p-3 rounded-lg border bg-slate-800/50 border-slate-700/50">
+                    <div className="flex items-center space-x-3 mb-1">
+                      {segment.speaker != null && (
+                        <div className="px-2 py-0.5 rounded-md text-xs font-bold bg-slate-700 text-slate-300">
+                          SPEAKER_{segment.speaker.toString().padStart(2, '0')}
+                        </div>
+                      )}
+                      <span className="text-xs font-mono text-slate-400">
+                        {formatTimestamp(segment.start)} - {formatTimestamp(segment.end)}
+                      </span>
+                    </div>
+                    <p className="text-sm text-slate-300">{segment.text}</p>
+                    {segment.translation && (
+                      <p className="text-sm text-slate-500 mt-1">{segment.translation.zh}</p>
+                    )}
+                  </div>
+                ))}
+              </div>
+            </div>
+          )}
+
           {status.status === 'failed' && (
             <div className="p-4 bg-red-500/10 border border-red-500/30 rounded-lg">
               <p className="text-red-400 font-medium">处理失败</p>
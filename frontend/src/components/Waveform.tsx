@@ -0,0 +1,81 @@
+import { useEffect, useRef, useState } from 'react'
+import { getWaveformPeaks } from '@/services/api'
+import type { WaveformPeaks } from '@/types/api'
+
+interface WaveformProps {
+  resultId: string
+  currentTime: number
+  duration: number
+  onSeek: (time: number) => void
+}
+
+const HEIGHT = 48
+
+// 使用后端预先计算的峰值绘制波形，不需要下载整个音频
+export const Waveform = ({ resultId, currentTime, duration, onSeek }: WaveformProps) => {
+  const canvasRef = useRef<HTMLCanvasElement>(null)
+  const [peaks, setPeaks] = useState<WaveformPeaks | null>(null)
+
+  useEffect(() => {
+    const canvas = canvasRef.current
+    if (!canvas) return
+    let cancelled = false
+    const width = Math.max(1, Math.floor(canvas.clientWidth * window.devicePixelRatio))
+    getWaveformPeaks(resultId, width)
+      .then((data) => {
+        if (!cancelled) setPeaks(data)
+      })
+      .catch((err) => console.error('Failed to load waveform peaks:', err))
+    return () => {
+      cancelled = true
+    }
+  }, [resultId])
+
+  useEffect(() => {
+    const canvas = canvasRef.current
+    if (!canvas || !peaks) return
+    const ratio = window.devicePixelRatio
+    canvas.width = Math.floor(canvas.clientWidth * ratio)
+    canvas.height = HEIGHT * ratio
+    const ctx = canvas.getContext('2d')
+    if (!ctx) return
+
+    const count = peaks.peaks.length / 2
+    const total = duration > 0 ? duration : peaks.duration
+    const playedX = total > 0 ? (currentTime / total) * canvas.width : 0
+    const mid = canvas.height / 2
+    ctx.clearRect(0, 0, canvas.width, canvas.height)
+
+    for (let x = 0; x < canvas.width; x++) {
+      // 每个像素列取覆盖范围内峰值的最小值和最大值
+      const from = Math.floor((x / canvas.width) * count)
+      const to = Math.max(from + 1, Math.floor(((x + 1) / canvas.width) * count))
+      let min = 0
+      let max = 0
+      for (let i = from; i < to && i < count; i++) {
+        min = Math.min(min, peaks.peaks[i * 2])
+        max = Math.max(max, peaks.peaks[i * 2 + 1])
+      }
+      ctx.fillStyle = x < playedX ? '#a78bfa' : '#475569'
+      const top = mid - (max / 32768) * mid
+      const bottom = mid - (min / 32768) * mid
+      ctx.fillRect(x, top, 1, Math.max(1, bottom - top))
+    }
+  }, [peaks, currentTime, duration])
+
+  const handleClick = (event: React.MouseEvent<HTMLCanvasElement>) => {
+    const total = duration > 0 ? duration : peaks?.duration ?? 0
+    if (total <= 0) return
+    const rect = event.currentTarget.getBoundingClientRect()
+    onSeek(((event.clientX - rect.left) / rect.width) * total)
+  }
+
+  return (
+    <canvas
+      ref={canvasRef}
+      onClick={handleClick}
+      className="w-full cursor-pointer"
+      style={{ height: HEIGHT }}
+    />
+  )
+}
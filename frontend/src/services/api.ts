@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { TaskStatus, ASRResult } from '@/types/api'
+import type { TaskStatus, ASRResult, PartialResult, WaveformPeaks } from '@/types/api'
 
 const API_BASE_URL = 'http://localhost:8003/api'
 
@@ -36,6 +36,17 @@ export const getTaskStatus = async (taskId: string): Promise<TaskStatus> => {
   return response.data
 }
 
+export const getTaskEventsUrl = (taskId: string): string => {
+  return `${API_BASE_URL}/events/${taskId}`
+}
+
+export const getPartialResult = async (taskId: string, since = 0): Promise<PartialResult> => {
+  const response = await api.get<PartialResult>(`/partial/${taskId}`, {
+    params: { since }
+  })
+  return response.data
+}
+
 export const getResult = async (resultId: string): Promise<ASRResult> => {
   const response = await api.get<ASRResult>(`/result/${resultId}`)
   return response.data
@@ -45,6 +56,18 @@ export const getAudioUrl = (resultId: string): string => {
   return `${API_BASE_URL}/audio/${resultId}`
 }
 
+export const getWaveformPeaks = async (
+  resultId: string,
+  width: number,
+  start?: number,
+  end?: number
+): Promise<WaveformPeaks> => {
+  const response = await api.get<WaveformPeaks>(`/peaks/${resultId}`, {
+    params: { width, start, end }
+  })
+  return response.data
+}
+
 export const importResult = async (
   jsonFile: File,
   audioFile: File
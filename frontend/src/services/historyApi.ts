@@ -1,8 +1,8 @@
 import { api } from './api'
-import type { HistoryItem, HistoryDetail } from '@/types/history'
+import type { HistoryPage, HistoryListParams, HistoryDetail, SearchPage } from '@/types/history'
 
-export const getHistoryList = async (): Promise<HistoryItem[]> => {
-  const response = await api.get<HistoryItem[]>('/history/list')
+export const getHistoryList = async (params: HistoryListParams = {}): Promise<HistoryPage> => {
+  const response = await api.get<HistoryPage>('/history/list', { params })
   return response.data
 }
 
@@ -10,3 +10,11 @@ export const loadHistory = async (resultId: string): Promise<HistoryDetail> => {
   const response = await api.get<HistoryDetail>(`/history/load/${resultId}`)
   return response.data
 }
+
+export const searchHistory = async (
+  q: string,
+  params: { offset?: number; limit?: number; result_id?: string } = {}
+): Promise<SearchPage> => {
+  const response = await api.get<SearchPage>('/history/search', { params: { q, ...params } })
+  return response.data
+}
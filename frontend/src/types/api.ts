@@ -26,6 +26,14 @@ export interface ASRResult {
   audio_path: string
   updated_timestamp?: string
   processing_time?: number  // 处理耗时（秒）
+  stage_timings?: Record<string, StageTiming>  // 各阶段耗时
+}
+
+export interface StageTiming {
+  wall_time: number  // 墙钟时间（秒）
+  cpu_time: number  // 进程 CPU 时间（秒）
+  peak_rss_mb: number | null  // 峰值内存（MB）
+  rtf: number | null  // 实时率 = 墙钟时间 / 音频时长
 }
 
 export interface TaskStatus {
@@ -34,4 +42,38 @@ export interface TaskStatus {
   progress: number
   message: string
   result_id?: string
+  queue_position?: number  // 排队位置（从 1 开始）
+  eta_seconds?: number  // 预计多少秒后完成
+}
+
+export interface PartialSegment {
+  index: number
+  text: string
+  start: number
+  end: number
+  speaker: number | null  // 说话人识别完成前为 null
+  translation: TranslationModel | null  // 翻译完成前为 null
+}
+
+export interface PartialResult {
+  task_id: string
+  status: TaskStatus['status']
+  progress: number
+  segments: PartialSegment[]
+  total_segments: number
+  transcription_done: boolean
+  speakers_ready: boolean
+  translations_ready: boolean
+  result_id?: string
+}
+
+export interface WaveformPeaks {
+  level: number
+  levels: number[]  // 各级别每个峰值覆盖的样本数
+  samples_per_peak: number
+  sample_rate: number
+  duration: number
+  start: number
+  end: number
+  peaks: number[]  // 交替排列的 int16 (min, max)
 }
@@ -8,6 +8,46 @@ export interface HistoryItem {
   processing_time?: number  // 处理耗时（秒）
 }
 
+export interface HistoryPage {
+  items: HistoryItem[]
+  total: number  // 符合筛选条件的记录数
+  offset: number
+  limit: number
+}
+
+export interface HistoryListParams {
+  offset?: number
+  limit?: number
+  sort?: 'timestamp' | 'total_duration' | 'speaker_count' | 'filename' | 'processing_time'
+  order?: 'asc' | 'desc'
+  date_from?: string
+  date_to?: string
+  min_duration?: number
+  max_duration?: number
+  min_speakers?: number
+  max_speakers?: number
+}
+
+export interface SearchHit {
+  result_id: string
+  filename?: string
+  sentence_index: number | null  // 结果没有分句、命中整段文本时为 null
+  start: number | null  // 句子开始时间（秒）
+  end: number | null
+  speaker: number | null
+  text: string
+  translation_zh?: string | null
+  translation_en?: string | null
+}
+
+export interface SearchPage {
+  query: string
+  hits: SearchHit[]
+  total: number
+  offset: number
+  limit: number
+}
+
 export interface HistoryDetail extends HistoryItem {
   sentences: any[]
   speakers: number[]
@@ -61,7 +61,7 @@ def test_translation():
     for seg in segments:
         print(f"  - {seg['text']}")
 
-    translated = service.translate_all(segments)
+    translated, _ = service.translate_all(segments)
     print("\n翻译后片段:")
     for seg in translated:
         trans = seg.get("translation", {})